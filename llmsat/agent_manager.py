@@ -1,20 +1,29 @@
 """Agent Manager"""
 
+import asyncio
 import json
+import logging
 import os
-import queue
-import threading
+import time
 from pathlib import Path
-import asyncio
+from typing import List, Optional, Tuple
+
 import prompt
 import zmq
+import zmq.asyncio
+from pydantic import BaseModel
 from decouple import config
 from langchain.agents import AgentType, initialize_agent
 from langchain.agents.agent import AgentExecutor
+from langchain.agents.tools import InvalidTool
 from langchain.tools import tool
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import AsyncCallbackManager
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumpd
 from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
-from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import (
     ChatPromptTemplate,
     MessagesPlaceholder,
@@ -22,9 +31,32 @@ from langchain.prompts import (
     HumanMessagePromptTemplate,
 )
 
-from llmsat.libs import utils
+from llmsat.libs import protocol, utils
+from llmsat.libs.agent_memory import TokenBudgetMemory
+from llmsat.libs.dispatch import Dispatcher
+from llmsat.libs.llm_cache import LRUDiskCache, ReplayChatModel, SessionRecorder
+from llmsat.libs.streaming import ResponseStream
 
 CONFIG_PATH = Path("llmsat/app_config.json")
+COMMAND_TIMEOUT = 5  # seconds to wait for a command before returning partial output
+SEND_HIGH_WATER_MARK = 100  # messages queued for the console before sends wait
+MEMORY_TOKEN_LIMIT = 3000  # conversation history, including pinned facts
+STEPS_TOKEN_LIMIT = 2000  # agent steps within a session
+PREEMPT_PRIORITY = utils.Priority.HIGH  # alerts that cancel the response in progress
+
+
+class Reaction(BaseModel):
+    """When the agent was handed an alert."""
+
+    alert: str
+    priority: utils.Priority
+    received_at: float  # time.monotonic()
+    reacted_at: float
+    preempted: bool  # whether the response being generated was cancelled for it
+
+    @property
+    def latency(self) -> float:
+        return self.reacted_at - self.received_at
 
 
 class AgentManager:
@@ -48,39 +80,52 @@ class AgentManager:
         model: str,
         temperature: float,
         port: int,
+        llm: BaseChatModel = None,
+        cache: BaseCache = None,
+        record_path: Path = None,
     ) -> None:
+        """
+        Args:
+            langchain_key: LangSmith API key, tracing is off without one
+            llm: chat model to use instead of OpenAI, e.g. to replay a session
+            cache: cache for OpenAI responses
+            record_path: JSON Lines file to record the model's responses to
+        """
         # setup singleton to enable class methods as langchain tools
         if AgentManager._initialized:
             return
         AgentManager._initialized = True
 
         # setup langsmith
-        os.environ["LANGCHAIN_TRACING_V2"] = "true"
+        os.environ["LANGCHAIN_TRACING_V2"] = "true" if langchain_key else "false"
         os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
-        os.environ["LANGCHAIN_API_KEY"] = langchain_key
+        os.environ["LANGCHAIN_API_KEY"] = langchain_key or ""
         os.environ["LANGCHAIN_PROJECT"] = "llmsat"
 
-        # threads
-        self.streaming_thread = None
-        self.receive_thread = threading.Thread(
-            name="agent-receive-message", target=self.receive_message, daemon=True
-        )
-
         # setup agent
-        llm = ChatOpenAI(
-            openai_api_key=openai_key,
-            model=model,
-            temperature=temperature,
-            streaming=True,
-        )
+        if llm is None:
+            llm = ChatOpenAI(
+                openai_api_key=openai_key,
+                model=model,
+                temperature=temperature,
+                streaming=True,
+                cache=cache,
+            )
+        if record_path is not None:
+            llm.callbacks = [*(llm.callbacks or []), SessionRecorder(record_path)]
         tools = [self.run, self.sleep]
 
-        memory = ConversationBufferWindowMemory(k=2, return_messages=True)
-        # history = MessagesPlaceholder(variable_name="history")
+        self.memory = TokenBudgetMemory(
+            llm=llm,
+            max_token_limit=MEMORY_TOKEN_LIMIT,
+            steps_token_limit=STEPS_TOKEN_LIMIT,
+            return_messages=True,
+        )
+        history = MessagesPlaceholder(variable_name="history")
         self.agent: AgentExecutor = initialize_agent(
             tools=tools,
             llm=llm,
-            memory=memory,
+            memory=self.memory,
             agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
             verbose=True,
             agent_kwargs={
@@ -88,30 +133,31 @@ class AgentManager:
                 "format_instructions": prompt.FORMAT_INSTRUCTIONS,
                 "suffix": prompt.SUFFIX,
                 # "max_execution_time": 9999,
-                # "history": [history],
-                # "memory_prompts": [history],
-                # "input_variables": ["input", "agent_scratchpad", "history"],
+                "memory_prompts": [history],
+                "input_variables": ["input", "agent_scratchpad", "history"],
             },
             max_iterations=None,
         )
 
         # setup connection to console
-        self.message_queue = queue.Queue()
+        self.dispatcher = Dispatcher(on_version=self.on_version)
         self.connected = False
-        context = zmq.Context()
+        self.protocol_version = protocol.PROTOCOL_VERSION
+        context = zmq.asyncio.Context()
         self.connection = context.socket(zmq.PAIR)
+        self.connection.setsockopt(zmq.SNDHWM, SEND_HIGH_WATER_MARK)
         self.connection.connect(f"tcp://localhost:{port}")
 
-        # start message receiver
-        self.receive_thread.start()
-
-        print("Connecting to console session")
-        connect_message = utils.Message(type=utils.MessageType.CONNECT)
-        self.send_message(connect_message)
-        self.connected = True
+        # alerts are handed to a tool waiting for one, such as sleep, or held until
+        # the agent's next step
+        self.alert_waiter: Optional[asyncio.Future] = None
+        self.reply_waiter: Optional[asyncio.Future] = None  # version 1 command reply
+        self.pending_alerts: List[utils.Message] = []
+        self.planning: Optional[asyncio.Task] = None  # agent generating a response
+        self.preempted = False  # whether the held alerts cancelled a response
+        self.reactions: List[Reaction] = []
 
         print("Agent manager initialized")
-        self.main_loop()
 
     @staticmethod
     def _get_instance():
@@ -120,106 +166,268 @@ class AgentManager:
 
     @staticmethod
     @tool()
-    def run(input: str) -> str:
+    async def run(input: str) -> str:
         """Write a command to the console"""
         manager = AgentManager._get_instance()
-        message = utils.Message(type=utils.MessageType.COMMAND, data=input)
-        manager.send_message(message)
-
-        # get all messages in the queue at once (TODO: temporary until streaming works)
-        response: str = manager.message_queue.get(block=True, timeout=5)
-        # continue extracting messages from the queue if still not empty
-        # while not manager.message_queue.empty():
-        #     try:
-        #         response += manager.message_queue.get(block=False)
-        #     except queue.Empty:
-        #         break  # Break out of the loop if the queue is empty
+
+        if manager.protocol_version < protocol.STREAMING_VERSION:
+            # without correlation IDs the reply is indistinguishable from an alert, so
+            # the next message from the console is taken as the reply
+            message = utils.Message(type=utils.MessageType.COMMAND, data=input)
+            reply = manager.expect_reply()
+            await manager.send_message(message)
+            try:
+                return (await asyncio.wait_for(reply, COMMAND_TIMEOUT)).data or ""
+            except asyncio.TimeoutError:
+                return (
+                    "(Command still running. Its output will arrive as a notification)"
+                )
+            finally:
+                manager.reply_waiter = None
+
+        stream = await manager.execute(input)
+        response = await stream.read_async(timeout=COMMAND_TIMEOUT)
+        if stream.detached:
+            response += "\n(Command still running. The rest of its output will arrive as a notification)"
 
         return response
 
     @staticmethod
     @tool()
-    def sleep() -> str:
+    async def sleep() -> str:
         """Sleep until the next notification is received"""
         manager = AgentManager._get_instance()
-        response = manager.message_queue.get(block=True)
-
-        return response
+        alert = await manager.wait_for_alert()
 
-    def start_streaming_thread(self, input_str: str):
-        if self.streaming_thread is not None:
-            self.streaming_thread.join()  # Ensure previous thread is finished
+        return alert.data or ""
 
-        self.streaming_thread = threading.Thread(
-            target=self.stream_agent_response, args=[str(input_str)]
+    async def execute(self, command: str) -> ResponseStream:
+        """Send a command to the console and stream its output as it is printed."""
+        stream = self.dispatcher.open(command)
+        message = utils.Message(
+            type=utils.MessageType.COMMAND, data=command, id=stream.id
         )
-        self.streaming_thread.start()
-
-    def stream_agent_response(self, input_str: str):
-        async def async_stream():
-            async for event in self.agent.astream_events(
-                {"input": input_str},
-                version="v1",
+        await self.send_message(message)
+
+        return stream
+
+    def on_version(self, version: int):
+        """Use the protocol version agreed with the console."""
+        self.protocol_version = version
+
+    def expect_reply(self) -> asyncio.Future:
+        """A future for the next message from a version 1 console, to be handed to
+        the command waiting for its reply rather than recorded as an alert."""
+        self.reply_waiter = asyncio.get_running_loop().create_future()
+        return self.reply_waiter
+
+    async def wait_for_alert(self) -> utils.Message:
+        """Wait for the next alert to be handed to the calling tool."""
+        if self.pending_alerts:
+            return self._take_alerts()[0]
+
+        self.alert_waiter = asyncio.get_running_loop().create_future()
+        try:
+            return await self.alert_waiter
+        finally:
+            self.alert_waiter = None
+
+    async def watch_alerts(self):
+        """Hand each alert to the tool waiting for one, or hold it for the agent's next
+        step. An alert of PREEMPT_PRIORITY also cancels the response the agent is
+        generating, so that the step is retried at once with the alert."""
+        while True:
+            alert = await self.dispatcher.alerts.get_async()
+            if self.reply_waiter is not None and not self.reply_waiter.done():
+                self.reply_waiter.set_result(alert)
+                continue
+            if self.alert_waiter is not None and not self.alert_waiter.done():
+                self.alert_waiter.set_result(self._take_alerts(alert)[0])
+                continue
+
+            self.pending_alerts.append(alert)
+            if (
+                alert.priority >= PREEMPT_PRIORITY
+                and self.planning is not None
+                and not self.planning.done()
             ):
-                kind = event["event"]
-
-                # Print tokens as they are generated by the agent
-                if kind == "on_chat_model_stream":
-                    content = event["data"]["chunk"].content
-                    if content:
-                        pass  # print(content, end="")
+                self.planning.cancel()
 
-                # TODO: if an message is recieved in the queue it is an alert message, so interrupt the stream and pass the alert to the LLM agent so it can handle it
-                # https://www.reddit.com/r/LangChain/comments/13q1p5c/how_do_you_stop_streaming_when_using_chatgpt_api/
-
-        asyncio.run(async_stream())
+    def _take_alerts(self, *alerts: utils.Message) -> List[utils.Message]:
+        """Take the held alerts, most urgent first, and record the reaction to them."""
+        alerts = sorted(
+            [*self.pending_alerts, *alerts], key=lambda alert: -alert.priority
+        )
+        self.pending_alerts = []
+        for alert in alerts:
+            self._record_reaction(alert)
+        return alerts
+
+    def _record_reaction(self, alert: utils.Message):
+        reaction = Reaction(
+            alert=alert.data or "",
+            priority=alert.priority,
+            received_at=alert.received_at or time.monotonic(),
+            reacted_at=time.monotonic(),
+            preempted=self.preempted,
+        )
+        self.reactions.append(reaction)
+        logging.info(
+            f"Reacted to {reaction.priority.name} alert in {reaction.latency * 1000:.1f} ms (preempted={reaction.preempted})"
+        )
 
-    def send_message(self, message: utils.Message):
+    def reaction_times(self, priority: utils.Priority = None) -> List[float]:
+        """Seconds from receiving each alert to handing it to the agent."""
+        return [
+            reaction.latency
+            for reaction in self.reactions
+            if priority is None or reaction.priority == priority
+        ]
+
+    async def run_session(self, input_str: str) -> str:
+        """Run the agent on an input while watching for alerts."""
+        watcher = asyncio.create_task(self.watch_alerts())
+        try:
+            return await self.run_agent(input_str)
+        finally:
+            watcher.cancel()
+
+    async def run_agent(self, input_str: str) -> str:
+        """Run the agent's reasoning loop one step at a time.
+
+        Held alerts are added to the steps as observations before each response is
+        generated, and a response cancelled by an urgent alert is generated again with
+        the alert, keeping the steps taken so far. The agent cannot finish while alerts
+        are waiting for it.
+        """
+        executor = self.agent
+        inputs = executor.prep_inputs({"input": input_str})
+        tools = {tool.name: tool for tool in executor.tools}
+        callback_manager = AsyncCallbackManager.configure(
+            None, executor.callbacks, executor.verbose
+        )
+        run_manager = await callback_manager.on_chain_start(dumpd(executor), inputs)
+        steps: List[Tuple[AgentAction, str]] = []
+
+        try:
+            while True:
+                for action, observation in self._alert_steps():
+                    await run_manager.on_text(
+                        f"{action.log}\nObservation: {observation}\n",
+                        color="yellow",
+                        verbose=executor.verbose,
+                    )
+                    steps.append((action, observation))
+                self.planning = asyncio.create_task(
+                    executor.agent.aplan(
+                        self.memory.compact_steps(steps),
+                        callbacks=run_manager.get_child(),
+                        **inputs,
+                    )
+                )
+                try:
+                    await asyncio.wait({self.planning})
+                finally:
+                    self.planning.cancel()  # if the session itself is cancelled
+                if self.planning.cancelled():
+                    self.preempted = True
+                    continue
+                output = self.planning.result()
+
+                if isinstance(output, AgentFinish):
+                    if self.pending_alerts:
+                        continue
+                    await run_manager.on_agent_finish(output, color="green")
+                    outputs = await executor.aprep_outputs(inputs, output.return_values)
+                    await run_manager.on_chain_end(outputs)
+                    return outputs["output"]
+
+                await run_manager.on_agent_action(output, color="green")
+                tool_kwargs = executor.agent.tool_run_logging_kwargs()
+                if output.tool in tools:
+                    observation = await tools[output.tool].arun(
+                        output.tool_input,
+                        verbose=executor.verbose,
+                        color="blue",
+                        callbacks=run_manager.get_child(),
+                        **tool_kwargs,
+                    )
+                else:
+                    observation = await InvalidTool().arun(
+                        {
+                            "requested_tool_name": output.tool,
+                            "available_tool_names": list(tools),
+                        },
+                        verbose=executor.verbose,
+                        callbacks=run_manager.get_child(),
+                        **tool_kwargs,
+                    )
+                steps.append((output, observation))
+        except BaseException as e:
+            await run_manager.on_chain_error(e)
+            raise
+        finally:
+            self.planning = None
+
+    def _alert_steps(self) -> List[Tuple[AgentAction, str]]:
+        """Held alerts as agent steps, each observed after a note of how it arrived."""
+        if not self.pending_alerts:
+            return []
+
+        log = prompt.INTERRUPTED if self.preempted else prompt.NOTIFIED
+        steps = [
+            (AgentAction(tool="notification", tool_input={}, log=log), alert.data or "")
+            for alert in self._take_alerts()
+        ]
+        self.preempted = False
+        return steps
+
+    async def send_message(self, message: utils.Message, version: int = None):
         """Send a message to the server"""
-        self.connection.send_pyobj(message)
+        await protocol.send_async(
+            self.connection, message, version or self.protocol_version
+        )
 
-    def receive_message(self):
-        """Receive messages from the console asynchronously and add them to the queue."""
+    async def receive_message(self):
+        """Receive messages from the console and dispatch them."""
         while True:
-            message = self.connection.recv_string()
-            self.message_queue.put(message)
-
-    def main_loop(self):
-        # while True:
-        #     if not self.connected:  # not the first connection
-        #         alert = self.message_queue.get(block=True)
-        #         print("Connecting to console session")
-        #         connect_message = utils.Message(type=utils.MessageType.CONNECT)
-        #         self.send_message(connect_message)
-        #         self.connected = True
-
-        #         response = self.message_queue.get(block=True)
-        #         result = self.start_streaming_thread(response + "\n" + alert)
-
-        #         self.streaming_thread.join()
-        #         disconnect_message = utils.Message(type=utils.MessageType.DISCONNECT)
-        #         self.send_message(disconnect_message)
-        #         self.connected = False
-
-        #     else:  # first connection
-        response = self.message_queue.get(block=True)
-        result = self.start_streaming_thread(response)
+            self.dispatcher.dispatch(await protocol.recv_async(self.connection))
+
+    async def main_loop(self):
+        receiver = asyncio.create_task(self.receive_message())
+
+        print("Connecting to console session")
+        dashboard = asyncio.wrap_future(self.dispatcher.expect_connection())
+        connect_message = utils.Message(
+            type=utils.MessageType.CONNECT, data=self.dispatcher.connect_payload()
+        )
+        await self.send_message(connect_message, version=1)
+        self.connected = True
+
+        result = await self.run_session(self.memory.deduplicate(await dashboard))
         print(result)
-        self.streaming_thread.join()
 
         disconnect_message = utils.Message(type=utils.MessageType.DISCONNECT)
-        self.send_message(disconnect_message)
+        await self.send_message(disconnect_message)
         self.connected = False
+        receiver.cancel()
 
 
 if __name__ == "__main__":
-    LANGCHAIN_KEY = config("LANGCHAIN_API_KEY")
-    OPENAI_KEY = str(config("OPENAI", cast=str))
-
     with open(CONFIG_PATH, "r") as file:
         app_config_data = json.load(file)
         app_config = utils.AppConfig(**app_config_data)
 
+    if app_config.replay_session:
+        # offline: no OpenAI calls and no tracing
+        print(f"Replaying '{app_config.replay_session}'")
+        LANGCHAIN_KEY = OPENAI_KEY = None
+        llm = ReplayChatModel.from_recording(Path(app_config.replay_session))
+    else:
+        LANGCHAIN_KEY = config("LANGCHAIN_API_KEY")
+        OPENAI_KEY = str(config("OPENAI", cast=str))
+        llm = None
+
     print(app_config.port)
     agent_manager = AgentManager(
         openai_key=OPENAI_KEY,
@@ -227,4 +435,12 @@ if __name__ == "__main__":
         model=app_config.model,
         temperature=app_config.temperature,
         port=app_config.port,
+        llm=llm,
+        cache=LRUDiskCache(max_entries=app_config.llm_cache_size)
+        if app_config.llm_cache
+        else None,
+        record_path=Path(app_config.record_session)
+        if app_config.record_session
+        else None,
     )
+    asyncio.run(agent_manager.main_loop())
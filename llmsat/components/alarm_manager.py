@@ -1,16 +1,19 @@
 """AlarmManager class."""
 
+import heapq
 import json
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from cmd2 import CommandSet, with_argparser, with_default_category
 from pydantic import BaseModel, Field, field_serializer
 
+from llmsat.components.orbit_propagator import OrbitPropagator
 from llmsat.libs import utils
 from llmsat.libs.krpc_types import Orbit
+from llmsat.libs.telemetry import TelemetryHub
 
 
 class Alarm(BaseModel):
@@ -55,11 +58,73 @@ class Alarm(BaseModel):
         self.obj.name = value
 
 
+class AlarmSchedule:
+    """Min-heap of pending alarm trigger times, keyed by alarm id.
+
+    Removed or rescheduled alarms are discarded lazily when they reach the top of the
+    heap, so every operation is O(log n).
+    """
+
+    def __init__(self):
+        self._heap: List[tuple[float, str]] = []
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def push(self, alarm_id: str, ut: float):
+        """Schedule (or reschedule) an alarm to trigger at the given universal time."""
+        with self._lock:
+            self._entries[alarm_id] = ut
+            heapq.heappush(self._heap, (ut, alarm_id))
+
+    def remove(self, alarm_id: str):
+        """Unschedule an alarm."""
+        with self._lock:
+            self._entries.pop(alarm_id, None)
+
+    def replace(self, entries: Dict[str, float]):
+        """Replace the whole schedule with the given alarm trigger times."""
+        with self._lock:
+            self._entries = dict(entries)
+            self._heap = [(ut, alarm_id) for alarm_id, ut in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def next_ut(self) -> Optional[float]:
+        """The earliest pending trigger time, or None if no alarms are scheduled."""
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, ut: float) -> List[str]:
+        """Remove and return the ids of all alarms due at or before the given time."""
+        due = []
+        with self._lock:
+            self._discard_stale()
+            while self._heap and self._heap[0][0] <= ut:
+                _, alarm_id = heapq.heappop(self._heap)
+                del self._entries[alarm_id]
+                due.append(alarm_id)
+                self._discard_stale()
+
+        return due
+
+    def _discard_stale(self):
+        """Pop heap entries that no longer match the live schedule."""
+        while self._heap:
+            ut, alarm_id = self._heap[0]
+            if self._entries.get(alarm_id) == ut:
+                return
+            heapq.heappop(self._heap)
+
+
 @with_default_category("AlarmManager")
 class AlarmManager(CommandSet):
     """Functions for setting alarms."""
 
     TRIGGERED_STR = "(TRIGGERED)"
+    RECONCILE_INTERVAL = 30  # seconds between full syncs with Kerbal Alarm Clock
 
     _instance = None
     _initialized = False
@@ -76,14 +141,20 @@ class AlarmManager(CommandSet):
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
         self.kac = self.connection.kerbal_alarm_clock
-
-        if remove_alarms_on_init:
-            self._remove_all_alarms()
-
-        self.ut_stream = self.connection.add_stream(
-            getattr, self.connection.space_center, "ut"
-        )
-        # Start the alarm monitoring in a separate thread
+        self.telemetry = TelemetryHub(self.connection)
+
+        # local copy of the alarm clock, resynced on create and on a slow reconcile.
+        # The lock keeps the copy and the schedule consistent between the console
+        # adding alarms and the monitor thread reconciling and firing them
+        self._alarms: Dict[str, Alarm] = {}
+        self._schedule = AlarmSchedule()
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._remove_alarms_on_init = remove_alarms_on_init
+        self._ready = threading.Event()  # set once synced with Kerbal Alarm Clock
+
+        # Sync with the alarm clock and monitor alarms in a separate thread, as
+        # removing and reading every alarm would hold up the console's startup
         self.alarm_thread = threading.Thread(target=self.monitor_alarms, daemon=True)
         self.alarm_thread.start()
 
@@ -103,14 +174,9 @@ class AlarmManager(CommandSet):
             return
 
         # calculate remaining time for each alarm and store in a list of tuples
+        current_time = utils.ksp_ut_to_datetime(self.telemetry.get("ut"))
         alarms_with_remaining_time = [
-            (
-                alarm,
-                alarm.get_remaining_time(
-                    utils.ksp_ut_to_datetime(self.connection.space_center.ut)
-                ),
-            )
-            for alarm in alarms.values()
+            (alarm, alarm.get_remaining_time(current_time)) for alarm in alarms.values()
         ]
 
         # Sort the alarms in ascending order by remaining time
@@ -127,7 +193,11 @@ class AlarmManager(CommandSet):
 
     def get_alarms(self) -> Dict[str, Alarm]:
         """Get all alarms"""
+        self._ready.wait()
+
+        return self._read_alarms()
 
+    def _read_alarms(self) -> Dict[str, Alarm]:
         alarm_objs = self.kac.alarms
         alarms: Dict[str, Alarm] = {}
         for alarm_obj in alarm_objs:
@@ -140,13 +210,17 @@ class AlarmManager(CommandSet):
         """Kerbal Alarm Clock alarms do not get removed when returning to an earlier quick save,
         so this function deletes them manually."""
 
-        alarm_objs = self.kac.alarms
-        for alarm_obj in alarm_objs:
-            alarm_obj.remove()
+        with self._lock:
+            alarm_objs = self.kac.alarms
+            for alarm_obj in alarm_objs:
+                alarm_obj.remove()
+
+            self._alarms.clear()
+            self._schedule.replace({})
 
     add_alarm_parser = utils.CustomCmd2ArgumentParser(
         cmd_instance_method=_get_cmd_instance,
-        epilog=f"Returns:\n{Alarm.model_json_schema()['title']}: {json.dumps(Alarm.model_json_schema()['properties'], indent=4)}",
+        epilog=f"Returns:\n{utils.model_schema(Alarm)['title']}: {json.dumps(utils.model_schema(Alarm)['properties'], indent=4)}",
     )
     add_alarm_parser.add_argument(
         "-name",
@@ -208,12 +282,13 @@ class AlarmManager(CommandSet):
         alarm_obj.vessel = self.vessel
 
         alarm = Alarm(alarm_obj)
+        self._track_alarm(alarm)
 
         return alarm
 
     add_alarm_at_apoapsis_parser = utils.CustomCmd2ArgumentParser(
         cmd_instance_method=_get_cmd_instance,
-        epilog=f"Returns:\n{Alarm.model_json_schema()['title']}: {json.dumps(Alarm.model_json_schema()['properties'], indent=4)}",
+        epilog=f"Returns:\n{utils.model_schema(Alarm)['title']}: {json.dumps(utils.model_schema(Alarm)['properties'], indent=4)}",
     )
     add_alarm_at_apoapsis_parser.add_argument(
         "-name",
@@ -251,24 +326,25 @@ class AlarmManager(CommandSet):
         if name in alarms:
             raise ValueError(f"An alarm with name '{name}' already exists")
 
-        orbit = Orbit(self.vessel.orbit)
+        orbit = Orbit(self.telemetry.get("orbit"))
 
         alarm_obj = self.kac.create_alarm(
             type=self.kac.AlarmType.apoapsis,
             name=name,
-            ut=self.connection.space_center.ut + orbit.time_to_apoapsis,
+            ut=self.telemetry.get("ut") + orbit.time_to_apoapsis,
         )
         alarm_obj.notes = description if description is not None else ""
         alarm_obj.action = self.kac.AlarmAction.kill_warp
         alarm_obj.vessel = self.vessel
 
         alarm = Alarm(alarm_obj)
+        self._track_alarm(alarm)
 
         return alarm
 
     add_alarm_at_apoapsis_periapsis = utils.CustomCmd2ArgumentParser(
         cmd_instance_method=_get_cmd_instance,
-        epilog=f"Returns:\n{Alarm.model_json_schema()['title']}: {json.dumps(Alarm.model_json_schema()['properties'], indent=4)}",
+        epilog=f"Returns:\n{utils.model_schema(Alarm)['title']}: {json.dumps(utils.model_schema(Alarm)['properties'], indent=4)}",
     )
     add_alarm_at_apoapsis_periapsis.add_argument(
         "-name",
@@ -306,42 +382,176 @@ class AlarmManager(CommandSet):
         if name in alarms:
             raise ValueError(f"An alarm with name '{name}' already exists")
 
-        orbit = Orbit(self.vessel.orbit)
+        orbit = Orbit(self.telemetry.get("orbit"))
 
         alarm_obj = self.kac.create_alarm(
             type=self.kac.AlarmType.periapsis,
             name=name,
-            ut=self.connection.space_center.ut + orbit.time_to_periapsis,
+            ut=self.telemetry.get("ut") + orbit.time_to_periapsis,
         )
         alarm_obj.notes = description if description is not None else ""
         alarm_obj.action = self.kac.AlarmAction.kill_warp
         alarm_obj.vessel = self.vessel
 
         alarm = Alarm(alarm_obj)
+        self._track_alarm(alarm)
 
         return alarm
 
-    def _on_alarm_trigger(self, alarm: Alarm):
+    add_alarm_at_eclipse_parser = utils.CustomCmd2ArgumentParser(
+        cmd_instance_method=_get_cmd_instance,
+        epilog=f"Returns:\n{utils.model_schema(Alarm)['title']}: {json.dumps(utils.model_schema(Alarm)['properties'], indent=4)}",
+    )
+    add_alarm_at_eclipse_parser.add_argument(
+        "-name",
+        type=str,
+        required=True,
+        help="Name of the alarm",
+    )
+    add_alarm_at_eclipse_parser.add_argument(
+        "-desc",
+        type=str,
+        required=False,
+        help="Description for the alarm",
+    )
+    add_alarm_at_eclipse_parser.add_argument(
+        "-exit",
+        action="store_true",
+        help="Trigger when the vessel leaves the shadow instead of when it enters it",
+    )
+    add_alarm_at_eclipse_parser.add_argument(
+        "-target",
+        type=str,
+        required=False,
+        help="Body whose line of sight is lost or regained. Defaults to the sun, for eclipses",
+    )
+
+    @with_argparser(add_alarm_at_eclipse_parser)
+    def do_add_alarm_at_eclipse(self, args):
+        """Create a new alarm to trigger at the next eclipse entry or exit"""
+
+        try:
+            new_alarm = self.add_alarm_at_eclipse(
+                name=args.name,
+                description=args.desc,
+                exit=args.exit,
+                target=args.target,
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(
+            f"New alarm created:\n{new_alarm.model_dump_json(indent=4, exclude=['obj'])}"
+        )
+
+    def add_alarm_at_eclipse(
+        self, name: str, description: str, exit: bool = False, target: str = None
+    ) -> Alarm:
+        """Create a new alarm to trigger at the next eclipse entry, or exit, within the
+        next two orbits. With a target, at the next loss or regain of the line of sight
+        to it."""
+        report = OrbitPropagator(self.connection).get_eclipses(target=target, orbits=2)
+
+        if exit:
+            times = [
+                interval.end
+                for interval in report.intervals
+                if interval.end < report.end
+            ]
+        else:
+            times = [
+                interval.start
+                for interval in report.intervals
+                if interval.start > report.start
+            ]
+        if not times:
+            raise ValueError(
+                f"The line of sight to {report.target} is not {'regained' if exit else 'lost'} within the next two orbits"
+            )
+
+        return self.add_alarm(name=name, time=times[0], description=description)
+
+    def _on_alarm_trigger(self, alarm: Alarm, ut: float):
         """Handle a triggered alarm"""
 
         self._cmd.async_alert(
-            f"{utils.ksp_ut_to_datetime(self.connection.space_center.ut)}::AlarmManager:: Alarm triggered:\n{alarm.model_dump_json(exclude=['obj'],indent=4)}"
+            f"{utils.ksp_ut_to_datetime(ut)}::AlarmManager:: Alarm triggered:\n{alarm.model_dump_json(exclude=['obj'],indent=4)}",
+            priority=utils.Priority.HIGH,
         )
 
+    def _track_alarm(self, alarm: Alarm):
+        """Add a newly created alarm to the local schedule."""
+        with self._lock:
+            self._alarms[alarm.id] = alarm
+            self._schedule.push(alarm.id, utils.datetime_to_ksp_ut(alarm.time))
+        self._on_ut_update(self.telemetry.get("ut"))
+
+    def _reconcile(self):
+        """Resync the local schedule with the alarms held by Kerbal Alarm Clock.
+
+        The alarms are read under the lock, so an alarm created meanwhile is either
+        in the read or tracked after it, never dropped.
+        """
+        with self._lock:
+            alarms = self._read_alarms()
+            self._alarms.clear()
+            self._alarms.update(alarms)
+            self._schedule.replace(
+                {
+                    alarm.id: utils.datetime_to_ksp_ut(alarm.time)
+                    for alarm in alarms.values()
+                    if AlarmManager.TRIGGERED_STR not in alarm.name
+                }
+            )
+
+    def _pop_due_alarms(self, ut: float) -> List[Alarm]:
+        """Remove the alarms due at or before the given time from the schedule."""
+        with self._lock:
+            due = [
+                self._alarms.get(alarm_id) for alarm_id in self._schedule.pop_due(ut)
+            ]
+        # an alarm removed in game since it was scheduled is skipped
+        return [alarm for alarm in due if alarm is not None]
+
+    def _on_ut_update(self, ut: float):
+        """Stream callback. Wakes the monitor thread once the earliest alarm is due."""
+        next_ut = self._schedule.next_ut()
+        if next_ut is not None and ut >= next_ut:
+            self._wake_event.set()
+
+    def _sync(self):
+        """Take over the alarms held by Kerbal Alarm Clock, first removing them if set
+        to on init. Commands that read alarms wait for this."""
+        try:
+            if self._remove_alarms_on_init:
+                self._remove_all_alarms()
+
+            self._reconcile()
+            self.telemetry.add_callback("ut", self._on_ut_update)
+            self._on_ut_update(self.telemetry.get("ut"))
+        finally:
+            self._ready.set()
+
     def monitor_alarms(self):
-        """Async monitoring of alarms"""
+        """Async monitoring of alarms.
+
+        Syncs with Kerbal Alarm Clock, then sleeps until the ut stream callback reports
+        that the earliest scheduled alarm is due, falling back to a full reconcile every
+        RECONCILE_INTERVAL seconds.
+        """
+        self._sync()
         time.sleep(
             1
         )  # need to make sure no alarms are raised before cmd2 is fully initialized
         while True:
-            current_time = utils.ksp_ut_to_datetime(self.ut_stream())
-
-            alarms = self.get_alarms()
-            for alarm in alarms.values():
-                if (
-                    alarm.get_remaining_time(current_time) <= timedelta(0)
-                    and AlarmManager.TRIGGERED_STR not in alarm.name
-                ):
-                    # alarm has triggered
-                    self._on_alarm_trigger(alarm)
-                    alarm.update_name(alarm.name + f" {AlarmManager.TRIGGERED_STR}")
+            self._wake_event.wait(timeout=AlarmManager.RECONCILE_INTERVAL)
+            self._wake_event.clear()
+
+            # resync before firing so alarms edited or removed in game are respected
+            self._reconcile()
+
+            ut = self.telemetry.get("ut")
+            for alarm in self._pop_due_alarms(ut):
+                self._on_alarm_trigger(alarm, ut)
+                alarm.update_name(alarm.name + f" {AlarmManager.TRIGGERED_STR}")
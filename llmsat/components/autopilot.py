@@ -6,6 +6,7 @@ from cmd2 import CommandSet, with_argparser, with_default_category
 import threading
 from llmsat.libs import utils
 from llmsat.libs.krpc_types import Node
+from llmsat.libs.telemetry import TelemetryHub
 import time
 
 
@@ -34,6 +35,7 @@ class AutopilotService(CommandSet):
         self.connection = krpc_connection
         self.pilot = self.connection.mech_jeb
         self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
 
         AutopilotService._initialized = True
 
@@ -359,7 +361,7 @@ class AutopilotService(CommandSet):
         """Check the status of the autopilot."""
 
         if self.pilot.node_executor.enabled:
-            if self.vessel.thrust > 0:
+            if self.telemetry.get("thrust") > 0:
                 status = AutopilotStatus.ACTIVE
             else:
                 status = AutopilotStatus.IDLE
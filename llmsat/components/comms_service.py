@@ -3,13 +3,19 @@
 import json
 from datetime import datetime
 from pathlib import Path
+from string import Template
+from typing import List
 
 from cmd2 import CommandSet, with_argparser, with_default_category
 from pydantic import BaseModel
 
 from llmsat.libs import utils
+from llmsat.libs.jsonl_log import JsonlLog
+from llmsat.libs.telemetry import TelemetryHub
 
-COMM_LOG_PATH = Path("disk/comm_log.json")
+COMM_LOG_PATH = Path("disk/comm_log.jsonl")
+LEGACY_COMM_LOG_PATH = Path("disk/comm_log.json")  # single JSON array, pre JSON Lines
+DEFAULT_PAGE_SIZE = 10
 
 
 class CommMessage(BaseModel):
@@ -37,6 +43,11 @@ class CommunicationService(CommandSet):
         super().__init__()
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
+
+        if LEGACY_COMM_LOG_PATH.exists() and not COMM_LOG_PATH.exists():
+            migrate_legacy_log(LEGACY_COMM_LOG_PATH, COMM_LOG_PATH)
+        self.log = JsonlLog(COMM_LOG_PATH, CommMessage)
 
         CommunicationService._initialized = True
 
@@ -60,7 +71,7 @@ class CommunicationService(CommandSet):
         """Send a message to mission control"""
 
         message = CommMessage(
-            timestamp=utils.ksp_ut_to_datetime(self.connection.space_center.ut),
+            timestamp=utils.ksp_ut_to_datetime(self.telemetry.get("ut")),
             fromm=self.vessel.name,
             to="MissionControl",
             message=args.message,
@@ -72,15 +83,94 @@ class CommunicationService(CommandSet):
     def send_message(self, message: CommMessage) -> CommMessage:
         """Send a message to mission control"""
 
-        with open(COMM_LOG_PATH, "r") as file:
-            data = json.load(file)
+        return self.log.append(message)
+
+    read_messages_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(CommMessage, Template("List[$obj]")),
+    )
+    read_messages_parser.add_argument(
+        "-limit",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help="Number of messages per page",
+    )
+    read_messages_parser.add_argument(
+        "-page",
+        type=int,
+        default=0,
+        help="Page number, starting from 0 for the most recent messages",
+    )
+    read_messages_parser.add_argument(
+        "-start",
+        type=str,
+        required=False,
+        help="Only messages sent at or after this universal time in the format YYYY-MM-DDTHH:MM:SS",
+    )
+    read_messages_parser.add_argument(
+        "-end",
+        type=str,
+        required=False,
+        help="Only messages sent before this universal time in the format YYYY-MM-DDTHH:MM:SS",
+    )
+
+    @with_argparser(read_messages_parser)
+    def do_read_messages(self, args):
+        """Read the communication log, most recent messages first"""
+
+        try:
+            start = _parse_time(args.start)
+            end = _parse_time(args.end)
+            messages = self.read_messages(
+                limit=args.limit, page=args.page, start=start, end=end
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        total = self.log.count(start, end)
+        self._cmd.poutput(
+            f"Showing {len(messages)} of {total} message(s), page {args.page}"
+        )
+        self._cmd.poutput(
+            json.dumps(
+                [message.model_dump(mode="json") for message in messages], indent=4
+            )
+        )
+
+    def read_messages(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        page: int = 0,
+        start: datetime = None,
+        end: datetime = None,
+    ) -> List[CommMessage]:
+        """Read one page of the communication log, most recent messages first"""
+
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        if page < 0:
+            raise ValueError("page must not be negative")
+
+        return self.log.read(start=start, end=end, limit=limit, page=page)
+
+
+def _parse_time(value: str):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        raise ValueError(f"Invalid time format '{value}'. Must be YYYY-MM-DDTHH:MM:SS.")
 
-        messages = [CommMessage(**entry) for entry in data]
 
-        messages.append(message)
+def migrate_legacy_log(legacy_path: Path, path: Path):
+    """Convert a JSON array communication log to JSON Lines."""
 
-        messages_serial = [message.model_dump(mode="json") for message in messages]
-        with open(COMM_LOG_PATH, "w") as file:
-            json.dump(messages_serial, file, indent=4)
+    with open(legacy_path, "r") as file:
+        data = json.load(file)
 
-        return message
+    messages = [CommMessage(**entry) for entry in data]
+    with open(path, "w") as file:
+        for message in messages:
+            file.write(message.model_dump_json() + "\n")
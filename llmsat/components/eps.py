@@ -1,10 +1,71 @@
-class EPS:
-    def __init__(self, vessel):
+"""EPS class."""
+
+from datetime import datetime
+from typing import List
+
+from cmd2 import CommandSet, with_argparser, with_default_category
+
+from llmsat.components.orbit_propagator import OrbitPropagator
+from llmsat.libs import kepler, power_budget, utils
+from llmsat.libs.power_budget import PlanStep, PowerModel, PowerPlanReport
+from llmsat.libs.resource_series import ResourceSeries
+from llmsat.libs.telemetry import TelemetryHub
+
+np = utils.lazy_import("numpy")
+
+ELECTRIC_CHARGE = "ElectricCharge"
+
+
+@with_default_category("EPS")
+class EPS(CommandSet):
+    """Functions for managing the electrical power system."""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(EPS, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, krpc_connection=None):
         """
         Initializes an EPS object using the kRPC connection.
 
+        Electric charge is read from the shared resource streams rather than with a
+        round trip per reading, and the power budget is planned from its history and
+        the orbit propagator's sunlight prediction.
         """
-        self.vessel = vessel
+        if EPS._initialized:
+            return
+        super().__init__()
+        self.connection = krpc_connection
+        self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
+        self.resources = ResourceSeries(self.vessel, self.telemetry)
+        self.resources.start()
+        self.orbit_propagator = OrbitPropagator(self.connection)
+
+        # rates set by the operator, used instead of the estimates from history
+        self.solar_rate = None
+        self.base_load = None
+
+        EPS._initialized = True
+
+    @staticmethod
+    def _get_cmd_instance():
+        """Gets the cmd for use by argument parsers for poutput."""
+        return EPS()._cmd
+
+    def _electric_charge(self) -> dict:
+        return next(
+            (
+                record
+                for record in self.resources.records()
+                if record["name"] == ELECTRIC_CHARGE
+            ),
+            {"amount": 0.0, "max": 0.0},
+        )
 
     def get_total_electric_charge(self) -> float:
         """
@@ -13,7 +74,7 @@ class EPS:
         Returns:
             float: Total electric charge in the vessel.
         """
-        return self.vessel.resources.amount("ElectricCharge")
+        return self._electric_charge()["amount"]
 
     def get_max_electric_charge(self) -> float:
         """
@@ -22,7 +83,7 @@ class EPS:
         Returns:
             float: Maximum electric charge the vessel can hold.
         """
-        return self.vessel.resources.max("ElectricCharge")
+        return self._electric_charge()["max"]
 
     def get_percentage_electric_charge(self) -> float:
         """
@@ -44,3 +105,149 @@ class EPS:
         self.vessel.control.solar_panels = state
 
         return True
+
+    get_power_model_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(PowerModel),
+    )
+
+    @with_argparser(get_power_model_parser)
+    def do_get_power_model(self, _=None):
+        """Get the solar charging rate and idle load the power budget is planned with"""
+        model = self.get_power_model()
+
+        self._cmd.poutput(model.model_dump_json(indent=4))
+
+    def get_power_model(self, elements: kepler.OrbitalElements = None) -> PowerModel:
+        """The solar charging rate and idle load, estimated from the electric charge
+        history unless configured."""
+        model = PowerModel(
+            solar_rate=power_budget.DEFAULT_SOLAR_RATE,
+            base_load=power_budget.DEFAULT_BASE_LOAD,
+            history=0.0,
+        )
+        if len(self.resources) > 1 and ELECTRIC_CHARGE in self.resources.names:
+            # sunlight in the past is predicted from the current orbit, so history
+            # from before a maneuver is classified approximately
+            ut, amount = self.resources.history(ELECTRIC_CHARGE)
+            model = power_budget.estimate_power_model(
+                ut,
+                amount,
+                self.get_max_electric_charge(),
+                self.orbit_propagator.in_sunlight(ut[:-1] + np.diff(ut) / 2, elements),
+            )
+
+        if self.solar_rate is not None:
+            model.solar_rate = self.solar_rate
+        if self.base_load is not None:
+            model.base_load = self.base_load
+        return model
+
+    configure_power_model_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+    )
+    configure_power_model_parser.add_argument(
+        "-solar_rate",
+        type=float,
+        required=False,
+        help="Electric charge generated in sunlight [units/s]. Negative to estimate it from history again",
+    )
+    configure_power_model_parser.add_argument(
+        "-base_load",
+        type=float,
+        required=False,
+        help="Electric charge drawn by the idle vessel [units/s]. Negative to estimate it from history again",
+    )
+
+    @with_argparser(configure_power_model_parser)
+    def do_configure_power_model(self, args):
+        """Set the solar charging rate or idle load instead of estimating them"""
+        self.configure_power_model(solar_rate=args.solar_rate, base_load=args.base_load)
+
+        self._cmd.poutput(self.get_power_model().model_dump_json(indent=4))
+
+    def configure_power_model(self, solar_rate: float = None, base_load: float = None):
+        """Set the solar charging rate or idle load instead of estimating them from
+        history. A negative rate goes back to the estimate."""
+        if solar_rate is not None:
+            self.solar_rate = solar_rate if solar_rate >= 0 else None
+        if base_load is not None:
+            self.base_load = base_load if base_load >= 0 else None
+
+    validate_power_plan_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(PowerPlanReport),
+    )
+    validate_power_plan_parser.add_argument(
+        "-plan",
+        type=str,
+        nargs="+",
+        required=True,
+        help=f"Activities carried out one after the other, each as activity:duration or activity:duration:load, with duration in seconds and load in electric charge units/s on top of the idle load. Default loads: {power_budget.ACTIVITY_LOADS}",
+    )
+    validate_power_plan_parser.add_argument(
+        "-start",
+        type=str,
+        required=False,
+        help="Universal time at which the plan starts in the format YYYY-MM-DDTHH:MM:SS. Defaults to now",
+    )
+    validate_power_plan_parser.add_argument(
+        "-reserve",
+        type=float,
+        required=False,
+        default=power_budget.DEFAULT_RESERVE,
+        help="Fraction of the battery the plan must keep, between 0 and 1",
+    )
+
+    @with_argparser(validate_power_plan_parser)
+    def do_validate_power_plan(self, args):
+        """Check that the electric charge lasts through a plan of experiments, maneuvers and sleep"""
+        try:
+            start = (
+                datetime.strptime(args.start, "%Y-%m-%dT%H:%M:%S")
+                if args.start
+                else None
+            )
+            steps = [PlanStep.parse(step) for step in args.plan]
+            report = self.validate_power_plan(steps, start=start, reserve=args.reserve)
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(report.model_dump_json(indent=4))
+
+    def validate_power_plan(
+        self,
+        steps: List[PlanStep],
+        start: datetime = None,
+        reserve: float = power_budget.DEFAULT_RESERVE,
+    ) -> PowerPlanReport:
+        """Integrate the electric charge over a plan, charging in sunlight and drawing
+        the idle load plus each activity's. A plan starting later starts with the
+        charge the idle vessel would have by then."""
+        if not 0 <= reserve < 1:
+            raise ValueError("reserve must be between 0 and 1")
+
+        now = self.telemetry.get("ut")
+        start = now if start is None else utils.datetime_to_ksp_ut(start)
+        if start < now:
+            raise ValueError("start must not be in the past")
+
+        record = self._electric_charge()
+        if record["max"] <= 0:
+            raise ValueError("The vessel has no battery")
+
+        if start > now:
+            steps = [PlanStep(activity="idle", duration=start - now, load=0.0)] + list(
+                steps
+            )
+        elements = self.orbit_propagator.get_orbital_elements()
+        return power_budget.check_plan(
+            steps,
+            start=now,
+            charge=record["amount"],
+            capacity=record["max"],
+            model=self.get_power_model(elements),
+            in_sunlight=lambda ut: self.orbit_propagator.in_sunlight(ut, elements),
+            reserve=reserve,
+        )
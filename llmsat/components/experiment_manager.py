@@ -7,6 +7,7 @@ from cmd2 import CommandSet, with_argparser, with_default_category
 
 from llmsat.libs import utils
 from llmsat.libs.krpc_types import DataPoint, Experiment, Orbit
+from llmsat.libs.telemetry import TelemetryHub
 
 
 @with_default_category("ExperimentManager")
@@ -27,6 +28,7 @@ class ExperimentManager(CommandSet):
 
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
 
         ExperimentManager._initialized = True
 
@@ -37,7 +39,7 @@ class ExperimentManager(CommandSet):
 
     run_experiment_parser = utils.CustomCmd2ArgumentParser(
         _get_cmd_instance,
-        epilog=f"Returns:\nList[{DataPoint.model_json_schema()['title']}]: {json.dumps(DataPoint.model_json_schema()['properties'], indent=4)}",
+        epilog=f"Returns:\nList[{utils.model_schema(DataPoint)['title']}]: {json.dumps(utils.model_schema(DataPoint)['properties'], indent=4)}",
     )
     run_experiment_parser.add_argument(
         "-name",
@@ -104,12 +106,10 @@ class ExperimentManager(CommandSet):
         data = exp_obj.data[0]  # TODO: handle multiple data
         subject = exp_obj.science_subject
 
-        orbit = Orbit(self.vessel.orbit)
+        orbit = Orbit(self.telemetry.get("orbit"))
 
         result = DataPoint(
-            timestamp=utils.ksp_ut_to_datetime(
-                self.connection.space_center.ut
-            ).isoformat(),
+            timestamp=utils.ksp_ut_to_datetime(self.telemetry.get("ut")).isoformat(),
             value="127.0K",
             altitude=orbit.current_altitude,
             body=orbit.body,
@@ -1,13 +1,22 @@
 """OrbitPropagator class."""
 
-from datetime import datetime, timedelta
+from __future__ import annotations
+
+import math
+from datetime import datetime
 
 from cmd2 import CommandSet, with_argparser, with_default_category
 
-from llmsat.libs import utils
+from llmsat.libs import kepler, krpc_snapshot, orbit_safety, utils, visibility
 from llmsat.libs.krpc_types import Orbit
-import pandas as pd
-from beartype import beartype
+from llmsat.libs.telemetry import TelemetryHub
+
+np = utils.lazy_import("numpy")
+pd = utils.lazy_import("pandas")
+
+DEFAULT_SAFETY_HORIZON = 86400  # s, used when the orbit is not closed
+EPHEMERIS_MAX_AGE = 21600  # s of game time a read of a body's direction is used for
+DEFAULT_ECLIPSE_ORBITS = 10
 
 
 @with_default_category("OrbitPropagator")
@@ -28,6 +37,9 @@ class OrbitPropagator(CommandSet):
         super().__init__()
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
+        # (ut read, name, unit vector to the target) by (body, target)
+        self._ephemerides = {}
 
         OrbitPropagator._initialized = True
 
@@ -51,62 +63,281 @@ class OrbitPropagator(CommandSet):
     def get_orbit(self) -> Orbit:
         """The current orbit of the vessel."""
 
-        orbit = Orbit(self.vessel.orbit)
+        orbit = Orbit(self.telemetry.get("orbit"))
 
         return orbit
 
     # def do_radius_at(ut_start, ut_end):
     #     pass
 
-    @beartype
-    def radius_at(self, date: datetime, date_end: datetime = None) -> pd.DataFrame:
-        """The orbital radius at the given time or over time range, in meters."""
+    def get_orbital_elements(self) -> kepler.OrbitalElements:
+        """The Keplerian elements of the current orbit, from one kRPC snapshot."""
+        return kepler.OrbitalElements.from_krpc(self.telemetry.get("orbit"))
+
+    @utils.typechecked
+    def propagate(
+        self, date: datetime, date_end: datetime, periods: int = 1000
+    ) -> pd.DataFrame:
+        """Radius, altitude, true anomaly and position over a time range, in meters and
+        radians, evaluated locally from the current orbital elements.
+
+        Sphere of influence changes within the range are not accounted for.
+        """
+        if date_end < date:
+            raise ValueError("date_end must be after date")
+
+        time_range = pd.date_range(start=date, end=date_end, periods=periods)
+        ut = (time_range - utils.epoch).total_seconds().to_numpy()
+        state = kepler.propagate(self.get_orbital_elements(), ut)
+
+        return pd.DataFrame(
+            {
+                "radius": state["radius"],
+                "altitude": state["altitude"],
+                "true_anomaly": state["true_anomaly"],
+                "x": state["position"][:, 0],
+                "y": state["position"][:, 1],
+                "z": state["position"][:, 2],
+            },
+            index=time_range,
+        )
+
+    def in_sunlight(
+        self, ut: np.ndarray, elements: kepler.OrbitalElements = None
+    ) -> np.ndarray:
+        """Whether the vessel is in sunlight at each universal time, evaluated locally
+        from the current orbital elements, unless given, and the cached direction of
+        the sun.
+
+        Only the orbited body casts a shadow, and sphere of influence changes are not
+        accounted for.
+        """
+        if elements is None:
+            elements = self.get_orbital_elements()
+        ut = np.asarray(ut, dtype=float)
+        sun_direction = self.get_sun_direction(elements)
+        if sun_direction is None:  # orbiting the star itself
+            return np.ones(ut.shape, dtype=bool)
+
+        position = kepler.propagate(elements, ut)["position"]
+        return ~kepler.in_shadow(position, sun_direction, elements.body_radius)
+
+    def get_sun_direction(self, elements: kepler.OrbitalElements = None):
+        """Unit vector from the orbited body to the sun, in the frame of
+        kepler.propagate. None when orbiting the sun."""
+        return self.get_target_direction(None, elements)[1]
+
+    def get_target_direction(
+        self, target: str = None, elements: kepler.OrbitalElements = None
+    ):
+        """The name of a target body, the sun unless given, and the unit vector from
+        the orbited body to it, in the frame of kepler.propagate. The vector is None
+        when orbiting the target itself.
+
+        Read from the game once per body and target and again after
+        EPHEMERIS_MAX_AGE of game time, so a target that moves quickly around the
+        orbited body, like one of its moons, is only approximated.
+        """
+        if elements is None:
+            elements = self.get_orbital_elements()
+        ut = self.telemetry.get("ut")
+
+        key = (elements.body, target)
+        ephemeris = self._ephemerides.get(key)
+        if ephemeris is None or abs(ut - ephemeris[0]) > EPHEMERIS_MAX_AGE:
+            body_obj = self.telemetry.get("orbit").body
+            if target is None:
+                target_obj = krpc_snapshot.find_star(body_obj)
+            else:
+                bodies = self.connection.space_center.bodies
+                if target not in bodies:
+                    raise ValueError(
+                        f"Unknown body '{target}'. Must be one of: {sorted(bodies)}"
+                    )
+                target_obj = bodies[target]
+            name = krpc_snapshot.snapshot_body(target_obj)["name"]
+            position = kepler.from_krpc_vector(
+                krpc_snapshot.body_position(target_obj, body_obj)
+            )
+            distance = np.linalg.norm(position)
+            direction = position / distance if distance > 0 else None
+            ephemeris = self._ephemerides[key] = (ut, name, direction)
+
+        return ephemeris[1], ephemeris[2]
+
+    get_eclipses_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(visibility.OccultationReport),
+    )
+    get_eclipses_parser.add_argument(
+        "-target",
+        type=str,
+        required=False,
+        help="Body to find the line of sight to. Defaults to the sun, for eclipses",
+    )
+    get_eclipses_parser.add_argument(
+        "-orbits",
+        type=float,
+        required=False,
+        default=DEFAULT_ECLIPSE_ORBITS,
+        help="Number of orbits to search from now",
+    )
+    get_eclipses_parser.add_argument(
+        "-duration",
+        type=float,
+        required=False,
+        help="Time window to search from now [s]. Overrides -orbits",
+    )
+
+    @with_argparser(get_eclipses_parser)
+    def do_get_eclipses(self, args):
+        """Find when the vessel is in the shadow of the orbited body, or when the body blocks its line of sight to a target."""
+        try:
+            report = self.get_eclipses(
+                target=args.target, orbits=args.orbits, duration=args.duration
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(report.model_dump_json(indent=4), timestamp=True)
+
+    def get_eclipses(
+        self,
+        target: str = None,
+        orbits: float = DEFAULT_ECLIPSE_ORBITS,
+        duration: float = None,
+        start: float = None,
+    ) -> visibility.OccultationReport:
+        """Find every interval during which the orbited body blocks the line of sight
+        to the target, the sun unless given, from start, by default now, over a number
+        of orbits or a duration in seconds.
+
+        Evaluated locally from the current orbital elements; sphere of influence
+        changes within the window are not accounted for.
+        """
+        if orbits <= 0 or (duration is not None and duration <= 0):
+            raise ValueError("orbits and duration must be positive")
+
+        elements = self.get_orbital_elements()
+        name, direction = self.get_target_direction(target, elements)
+        if direction is None:
+            raise ValueError(f"The vessel is orbiting {name} itself")
+
+        if start is None:
+            start = self.telemetry.get("ut")
+        if duration is None:
+            duration = orbits * elements.period
+            if math.isinf(duration):  # not a closed orbit
+                duration = DEFAULT_SAFETY_HORIZON
+
+        return visibility.occultation_report(
+            elements, direction, name, start, start + duration
+        )
+
+    @utils.typechecked
+    def radius_at(
+        self,
+        date: datetime,
+        date_end: datetime = None,
+        periods: int = 100,
+        method: str = "analytic",
+    ) -> pd.DataFrame:
+        """The orbital radius at the given time or over time range, in meters.
+
+        The "analytic" method evaluates every sample locally from one snapshot of the
+        orbital elements. The "krpc" method asks the game for each sample and is kept
+        as a cross-check.
+        """
+        if method not in ("analytic", "krpc"):
+            raise ValueError(f"Unknown method '{method}'. Must be 'analytic' or 'krpc'")
 
         if date_end is None:
             # Single time point
-            ut = utils.datetime_to_ksp_ut(date)
-            radius = self.vessel.orbit.radius_at(ut)
-            return pd.DataFrame({"radius": [radius]}, index=[date])
+            time_range = pd.DatetimeIndex([date])
         else:
             if date_end < date:
                 raise ValueError("ut_end must be after ut")
 
             # Time range
-            time_range = pd.date_range(start=date, end=date_end, periods=100)
-            radii = [
-                self.vessel.orbit.radius_at(utils.datetime_to_ksp_ut(t))
-                for t in time_range
-            ]
-            return pd.DataFrame({"radius": radii}, index=time_range)
+            time_range = pd.date_range(start=date, end=date_end, periods=periods)
 
-    def validate_orbit(self):
-        """Check orbit altitude from orbiting body does not drop below safety threshold"""
+        if method == "analytic":
+            ut = (time_range - utils.epoch).total_seconds().to_numpy()
+            radii = kepler.propagate(self.get_orbital_elements(), ut)["radius"]
+        else:
+            orbit_obj = self.telemetry.get("orbit")
+            radii = np.array(
+                [orbit_obj.radius_at(utils.datetime_to_ksp_ut(t)) for t in time_range]
+            )
 
-        orbit = self.get_orbit()
+        return pd.DataFrame({"radius": radii}, index=time_range)
 
-        date: datetime = utils.ksp_ut_to_datetime(self.connection.space_center.ut)
+    check_orbit_safety_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(orbit_safety.SafetyReport),
+    )
+    check_orbit_safety_parser.add_argument(
+        "-threshold",
+        type=float,
+        required=False,
+        default=orbit_safety.SAFE_ALTITUDE_THRESHOLD,
+        help="Safe altitude threshold [m]",
+    )
+    check_orbit_safety_parser.add_argument(
+        "-duration",
+        type=float,
+        required=False,
+        help="Time window to check from now [s]. Defaults to one orbital period",
+    )
 
-        date_end = date + timedelta(seconds=orbit.period)
+    @with_argparser(check_orbit_safety_parser)
+    def do_check_orbit_safety(self, args):
+        """Find every interval during which the orbit drops below a safe altitude."""
+        try:
+            report = self.check_orbit_safety(
+                threshold_altitude=args.threshold, duration=args.duration
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
 
-        radii = self.radius_at(date, date_end)
+        self._cmd.poutput(report.model_dump_json(indent=4), timestamp=True)
 
-        safe_altitude_threshold = 50000  # 50km above Enceladus
-        enceladus_radius = 252100  # m
+    def check_orbit_safety(
+        self,
+        threshold_altitude: float = orbit_safety.SAFE_ALTITUDE_THRESHOLD,
+        duration: float = None,
+    ) -> orbit_safety.SafetyReport:
+        """Find every interval during which the orbit drops below a safe altitude.
 
-        # Check if any radius is below the safety threshold
-        unsafe_radii = radii[
-            radii["radius"] < safe_altitude_threshold + enceladus_radius
-        ]
+        The window starts now and lasts one orbital period unless a duration in seconds
+        is given. Sphere of influence changes within the window are followed.
+        """
+        ut = self.telemetry.get("ut")
+        snapshot = krpc_snapshot.snapshot_orbit(self.telemetry.get("orbit"))
+        segments = orbit_safety.orbit_segments(snapshot, ut)
 
-        if not unsafe_radii.empty:
-            unsafe_period = (unsafe_radii.index.min(), unsafe_radii.index.max())
-            altitude_range = (
-                unsafe_radii["radius"].min() - enceladus_radius,
-                unsafe_radii["radius"].max() - enceladus_radius,
-            )
+        if duration is None:
+            duration = segments[0].elements.period
+            if math.isinf(duration):  # not a closed orbit
+                duration = DEFAULT_SAFETY_HORIZON
+
+        return orbit_safety.check_orbit(
+            segments, ut, ut + duration, threshold_altitude=threshold_altitude
+        )
+
+    def validate_orbit(self):
+        """Check orbit altitude from orbiting body does not drop below safety threshold"""
+
+        report = self.check_orbit_safety()
+
+        if report.violations:
+            violation = report.violations[0]
+            unsafe_period = (violation.start, violation.end)
             raise ValueError(
-                f"Orbit falls below safe altitude threshold of {safe_altitude_threshold} around {orbit.body} during {unsafe_period}. "
-                f"Altitude range: {altitude_range} meters."
+                f"Orbit falls below safe altitude threshold of {report.threshold_altitude} around {violation.body} during {unsafe_period}. "
+                f"Minimum altitude: {violation.min_altitude} meters."
             )
         else:
             return True
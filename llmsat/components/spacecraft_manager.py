@@ -1,13 +1,19 @@
 """SpacecraftManager class."""
 
+import json
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List
 
-import pandas as pd
-from cmd2 import CommandSet, with_default_category
+from cmd2 import CommandSet, with_argparser, with_default_category
 
 from llmsat.libs import utils
-from llmsat.libs.krpc_types import AttachmentMode, Part, PartType, SpacecraftProperties
+from llmsat.libs.krpc_types import Part, SpacecraftProperties
+from llmsat.libs.resource_series import ResourceForecast, ResourceSeries
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.vessel_parts import PartsModel
+
+pd = utils.lazy_import("pandas")
 
 MISSION_BRIEF = Path("disk/mission.md")
 
@@ -16,12 +22,32 @@ MISSION_BRIEF = Path("disk/mission.md")
 class SpacecraftManager(CommandSet):
     """Functions for managing spacecraft systems."""
 
-    def __init__(self, krpc_connection):
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(SpacecraftManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, krpc_connection=None):
+        if SpacecraftManager._initialized:
+            return
         super().__init__()
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
+
+        self.parts = PartsModel(self.vessel, self.telemetry)
+        self.resources = ResourceSeries(self.vessel, self.telemetry)
+        self.resources.start()
 
-        self._assign_ids_to_parts()
+        SpacecraftManager._initialized = True
+
+    @staticmethod
+    def _get_cmd_instance():
+        """Gets the cmd for use by argument parsers for poutput."""
+        return SpacecraftManager()._cmd
 
     def do_get_spacecraft_properties(self, _=None):
         """Get information about the spacecraft"""
@@ -43,34 +69,7 @@ class SpacecraftManager(CommandSet):
 
     def get_parts_tree(self) -> Part:
         """Get a tree of all spacecraft parts."""
-
-        def construct_part_tree(krpc_part) -> Part:
-            """
-            Recursively constructs a tree of parts from the given KRPC part.
-            """
-            if krpc_part.axially_attached:
-                attach_mode = AttachmentMode.AXIAL
-            else:
-                attach_mode = AttachmentMode.RADIAL
-
-            part = Part(
-                id=krpc_part.tag,
-                name=krpc_part.name,
-                title=krpc_part.title,
-                type=self._determine_part_type(krpc_part),
-                attachment=attach_mode,
-                mass=krpc_part.mass,
-                temperature=krpc_part.temperature,
-                max_temperature=krpc_part.max_temperature,
-                children=[construct_part_tree(child) for child in krpc_part.children],
-            )
-            return part
-
-        # Start with the root part of the vessel
-        root_part = self.vessel.parts.root
-        tree = construct_part_tree(root_part)
-
-        return tree
+        return self.parts.tree()
 
     def do_get_met(self, _=None):
         """Get the mission elapsed time"""
@@ -80,7 +79,7 @@ class SpacecraftManager(CommandSet):
 
     def get_met(self) -> utils.MET:
         """Gets the current mission elapsed time."""
-        met = utils.MET(self.vessel.met)
+        met = utils.MET(self.telemetry.get("met"))
 
         return met
 
@@ -92,40 +91,63 @@ class SpacecraftManager(CommandSet):
 
     def get_ut(self) -> datetime:
         """Get the current universal time"""
-        return utils.ksp_ut_to_datetime(self.connection.space_center.ut)
-
-    def _assign_ids_to_parts(self):
-        """Recursively assigns tags to the parts in a tree, starting from the root part."""
+        return utils.ksp_ut_to_datetime(self.telemetry.get("ut"))
 
-        def assign_tag(part: Part, tag: int) -> int:
-            part.tag = f"{tag:03}"
-            next_tag = tag + 1
-            for child in part.children:
-                next_tag = assign_tag(child, next_tag)
-            return next_tag
+    def do_get_telemetry_stats(self, _=None):
+        """Get the telemetry cache hit and miss counts per value"""
+        stats = self.telemetry.stats()
 
-        assign_tag(self.vessel.parts.root, tag=0)
+        self._cmd.poutput(json.dumps(stats, indent=4))
 
     def do_get_resources(self, _=None):
         resources = self.get_resources()
 
         self._cmd.poutput(resources.to_string())
 
-    def get_resources(self) -> pd.DataFrame:
-        resources = self.vessel.resources
+    def get_resources(self) -> "pd.DataFrame":
+        return pd.DataFrame(self.get_resource_records())
+
+    def get_resource_records(self) -> List[Dict[str, Any]]:
+        """The name, amount and max of each resource, without loading pandas."""
+        return self.resources.records()
+
+    get_resource_forecast_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=f"Returns:\nList[{utils.model_schema(ResourceForecast)['title']}]: {json.dumps(utils.model_schema(ResourceForecast)['properties'], indent=4)}",
+    )
+    get_resource_forecast_parser.add_argument(
+        "-name",
+        type=str,
+        required=False,
+        help="Name of the resource to forecast, e.g. ElectricCharge. All resources if omitted",
+    )
+
+    @with_argparser(get_resource_forecast_parser)
+    def do_get_resource_forecast(self, args):
+        """Get the charge and consumption rate of each resource and when it runs out"""
+        try:
+            forecasts = self.get_resource_forecast(args.name)
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(
+            json.dumps(
+                [forecast.model_dump(mode="json") for forecast in forecasts], indent=4
+            )
+        )
 
-        data = []
-        for name in resources.names:
-            resource_data = {
-                "name": name,
-                "amount": resources.amount(name),
-                "max": resources.max(name),
-                # "density": resources.density(name),  # TODO: AttributeError: type object 'Resources' has no attribute '_client'
-                # "flow_mode": resources.flow_mode(name),
-            }
-            data.append(resource_data)
+    def get_resource_forecast(self, name: str = None) -> List[ResourceForecast]:
+        """The charge and consumption rate of each resource over the last minutes and
+        the time until it is empty or full, from the sampled history."""
+        forecasts = self.resources.forecast()
+        if name is None:
+            return forecasts
 
-        return pd.DataFrame(data)
+        forecasts = [forecast for forecast in forecasts if forecast.name == name]
+        if not forecasts:
+            raise ValueError(f"Unknown resource '{name}'")
+        return forecasts
 
     def do_read_mission_brief(self, _=None):
         """Read the mission briefing"""
@@ -138,18 +160,3 @@ class SpacecraftManager(CommandSet):
 
     # def do_validate_mission(self):
     #     """Validate the mission status against the requirements."""
-
-    @staticmethod
-    def _determine_part_type(krpc_part) -> PartType:
-        """
-        Dynamically determines the PartType of a given krpc part.
-        """
-        for part_type in PartType:
-            attribute_name = part_type.value
-            if (
-                hasattr(krpc_part, attribute_name)
-                and getattr(krpc_part, attribute_name) is not None
-            ):
-                return part_type
-
-        return PartType.NONE
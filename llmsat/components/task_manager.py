@@ -1,18 +1,22 @@
 """Remote sensing manager class."""
 
 import json
+import math
+import sqlite3
+import threading
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from string import Template
-from typing import Optional
+from typing import Iterable, List, Optional
 
 from cmd2 import CommandSet, with_argparser, with_default_category
 from pydantic import BaseModel, Field
 
 from llmsat.libs import utils
+from llmsat.libs.task_scheduler import TaskScheduler
 
-TASK_FILE = Path("disk/tasks_file.json")
+TASK_DB_PATH = Path("disk/tasks.db")
 
 
 class TaskStatus(Enum):
@@ -27,6 +31,13 @@ class TaskPriority(Enum):
     HIGH = "high"
 
 
+PRIORITY_RANK = {
+    TaskPriority.LOW.value: 0,
+    TaskPriority.MEDIUM.value: 1,
+    TaskPriority.HIGH.value: 2,
+}
+
+
 class Task(BaseModel, use_enum_values=True):
     """A task"""
 
@@ -39,8 +50,146 @@ class Task(BaseModel, use_enum_values=True):
     end: Optional[datetime] = Field(
         description="Time by which the task should be completed"
     )
-    # dependencies: Optional[list[int]] = Field(description="IDs of tasks this task depends on")
+    dependencies: List[int] = Field(
+        default=[], description="IDs of tasks this task depends on"
+    )
     status: TaskStatus = Field(default=TaskStatus.PENDING, description="Task status")
+    priority: TaskPriority = Field(
+        default=TaskPriority.MEDIUM, description="Task priority"
+    )
+
+
+class TaskStore:
+    """In-memory task table written through to SQLite.
+
+    Lookups by ID and full listings are served from memory. Every change is committed
+    to the database in a single transaction before the in-memory table is updated, so
+    the two never diverge. The database indexes status, priority and start/end time for
+    range queries such as tasks due before a given time.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            start_ut REAL,
+            end_ut REAL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, priority);
+        CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority);
+        CREATE INDEX IF NOT EXISTS tasks_start ON tasks (start_ut);
+        CREATE INDEX IF NOT EXISTS tasks_end ON tasks (end_ut);
+    """
+
+    def __init__(self, path: Path = TASK_DB_PATH):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._lock = threading.RLock()
+
+        rows = self._db.execute("SELECT data FROM tasks")
+        self._tasks: dict[int, Task] = {
+            task.id: task for task in (Task.model_validate_json(row[0]) for row in rows)
+        }
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._tasks
+
+    def get(self, id: int) -> Task:
+        try:
+            return self._tasks[id]
+        except KeyError:
+            raise ValueError(f"No task with ID {id}")
+
+    def all(self) -> dict[int, Task]:
+        with self._lock:
+            return dict(self._tasks)
+
+    def next_id(self) -> int:
+        """One more than the highest task ID, read from the primary key index."""
+        with self._lock:
+            (highest,) = self._db.execute("SELECT MAX(id) FROM tasks").fetchone()
+            return (highest or 0) + 1
+
+    def insert(self, tasks: Iterable[Task]):
+        """Add tasks in one transaction."""
+        tasks = list(tasks)
+        with self._lock:
+            ids = set()
+            for task in tasks:
+                if task.id in self._tasks or task.id in ids:
+                    raise ValueError(f"A task with ID {task.id} already exists")
+                ids.add(task.id)
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row(task) for task in tasks],
+                )
+            for task in tasks:
+                self._tasks[task.id] = task
+
+    def update(self, id: int, **changes) -> Task:
+        """Change fields of a task atomically and return the updated task."""
+        with self._lock:
+            task = Task.model_validate({**self.get(id).model_dump(), **changes})
+            with self._db:
+                self._db.execute(
+                    "REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)", self._row(task)
+                )
+            self._tasks[id] = task
+
+        return task
+
+    def clear(self):
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM tasks")
+            self._tasks.clear()
+
+    def due_before(
+        self, time: datetime, statuses: Iterable[TaskStatus] = None
+    ) -> List[Task]:
+        """Tasks with an end time before the given time, earliest first and then by
+        descending priority."""
+        query = "SELECT id FROM tasks WHERE end_ut < ?"
+        params: list = [utils.datetime_to_ksp_ut(time)]
+        if statuses is not None:
+            statuses = [TaskStatus(status).value for status in statuses]
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY end_ut, priority DESC, id"
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+            return [self._tasks[row[0]] for row in rows]
+
+    def with_status(self, status: TaskStatus) -> List[Task]:
+        """Tasks with the given status, highest priority first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM tasks WHERE status = ? ORDER BY priority DESC, id",
+                [TaskStatus(status).value],
+            ).fetchall()
+            return [self._tasks[row[0]] for row in rows]
+
+    @staticmethod
+    def _row(task: Task) -> tuple:
+        return (
+            task.id,
+            TaskStatus(task.status).value,
+            PRIORITY_RANK[TaskPriority(task.priority).value],
+            utils.datetime_to_ksp_ut(task.start) if task.start else None,
+            utils.datetime_to_ksp_ut(task.end) if task.end else None,
+            task.model_dump_json(),
+        )
 
 
 @with_default_category("TaskManager")
@@ -61,6 +210,8 @@ class TaskManager(CommandSet):
 
         self.connection = krpc_connection
         self.vessel = self.connection.space_center.active_vessel
+        self.store = TaskStore(TASK_DB_PATH)
+        self.scheduler = TaskScheduler()
         self._reset_tasks()
 
         TaskManager._initialized = True
@@ -95,20 +246,42 @@ class TaskManager(CommandSet):
         required=False,
         help="Task end universal time YYYY-MM-DDTHH:MM:SS",
     )
+    add_task_parser.add_argument(
+        "-priority",
+        type=str,
+        required=False,
+        default=TaskPriority.MEDIUM.value,
+        help=f"Task priority, one of: {[priority.value for priority in TaskPriority]}",
+    )
+    add_task_parser.add_argument(
+        "-depends_on",
+        type=int,
+        nargs="+",
+        default=[],
+        help="IDs of tasks that must be completed first",
+    )
 
     @with_argparser(add_task_parser)
     def do_add_task(self, args):
         """Add a new task"""
         date_format = "%Y-%m-%dT%H:%M:%S"
 
-        start = datetime.strptime(args.start, date_format) if args.end else None
-        end = datetime.strptime(args.end, date_format) if args.end else None
-        output = self.add_task(
-            name=args.name,
-            description=args.desc,
-            start=start,
-            end=end,
-        )
+        try:
+            start = datetime.strptime(args.start, date_format) if args.start else None
+            end = datetime.strptime(args.end, date_format) if args.end else None
+            priority = TaskPriority(args.priority)
+            output = self.add_task(
+                name=args.name,
+                description=args.desc,
+                start=start,
+                end=end,
+                priority=priority,
+                dependencies=args.depends_on,
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
         self._cmd.poutput(f"Task {output.id}:'{output.name}' created")
 
     def add_task(
@@ -117,17 +290,89 @@ class TaskManager(CommandSet):
         description: str = None,
         start: datetime = None,
         end: datetime = None,
+        priority: TaskPriority = TaskPriority.MEDIUM,
+        dependencies: List[int] = None,
     ) -> Task:
         """Add a new task"""
 
-        tasks = self.read_tasks()
-        id = max(tasks.keys(), default=0) + 1
-        task = Task(id=id, name=name, description=description, start=start, end=end)
-        tasks[id] = task
-        self._write_tasks(tasks)
+        task = Task(
+            id=self.store.next_id(),
+            name=name,
+            description=description,
+            start=start,
+            end=end,
+            priority=priority,
+            dependencies=dependencies or [],
+        )
+        for dependency in task.dependencies:
+            self.store.get(dependency)  # raises for unknown tasks
+        self.store.insert([task])
+        self._schedule(task)
 
         return task
 
+    add_task_dependencies_parser = utils.CustomCmd2ArgumentParser(_get_cmd_instance)
+    add_task_dependencies_parser.add_argument(
+        "-id",
+        type=int,
+        required=True,
+        help="Task ID",
+    )
+    add_task_dependencies_parser.add_argument(
+        "-depends_on",
+        type=int,
+        nargs="+",
+        required=True,
+        help="IDs of tasks that must be completed first",
+    )
+
+    @with_argparser(add_task_dependencies_parser)
+    def do_add_task_dependencies(self, args):
+        """Make a task depend on other tasks"""
+
+        try:
+            output = self.add_task_dependencies(
+                id=args.id, dependencies=args.depends_on
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(f"Task {output.id} depends on: {output.dependencies}")
+
+    def add_task_dependencies(self, id: int, dependencies: List[int]) -> Task:
+        """Make a task depend on other tasks"""
+
+        task = self.store.get(id)
+        for dependency in dependencies:
+            self.store.get(dependency)
+        self.scheduler.add_dependencies(id, dependencies)  # raises on a cycle
+
+        new = [dep for dep in dependencies if dep not in task.dependencies]
+        return self.store.update(id, dependencies=task.dependencies + new)
+
+    next_task_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(Task),
+    )
+
+    @with_argparser(next_task_parser)
+    def do_next_task(self, _=None):
+        """Get the pending task to work on next: highest priority, then earliest deadline, among tasks whose dependencies are complete"""
+
+        output = self.next_task()
+
+        if output is None:
+            self._cmd.poutput("No task is ready")
+            return
+
+        self._cmd.poutput(output.model_dump_json(indent=4))
+
+    def next_task(self) -> Optional[Task]:
+        """Get the pending task to work on next"""
+        id = self.scheduler.next()
+        return self.store.get(id) if id is not None else None
+
     read_tasks_parser = utils.CustomCmd2ArgumentParser(
         _get_cmd_instance,
         epilog=utils.format_return_obj_str(Task, Template("dict[int,$obj]")),
@@ -138,16 +383,56 @@ class TaskManager(CommandSet):
         """Read existing tasks"""
         output = self.read_tasks()
 
-        self._cmd.poutput(json.dumps(output, indent=4, default=lambda o: o.dict()))
+        self._cmd.poutput(
+            json.dumps(
+                {id: task.model_dump(mode="json") for id, task in output.items()},
+                indent=4,
+            )
+        )
 
     def read_tasks(self) -> dict[int, Task]:
         """Reads task from database"""
-        with open(TASK_FILE, "r") as file:
-            data = json.load(file)
+        return self.store.all()
+
+    get_due_tasks_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=utils.format_return_obj_str(Task, Template("List[$obj]")),
+    )
+    get_due_tasks_parser.add_argument(
+        "-before",
+        type=str,
+        required=True,
+        help="Universal time YYYY-MM-DDTHH:MM:SS by which the tasks must be completed",
+    )
+    get_due_tasks_parser.add_argument(
+        "-status",
+        type=str,
+        required=False,
+        help="Only tasks with this status",
+    )
+
+    @with_argparser(get_due_tasks_parser)
+    def do_get_due_tasks(self, args):
+        """Get tasks due before a given time, earliest deadline first"""
+
+        try:
+            before = datetime.strptime(args.before, "%Y-%m-%dT%H:%M:%S")
+            statuses = [TaskStatus(args.status)] if args.status else None
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
 
-        tasks = {int(k): Task(**v) for k, v in data.items()}
+        output = self.get_due_tasks(before, statuses)
 
-        return tasks
+        self._cmd.poutput(
+            json.dumps([task.model_dump(mode="json") for task in output], indent=4)
+        )
+
+    def get_due_tasks(
+        self, before: datetime, statuses: List[TaskStatus] = None
+    ) -> List[Task]:
+        """Get tasks due before a given time, earliest deadline first"""
+        return self.store.due_before(before, statuses)
 
     set_task_status_parser = utils.CustomCmd2ArgumentParser(_get_cmd_instance)
     set_task_status_parser.add_argument(
@@ -174,26 +459,38 @@ class TaskManager(CommandSet):
                 f"'{args.status}' is not a valid TaskStatus. Must be one of: {[status.value for status in TaskStatus]}"
             )
 
-        output = self.set_task_status(id=args.id, status=status)
+        try:
+            output = self.set_task_status(id=args.id, status=status)
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
 
-        self._cmd.poutput(f"Set task {output.id} status to: {output.status.value}")
+        self._cmd.poutput(f"Set task {output.id} status to: {output.status}")
 
     def set_task_status(self, id: int, status: TaskStatus) -> Task:
         """Set a task's status"""
-        tasks = self.read_tasks()
-        tasks[id].status = status
-
-        self._write_tasks(tasks)
+        task = self.store.update(id, status=status)
+        self.scheduler.update(
+            id,
+            eligible=task.status == TaskStatus.PENDING.value,
+            done=task.status == TaskStatus.COMPLETE.value,
+        )
 
-        return tasks[id]
+        return task
 
-    def _write_tasks(self, tasks: dict[int, Task]):
-        """Write tasks object to file"""
-        tasks_serial = {k: v.model_dump(mode="json") for k, v in tasks.items()}
-        with open(TASK_FILE, "w") as file:
-            json.dump(tasks_serial, file, indent=4)
+    def _schedule(self, task: Task):
+        """Add a task to the scheduler, ordered by priority and then deadline."""
+        deadline = utils.datetime_to_ksp_ut(task.end) if task.end else math.inf
+        status = TaskStatus(task.status)
+        self.scheduler.add(
+            task.id,
+            key=(-PRIORITY_RANK[TaskPriority(task.priority).value], deadline),
+            dependencies=task.dependencies,
+            eligible=status == TaskStatus.PENDING,
+            done=status == TaskStatus.COMPLETE,
+        )
 
     def _reset_tasks(self):
-        """Resets the task file to an empty JSON file."""
-        with open(TASK_FILE, "w") as file:
-            json.dump({}, file, indent=4)
+        """Removes all tasks."""
+        self.store.clear()
+        self.scheduler = TaskScheduler()
@@ -0,0 +1,227 @@
+"""ThermalMonitor class."""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import List
+
+from cmd2 import CommandSet, with_argparser, with_default_category
+
+from llmsat.libs import utils
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.thermal import (
+    DEFAULT_HORIZON,
+    DEFAULT_THRESHOLD,
+    HeatingTracker,
+    PartThermal,
+)
+from llmsat.libs.vessel_parts import PartsModel
+
+DEFAULT_RATE = 1.0  # Hz
+MAX_PENDING_ALERTS = 100  # kept until a console is attached, oldest dropped first
+
+
+@with_default_category("ThermalMonitor")
+class ThermalMonitor(CommandSet):
+    """Functions for monitoring part temperatures."""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ThermalMonitor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        krpc_connection=None,
+        rate: float = DEFAULT_RATE,
+        threshold: float = DEFAULT_THRESHOLD,
+        horizon: float = DEFAULT_HORIZON,
+    ):
+        """Watches the temperature of every part in the background and alerts when a
+        part crosses the warning threshold or is predicted to reach its max
+        temperature within the horizon.
+
+        Args:
+            rate: temperature readings per second
+            threshold: fraction of its max temperature at which a part is reported
+            horizon: game seconds within which a predicted breach is reported
+        """
+        if ThermalMonitor._initialized:
+            return
+        super().__init__()
+        self.connection = krpc_connection
+        self.vessel = self.connection.space_center.active_vessel
+        self.telemetry = TelemetryHub(self.connection)
+        self.parts = PartsModel(self.vessel, self.telemetry)
+
+        self.rate = rate
+        self.tracker = HeatingTracker(threshold=threshold, horizon=horizon)
+        self._lock = threading.Lock()
+        # the tracker reports each crossing once, so alerts raised before a console
+        # is attached are kept until they can be delivered
+        self._pending_alerts = deque(maxlen=MAX_PENDING_ALERTS)
+        self.parts.configure("temperature", rate)
+
+        # the first reading opens a stream per part, so it is taken after startup
+        self.monitor_thread = threading.Thread(
+            target=self.monitor_temperatures, daemon=True
+        )
+        self.monitor_thread.start()
+
+        ThermalMonitor._initialized = True
+
+    @staticmethod
+    def _get_cmd_instance():
+        """Gets the cmd for use by argument parsers for poutput."""
+        return ThermalMonitor()._cmd
+
+    get_thermal_status_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+        epilog=f"Returns:\nList[{utils.model_schema(PartThermal)['title']}]: {json.dumps(utils.model_schema(PartThermal)['properties'], indent=4)}",
+    )
+    get_thermal_status_parser.add_argument(
+        "-count",
+        type=int,
+        required=False,
+        default=5,
+        help="Number of parts to list",
+    )
+
+    @with_argparser(get_thermal_status_parser)
+    def do_get_thermal_status(self, args):
+        """Get the parts closest to their max temperature"""
+        try:
+            parts = self.get_thermal_status(args.count)
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(
+            json.dumps([part.model_dump(mode="json") for part in parts], indent=4)
+        )
+
+    def get_thermal_status(self, count: int = 5) -> List[PartThermal]:
+        """The parts closest to their max temperature: soonest to reach it at their
+        current heating rate, then hottest relative to it."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        with self._lock:
+            if self.tracker.ut is None:
+                self._check()
+            titles = {id: facts.title for id, facts in self.parts.parts.items()}
+            return [
+                self.tracker.state(i, titles.get(self.tracker.ids[i], ""))
+                for i in self.tracker.closest_to_limit(count)
+            ]
+
+    configure_thermal_monitor_parser = utils.CustomCmd2ArgumentParser(
+        _get_cmd_instance,
+    )
+    configure_thermal_monitor_parser.add_argument(
+        "-rate",
+        type=float,
+        required=False,
+        help="Temperature readings per second",
+    )
+    configure_thermal_monitor_parser.add_argument(
+        "-threshold",
+        type=float,
+        required=False,
+        help="Fraction of its max temperature at which a part is reported, between 0 and 1",
+    )
+    configure_thermal_monitor_parser.add_argument(
+        "-horizon",
+        type=float,
+        required=False,
+        help="Seconds of game time within which a predicted breach is reported",
+    )
+
+    @with_argparser(configure_thermal_monitor_parser)
+    def do_configure_thermal_monitor(self, args):
+        """Change when the thermal monitor reads temperatures and alerts"""
+        try:
+            self.configure(
+                rate=args.rate, threshold=args.threshold, horizon=args.horizon
+            )
+        except ValueError as e:
+            self._cmd.perror(e)
+            return
+
+        self._cmd.poutput(
+            f"Thermal monitor: {self.rate:g} readings/s, alerts at {self.tracker.threshold:.0%} of max temperature or a breach predicted within {self.tracker.horizon:g} s"
+        )
+
+    def configure(
+        self, rate: float = None, threshold: float = None, horizon: float = None
+    ):
+        """Change when the thermal monitor reads temperatures and alerts"""
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        if threshold is not None and not 0 < threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        if horizon is not None and horizon < 0:
+            raise ValueError("horizon must not be negative")
+
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+                self.parts.configure("temperature", rate)
+            if threshold is not None:
+                self.tracker.threshold = threshold
+            if horizon is not None:
+                self.tracker.horizon = horizon
+
+    def _check(self):
+        """Read every part's temperature from its stream and alert on new crossings."""
+        temperatures = self.parts.readings("temperature")
+        facts = self.parts.parts
+        ids = [id for id in temperatures if id in facts]
+        events = self.tracker.update(
+            ids,
+            [temperatures[id] for id in ids],
+            [facts[id].max_temperature for id in ids],
+            self.telemetry.get("ut"),
+        )
+        for index, reason in events:
+            self._on_thermal_alert(
+                self.tracker.state(index, facts[ids[index]].title), reason
+            )
+
+    def _on_thermal_alert(self, part: PartThermal, reason: str):
+        """Handle a part that crossed the threshold or is predicted to breach."""
+        if reason == "threshold":
+            summary = f"{part.title} is above {self.tracker.threshold:.0%} of its max temperature"
+        else:
+            summary = f"{part.title} is predicted to reach its max temperature in {part.time_to_limit:.0f} s"
+        self._pending_alerts.append(
+            f"{utils.ksp_ut_to_datetime(self.tracker.ut)}::ThermalMonitor:: {summary}:\n{part.model_dump_json(indent=4)}"
+        )
+        self._deliver_alerts()
+
+    def _deliver_alerts(self):
+        """Send the pending alerts, oldest first, once a console is attached. An alert
+        is only dropped from the queue once sent."""
+        while self._pending_alerts and self._cmd is not None:
+            self._cmd.async_alert(self._pending_alerts[0], priority=utils.Priority.HIGH)
+            self._pending_alerts.popleft()
+
+    def monitor_temperatures(self):
+        """Async monitoring of part temperatures.
+
+        Temperatures are pushed by their streams, so each reading costs no round trip
+        unless the parts have changed.
+        """
+        while True:
+            time.sleep(1 / self.rate)
+            try:
+                with self._lock:
+                    self._check()
+                    self._deliver_alerts()
+            except Exception as e:
+                logging.warning(f"Thermal monitor reading failed: {e}")
@@ -4,20 +4,25 @@ import json
 import logging
 import threading
 from pathlib import Path
+from typing import List, Tuple
 
 import cmd2
-import krpc
 import zmq
 import zmq.asyncio
 
 from llmsat.components.alarm_manager import AlarmManager
 from llmsat.components.autopilot import AutopilotService
 from llmsat.components.comms_service import CommunicationService
+from llmsat.components.eps import EPS
 from llmsat.components.experiment_manager import ExperimentManager
 from llmsat.components.orbit_propagator import OrbitPropagator
 from llmsat.components.spacecraft_manager import SpacecraftManager
 from llmsat.components.task_manager import TaskManager
-from llmsat.libs import utils
+from llmsat.components.thermal_monitor import ThermalMonitor
+from llmsat.libs import protocol, utils
+from llmsat.libs.command_catalog import CommandCatalog
+from llmsat.libs.dashboard import Dashboard, compact_json
+from llmsat.libs.profiling import StartupProfile
 
 CONFIG_PATH = Path("llmsat/app_config.json")
 
@@ -25,12 +30,20 @@ CONFIG_PATH = Path("llmsat/app_config.json")
 class Console(cmd2.Cmd):
     """Spacecraft console app"""
 
-    def __init__(self, port: int, quiet=False, *args, **kwargs):
+    def __init__(
+        self,
+        port: int,
+        quiet=False,
+        startup_profile: StartupProfile = None,
+        *args,
+        **kwargs,
+    ):
         super().__init__(include_py=True, *args, **kwargs)
 
         self.intro = "SatelliteOS"
         self.prompt = "> "
         self.quiet = quiet
+        self.startup_profile = startup_profile  # completed by the first dashboard
 
         # delete built-in commands and settings
         del cmd2.Cmd.do_alias
@@ -65,9 +78,15 @@ class Console(cmd2.Cmd):
         )
 
         self.output_buffer = []
+        self.dashboard = Dashboard()
+        self.catalog = CommandCatalog()
+        self.streamed_command_id = 0  # correlation ID of the command being streamed
+        self.streamed_command_thread = None
 
         # start server for controller
         self.controller_connected = False
+        self.protocol_version = protocol.PROTOCOL_VERSION
+        self.send_lock = threading.Lock()
         self.context = zmq.Context()
         self.controller_connection = self.context.socket(zmq.PAIR)
         self.controller_connection.bind(f"tcp://*:{port}")
@@ -79,89 +98,183 @@ class Console(cmd2.Cmd):
     def receive_message(self):
         """Receive and execute command messages from the controller."""
         while True:
-            message: utils.Message = self.controller_connection.recv_pyobj()
+            try:
+                message = protocol.recv(self.controller_connection)
+            except protocol.ProtocolError as e:
+                logging.warning(f"Dropped controller message: {e}")
+                continue
+
             if message.type == utils.MessageType.COMMAND:
-                self.on_controller_command(message.data)
+                self.on_controller_command(message.data, message.id)
             elif message.type == utils.MessageType.CONNECT:
-                self.on_controller_connect()
+                self.on_controller_connect(message.data)
             elif message.type == utils.MessageType.DISCONNECT:
                 self.on_controller_disconnect()
 
-    def on_controller_command(self, message):
+    def on_controller_command(self, message, id: int = 0):
         print(f"{self.prompt}{message}")
-        self.onecmd_plus_hooks(message)
-        output = self.get_output()
-        self.send_message(output)
 
-    def on_controller_connect(self):
+        if self.protocol_version < protocol.STREAMING_VERSION:
+            self.onecmd_plus_hooks(message)
+            output = self.get_output()
+            self.send_message(output)
+            return
+
+        # stream each line of output to the controller as the command prints it
+        self.get_output()  # clear buffer
+        self.streamed_command_id = id
+        self.streamed_command_thread = threading.get_ident()
+        try:
+            self.onecmd_plus_hooks(message)
+        finally:
+            self.streamed_command_id = 0
+            self.streamed_command_thread = None
+            self.send_message(type=utils.MessageType.END, id=id)
+
+    def on_controller_connect(self, version_offer: str = None):
+        try:
+            version = protocol.negotiate_version(version_offer)
+        except protocol.ProtocolError as e:
+            logging.warning(f"Rejected controller: {e}")
+            return
+
+        self.protocol_version = version
+        with self.send_lock:
+            protocol.send(
+                self.controller_connection,
+                utils.Message(
+                    type=utils.MessageType.VERSION,
+                    data=str(version),
+                    channel=utils.Channel.CONTROL,
+                ),
+                version,
+            )
+
+        # the dashboard's ID is its revision, which has no ID field before version 3
+        envelope = version >= protocol.ENVELOPE_VERSION
+        since = protocol.offered_dashboard(version_offer) if envelope else None
+
         self.controller_connected = True
         print("Controller connected")
         self.get_output()  # clear buffer
-        self.display_dashboard()
-        self.send_message(self.get_output())
+        revision = self.display_dashboard(since)
+        self.send_message(
+            self.get_output(),
+            id=revision if envelope else 0,
+            channel=utils.Channel.CONTROL,
+        )
 
     def on_controller_disconnect(self):
         self.controller_connected = False
         print("Controller disconnected")
 
-    def send_message(self, message: str):
+    def send_message(
+        self,
+        message: str = None,
+        type=utils.MessageType.OUTPUT,
+        id: int = 0,
+        channel=utils.Channel.COMMAND,
+        priority=utils.Priority.NORMAL,
+    ):
         """Send message to the controller."""
-        self.controller_connection.send_string(message)
+        with self.send_lock:
+            protocol.send(
+                self.controller_connection,
+                utils.Message(
+                    type=type, data=message, id=id, channel=channel, priority=priority
+                ),
+                self.protocol_version,
+            )
+
+    def buffer_output(self, message: str):
+        """Stream output of the command being run for the controller, or buffer it."""
+        # a command's own output is streamed whatever its ID, including 0
+        if self.streamed_command_thread == threading.get_ident():
+            self.send_message(message, id=self.streamed_command_id)
+        else:
+            self.output_buffer.append(message)
 
     def poutput(self, message="", timestamp=False, *args, **kwargs):
         if timestamp:
             spacecraft_manager = self.find_commandsets(SpacecraftManager)[0]
             ut = spacecraft_manager.get_ut()
             message = f"{ut.isoformat()} | {message}"
-        self.output_buffer.append(message)
+        self.buffer_output(message)
         if not self.quiet:
             super().poutput(message, *args, **kwargs)
 
-    def async_alert(self, message: str, timestamp=False, *args, **kwargs):
+    def async_alert(
+        self,
+        message: str,
+        timestamp=False,
+        priority=utils.Priority.NORMAL,
+        *args,
+        **kwargs,
+    ):
         # self.output_buffer.append(message)
         if timestamp:
             spacecraft_manager = self.find_commandsets(SpacecraftManager)[0]
             ut = spacecraft_manager.get_ut()
             message = f"{ut.isoformat()} | {message}"
-        self.send_message(message)
+        self.send_message(message, channel=utils.Channel.ALERT, priority=priority)
 
         super().async_alert(message, *args, **kwargs)
 
     def perror(self, message: str, *args, **kwargs):
-        self.output_buffer.append(str(message))
+        self.buffer_output(str(message))
         if not self.quiet:
             super().perror(message, *args, **kwargs)
 
     def preloop(self):
         super().preloop()
-        self.display_dashboard()
-
-    def display_dashboard(self):
+        if self.startup_profile is None:
+            self.display_dashboard()
+            return
+
+        with self.startup_profile.phase("dashboard"):
+            self.display_dashboard()
+        self.startup_profile.stop()
+        logging.info(f"Startup profile:\n{self.startup_profile.report()}")
+
+    def display_dashboard(self, since: int = None) -> int:
+        """Print the dashboard, with the sections unchanged since revision since
+        elided. Returns its revision."""
+        revision, text = self.dashboard.render(self.dashboard_sections(), since)
+        self.poutput(text)
+        return revision
+
+    def dashboard_sections(self) -> List[Tuple[str, str]]:
         spacecraft_manager = self.find_commandsets(SpacecraftManager)[0]
         task_manager = self.find_commandsets(TaskManager)[0]
         ut = spacecraft_manager.get_ut()
         met = spacecraft_manager.get_met()
 
-        self.poutput("SatelliteOS")
-        self.poutput(f"UT: {ut.isoformat()} | MET: {met}")
-        self.poutput("")
-
-        spacecraft_manager.do_read_mission_brief()
-        self.poutput("")
-
-        self.poutput("Task Plan:")
         tasks = task_manager.read_tasks()  # TODO: do_read_tasks() does not work
-        self.poutput(json.dumps(tasks, indent=4, default=lambda o: o.dict()))
-        self.poutput("")
-
-        self.poutput("Spacecraft Properties:")
-        spacecraft_manager.do_get_spacecraft_properties()
-        self.poutput("")
-
-        self.poutput("Resources:")
-        spacecraft_manager.do_get_resources()
-
-        self.do_help("-v")
+        properties = spacecraft_manager.get_spacecraft_properties()
+        resources = spacecraft_manager.get_resource_records()
+
+        return [
+            ("", f"SatelliteOS | UT: {ut.isoformat()} | MET: {met}"),
+            ("Mission Brief", spacecraft_manager.read_mission_brief().strip()),
+            ("Task Plan", f"Task Plan:\n{compact_json(tasks) if tasks else 'none'}"),
+            (
+                "Spacecraft Properties",
+                f"Spacecraft Properties:\n{properties.model_dump_json()}",
+            ),
+            (
+                "Resources",
+                "Resources (amount/max):\n"
+                + "\n".join(
+                    f"{resource['name']}: {resource['amount']:g}/{resource['max']:g}"
+                    for resource in resources
+                ),
+            ),
+            ("Commands", self.catalog.summary(self)),
+        ]
+
+    def _help_menu(self, verbose: bool = False):
+        """List the commands from the catalog rather than rendering cmd2's tables."""
+        self.poutput(self.catalog.summary(self))
 
     def get_output(self):
         """Retrieve all output and clear the buffer"""
@@ -175,43 +288,58 @@ if __name__ == "__main__":
         app_config_data = json.load(file)
         app_config = utils.AppConfig(**app_config_data)
 
-    if not utils.is_ksp_running():
-        raise Exception("Please make sure KSP is running")
+    profile = StartupProfile()
+    if app_config.simulate:
+        print("Starting simulated KSP...")
+        with profile.phase("connect"):
+            from llmsat.libs import krpc_sim
 
-    input("Press any key once the KSP save is loaded to continue...")
+            ksp_connection = krpc_sim.SimConnection()
+    else:
+        if not utils.is_ksp_running():
+            raise Exception("Please make sure KSP is running")
 
-    print("Connecting to KSP...")
-    ksp_connection = krpc.connect(name="Client")
+        input("Press any key once the KSP save is loaded to continue...")
+
+        print("Connecting to KSP...")
+        with profile.phase("connect"):
+            import krpc
+
+            ksp_connection = krpc.connect(name="Client")
+    profile.count_rpcs(ksp_connection)
 
     if app_config.load_checkpoint:
         print(f"Loading '{app_config.checkpoint_name}.sfs' checkpoint...")
-        utils.load_checkpoint(
-            name=app_config.checkpoint_name, space_center=ksp_connection.space_center
+        with profile.phase("load checkpoint"):
+            utils.load_checkpoint(
+                name=app_config.checkpoint_name,
+                space_center=ksp_connection.space_center,
+            )
+
+    # components defer their slow setup, e.g. tagging parts, to first use
+    components = [
+        (SpacecraftManager, {}),
+        (AutopilotService, {}),
+        (ExperimentManager, {}),
+        (TaskManager, {}),
+        (CommunicationService, {}),
+        (AlarmManager, {"remove_alarms_on_init": app_config.load_checkpoint}),
+        (OrbitPropagator, {}),
+        (ThermalMonitor, {}),
+        (EPS, {}),
+    ]
+    command_sets = []
+    for cls, kwargs in components:
+        with profile.phase(cls.__name__):
+            command_sets.append(cls(ksp_connection, **kwargs))
+
+    with profile.phase("Console"):
+        app = Console(
+            port=app_config.port,
+            startup_profile=profile,
+            command_sets=command_sets,
         )
 
-    spacecraft_manager = SpacecraftManager(ksp_connection)
-    autopilot_service = AutopilotService(ksp_connection)
-    payload_manager = ExperimentManager(ksp_connection)
-    communication_service = CommunicationService(ksp_connection)
-    task_manager = TaskManager(ksp_connection)
-    alarm_manager = AlarmManager(
-        ksp_connection, remove_alarms_on_init=app_config.load_checkpoint
-    )
-    orbit_propagator = OrbitPropagator(ksp_connection)
-
-    app = Console(
-        port=app_config.port,
-        command_sets=[
-            spacecraft_manager,
-            autopilot_service,
-            payload_manager,
-            task_manager,
-            communication_service,
-            alarm_manager,
-            orbit_propagator,
-        ],
-    )
-
     app.cmdloop()
 
     input("Simulation complete. Press any key to quit...")
@@ -0,0 +1,159 @@
+"""Token-budgeted agent memory"""
+
+import math
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain.chains import LLMChain
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain_core.agents import AgentAction
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+
+CHARS_PER_TOKEN = 4  # rule of thumb for English text with OpenAI tokenizers
+PREVIEW_LENGTH = 80  # characters of an elided observation that are kept
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text, without a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class TokenBudgetMemory(ConversationSummaryBufferMemory):
+    """Conversation memory that stays within max_token_limit tokens.
+
+    Turns that no longer fit are folded into a rolling summary by the LLM. Pinned facts,
+    such as the mission brief, are always included and never summarized. Sections of a
+    new input that are already in memory, such as the static parts of the dashboard,
+    are replaced by a reference to them. Within a session, compact_steps keeps the
+    agent's scratchpad within steps_token_limit.
+    """
+
+    steps_token_limit: int = 2000
+    pinned_prefixes: Tuple[str, ...] = ("#",)  # sections to pin, markdown headings
+    min_section_tokens: int = 16  # shorter sections are cheaper to repeat
+    token_counter: Callable[[str], int] = estimate_tokens
+    pinned: Dict[str, str] = {}  # pinned facts by their first line
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        return self.token_counter(get_buffer_string(messages))
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        variables = super().load_memory_variables(inputs)
+        if not self.pinned:
+            return variables
+
+        pinned = self._pinned_message()
+        if self.return_messages:
+            variables[self.memory_key] = [pinned, *variables[self.memory_key]]
+        else:
+            variables[
+                self.memory_key
+            ] = f"{pinned.content}\n{variables[self.memory_key]}"
+        return variables
+
+    def pin(self, fact: str):
+        """Keep a fact in every prompt."""
+        fact = fact.strip()
+        self.pinned[fact.split("\n", 1)[0]] = fact
+
+    def deduplicate(self, text: str) -> str:
+        """Pin the sections of text that start with a pinned prefix, and replace them
+        and sections already in memory with a reference.
+
+        Sections are separated by blank lines and named by their first line. A pinned
+        section keeps the paragraphs that follow it up to the next pinned prefix, so a
+        markdown heading is pinned with its body. Its body also ends at a paragraph
+        that starts another dashboard section, titled "Title:" or elided as "(...)".
+        """
+        remembered = [message.content for message in self.chat_memory.messages]
+        groups: List[Tuple[bool, List[str]]] = []  # (pinned, paragraphs)
+        for paragraph in text.split("\n\n"):
+            title = paragraph.strip().split("\n", 1)[0]
+            if title.startswith(self.pinned_prefixes):
+                groups.append((True, [paragraph]))
+            elif groups and groups[-1][0] and not _starts_section(title):
+                groups[-1][1].append(paragraph)
+            else:
+                groups.append((False, [paragraph]))
+
+        sections = []
+        for pinned, paragraphs in groups:
+            section = "\n\n".join(paragraphs)
+            title = section.strip().split("\n", 1)[0]
+            if pinned:
+                self.pin(section)
+                sections.append(f"({title}: see pinned facts)")
+            elif self.token_counter(section) >= self.min_section_tokens and any(
+                section in message for message in remembered
+            ):
+                sections.append(f"({title}: unchanged, see earlier in conversation)")
+            else:
+                sections.append(section)
+        return "\n\n".join(sections)
+
+    def compact_steps(
+        self, steps: List[Tuple[AgentAction, str]]
+    ) -> List[Tuple[AgentAction, str]]:
+        """Elide the observations of the oldest steps until the steps fit in
+        steps_token_limit. The latest step is always kept whole."""
+        tokens = [
+            self.token_counter(action.log) + self.token_counter(observation)
+            for action, observation in steps
+        ]
+        total = sum(tokens)
+        compacted = list(steps)
+        for i in range(len(steps) - 1):
+            if total <= self.steps_token_limit:
+                break
+            action, observation = steps[i]
+            preview = observation.strip().split("\n", 1)[0][:PREVIEW_LENGTH]
+            elided = f"{preview}\n({self.token_counter(observation)} tokens of output elided)"
+            compacted[i] = (action, elided)
+            total -= tokens[i] - self.token_counter(action.log + elided)
+        return compacted
+
+    def prune(self):
+        """Fold the oldest messages that exceed the budget into the summary."""
+        pruned = self._pop_overflow()
+        if pruned:
+            self.moving_summary_buffer = self.predict_new_summary(
+                pruned, self.moving_summary_buffer
+            )
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]):
+        await super().asave_context(inputs, outputs)
+        pruned = self._pop_overflow()
+        if pruned:
+            chain = LLMChain(llm=self.llm, prompt=self.prompt)
+            self.moving_summary_buffer = await chain.apredict(
+                summary=self.moving_summary_buffer,
+                new_lines=get_buffer_string(
+                    pruned, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix
+                ),
+            )
+
+    def clear(self):
+        super().clear()
+        self.pinned = {}
+
+    def _pinned_message(self) -> SystemMessage:
+        return SystemMessage(
+            content="Pinned facts:\n\n" + "\n\n".join(self.pinned.values())
+        )
+
+    def _pop_overflow(self) -> List[BaseMessage]:
+        """Remove the oldest messages until pinned facts, summary and the remaining
+        messages fit in max_token_limit."""
+        buffer = self.chat_memory.messages
+        fixed = self.token_counter(self.moving_summary_buffer)
+        if self.pinned:
+            fixed += self.token_counter(self._pinned_message().content)
+
+        pruned = []
+        while buffer and fixed + self.count_tokens(buffer) > self.max_token_limit:
+            pruned.append(buffer.pop(0))
+        return pruned
+
+
+def _starts_section(title: str) -> bool:
+    """Whether a paragraph's first line titles a dashboard section or elides one."""
+    return title.endswith(":") or (title.startswith("(") and title.endswith(")"))
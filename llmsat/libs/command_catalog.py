@@ -0,0 +1,113 @@
+"""Catalog of console commands"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import cmd2
+from cmd2 import constants
+from pydantic import BaseModel
+
+OPTIONAL_NARGS = (argparse.OPTIONAL, argparse.ZERO_OR_MORE, argparse.REMAINDER)
+
+
+class ArgumentInfo(BaseModel):
+    flag: str
+    metavar: Optional[str] = None  # None for flags that take no value
+    required: bool = False
+    help: Optional[str] = None
+
+    def usage(self) -> str:
+        usage = f"{self.flag} {self.metavar}" if self.metavar else self.flag
+        return usage if self.required else f"[{usage}]"
+
+
+class CommandInfo(BaseModel):
+    name: str
+    category: str
+    description: str = ""
+    arguments: List[ArgumentInfo] = []
+    returns: Optional[str] = None  # return schema from the parser's epilog
+
+    def summary(self) -> str:
+        """The command with its required arguments and description, on one line."""
+        usage = " ".join(
+            [self.name]
+            + [argument.usage() for argument in self.arguments if argument.required]
+        )
+        return f"- {usage}: {self.description}" if self.description else f"- {usage}"
+
+
+class CommandCatalog:
+    """Names, arguments and return schemas of a console's commands.
+
+    The catalog is built on first use and rebuilt only when the set of commands
+    changes, as describing every command from its parser is slow. The console's command
+    list, shown by help and in the dashboard, is served from it. The agent learns the
+    commands from that list, as its only tools pass commands through to the console.
+
+    The catalog is built from the registered CommandSets, so it does not spare the
+    console from importing them: cmd2 needs every command defined before the prompt.
+    """
+
+    def __init__(self):
+        self.commands: Dict[str, CommandInfo] = {}
+        self._names: Tuple[str, ...] = ()
+        self._summary = ""
+
+    def refresh(self, app: cmd2.Cmd):
+        """Rebuild the catalog if the app's commands have changed."""
+        names = tuple(app.get_visible_commands())
+        if names == self._names:
+            return
+
+        categories, documented, _, _ = app._build_command_info()
+        categories.setdefault(app.default_category, []).extend(documented)
+        self.commands = {}
+        for category in sorted(categories):
+            for name in categories[category]:
+                func = app.cmd_func(name)
+                parser = getattr(func, constants.CMD_ATTR_ARGPARSER, None)
+                self.commands[name] = CommandInfo(
+                    name=name,
+                    category=category,
+                    description=cmd2.utils.strip_doc_annotations(func.__doc__ or ""),
+                    arguments=_arguments(parser) if parser else [],
+                    returns=parser.epilog if parser else None,
+                )
+
+        lines = ["Commands ('<command> -h' for all arguments and output):"]
+        category = None
+        for command in self.commands.values():
+            if command.category != category:
+                category = command.category
+                lines.append(f"{category}:")
+            lines.append(command.summary())
+        self._summary = "\n".join(lines)
+        self._names = names
+
+    def summary(self, app: cmd2.Cmd) -> str:
+        """Each command with its required arguments and description, by category."""
+        self.refresh(app)
+        return self._summary
+
+
+def _arguments(parser: argparse.ArgumentParser) -> List[ArgumentInfo]:
+    arguments = []
+    for action in parser._actions:
+        if isinstance(action, argparse._HelpAction):
+            continue
+        metavar = action.metavar or action.dest.upper()
+        if not action.option_strings:  # positional
+            arguments.append(
+                ArgumentInfo(flag=metavar, required=action.nargs not in OPTIONAL_NARGS)
+            )
+            continue
+        arguments.append(
+            ArgumentInfo(
+                flag=action.option_strings[0],
+                metavar=metavar if action.nargs != 0 else None,
+                required=action.required,
+                help=action.help,
+            )
+        )
+    return arguments
@@ -0,0 +1,51 @@
+"""Console dashboard rendering"""
+
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+UNCHANGED = "({title}: unchanged since the last session)"
+
+
+def compact_json(obj: Any) -> str:
+    """JSON without indentation, whitespace or null fields."""
+
+    def default(o):
+        if hasattr(o, "model_dump"):
+            return o.model_dump(mode="json", exclude_none=True)
+        return str(o)
+
+    return json.dumps(obj, separators=(",", ":"), default=default)
+
+
+class Dashboard:
+    """Renders the dashboard sent to the controller on connect.
+
+    Sections are (title, text) pairs, the text including any heading. Each rendering
+    gets a revision, which the controller can echo when it reconnects: sections that
+    have not changed since that revision are then replaced by a one-line reference, so
+    a returning controller only receives what changed. Sections without a title, such
+    as the header, are always sent.
+    """
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self._sent: Dict[str, str] = {}  # text of each section at revision, by title
+
+    def render(
+        self, sections: List[Tuple[str, str]], since: int = None
+    ) -> Tuple[int, str]:
+        """The revision and text of the dashboard, with the sections unchanged since
+        revision since elided. Unknown revisions get the whole dashboard."""
+        delta = since is not None and since == self.revision
+        parts = []
+        for title, text in sections:
+            if delta and title and self._sent.get(title) == text:
+                parts.append(UNCHANGED.format(title=title))
+            else:
+                parts.append(text)
+
+        full = "\n\n".join(text for _, text in sections)
+        self.revision = zlib.crc32(full.encode("utf-8"))
+        self._sent = {title: text for title, text in sections if title}
+        return self.revision, "\n\n".join(parts)
@@ -0,0 +1,133 @@
+"""Controller-side message dispatch"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from llmsat.libs import protocol, utils
+from llmsat.libs.streaming import ResponseRouter, ResponseStream
+
+
+class AlertQueue:
+    """Unsolicited console output waiting for the agent, highest priority first and
+    oldest first within a priority."""
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._waiters: List[tuple] = []  # (event loop, future) of pending get_async
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def put(self, message: utils.Message):
+        with self._condition:
+            heapq.heappush(
+                self._heap, (-message.priority, next(self._sequence), message)
+            )
+            self._condition.notify()
+            for loop, waiter in self._waiters:
+                loop.call_soon_threadsafe(_wake, waiter)
+
+    def get(self, block: bool = True, timeout: float = None) -> utils.Message:
+        """Remove and return the most urgent alert. Raises queue.Empty if none
+        arrives in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._heap:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    raise queue.Empty
+                self._condition.wait(remaining)
+            return heapq.heappop(self._heap)[2]
+
+    async def get_async(self) -> utils.Message:
+        """Wait on the event loop for the most urgent alert. Can be cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._heap:
+                    return heapq.heappop(self._heap)[2]
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._condition:
+                    self._waiters.remove(waiter)
+
+    def peek(self) -> Optional[utils.Message]:
+        with self._condition:
+            return self._heap[0][2] if self._heap else None
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Dispatcher:
+    """Routes messages from the console by channel.
+
+    Command replies go to the stream, and so the future, of the command they answer,
+    so several commands can be in flight at once. Alerts go to a priority queue and
+    session messages to the connection handlers.
+    """
+
+    def __init__(self, on_version: Callable[[int], None] = None):
+        self.on_version = on_version
+        self.responses = ResponseRouter(on_late_output=self._on_late_output)
+        self.alerts = AlertQueue()
+        self.dashboard_revision: Optional[int] = None  # of the last dashboard received
+        self._connection: Future[str] = Future()
+
+    def expect_connection(self) -> Future:
+        """A future resolved with the console's reply to the next CONNECT."""
+        self._connection = Future()
+        return self._connection
+
+    def connect_payload(self) -> str:
+        """The CONNECT payload, asking for only what changed since the last dashboard."""
+        return protocol.offer_versions(dashboard=self.dashboard_revision)
+
+    def open(self, command: str) -> ResponseStream:
+        return self.responses.open(command)
+
+    def dispatch(self, message: utils.Message):
+        if message.type in protocol.CONTROL_TYPES:
+            self._on_control(message)
+        elif message.channel == utils.Channel.ALERT:
+            message.received_at = time.monotonic()
+            self.alerts.put(message)
+        elif message.channel == utils.Channel.CONTROL:
+            self._on_control(message)
+        elif not self.responses.dispatch(message):
+            logging.warning(f"Dropped reply to unknown command {message.id}")
+
+    def _on_control(self, message: utils.Message):
+        if message.type == utils.MessageType.VERSION:
+            if self.on_version is not None:
+                self.on_version(int(message.data))
+        elif message.type == utils.MessageType.OUTPUT:
+            if not self._connection.done():
+                self.dashboard_revision = message.id or None
+                self._connection.set_result(message.data or "")
+
+    def _on_late_output(self, stream: ResponseStream, output: str):
+        """Queue the output a command printed after its caller stopped waiting."""
+        self.alerts.put(
+            utils.Message(
+                type=utils.MessageType.OUTPUT,
+                data=f"Output of '{stream.command}' (completed):\n{output}",
+                channel=utils.Channel.ALERT,
+                received_at=time.monotonic(),
+            )
+        )
@@ -0,0 +1,167 @@
+"""Append-only JSON Lines log"""
+
+import bisect
+import itertools
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+Record = TypeVar("Record", bound=BaseModel)
+
+DEFAULT_SYNC_EVERY = 32  # records
+DEFAULT_SYNC_INTERVAL = 1.0  # s
+
+
+class JsonlLog(Generic[Record]):
+    """An append-only log of pydantic records, one JSON object per line.
+
+    Appending writes a single line, so the cost does not grow with the log, and a crash
+    can at most leave a partial last line, which is dropped on the next open. Writes are
+    flushed immediately but fsynced in batches: after sync_every records or
+    sync_interval seconds, whichever comes first.
+
+    Records are indexed in memory by timestamp and file offset, so time-range and paged
+    reads seek straight to the lines they need without loading the rest of the log.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        model: Type[Record],
+        timestamp_field: str = "timestamp",
+        sync_every: int = DEFAULT_SYNC_EVERY,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.model = model
+        self.timestamp_field = timestamp_field
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._lock = threading.RLock()
+        self._keys: List[tuple[datetime, int]] = []  # (timestamp, sequence), sorted
+        self._offsets: List[int] = []  # file offset of each key
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._sync_timer: Optional[threading.Timer] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self._load_index()
+        self._file = open(self.path, "ab")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+    def append(self, record: Record) -> Record:
+        line = record.model_dump_json().encode("utf-8") + b"\n"
+
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._index(getattr(record, self.timestamp_field), offset)
+
+            self._pending += 1
+            if self._pending >= self.sync_every:
+                self.sync()
+            elif self._sync_timer is None:
+                self._sync_timer = threading.Timer(self.sync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+        return record
+
+    def sync(self):
+        """Force every appended record to disk."""
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._pending and not self._file.closed:
+                os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self._file.close()
+
+    def count(self, start: datetime = None, end: datetime = None) -> int:
+        """Number of records with start <= timestamp < end."""
+        with self._lock:
+            low, high = self._bounds(start, end)
+            return high - low
+
+    def read(
+        self,
+        start: datetime = None,
+        end: datetime = None,
+        limit: int = None,
+        page: int = 0,
+        newest_first: bool = True,
+    ) -> List[Record]:
+        """Read one page of the records with start <= timestamp < end.
+
+        Args:
+            start: earliest timestamp, unbounded if None
+            end: timestamp to stop before, unbounded if None
+            limit: page size, all matching records if None
+            page: zero-based page number
+            newest_first: order records, and so pages, from the most recent
+        """
+        with self._lock:
+            low, high = self._bounds(start, end)
+            indices = range(low, high)
+            if newest_first:
+                indices = indices[::-1]
+            if limit is not None:
+                indices = indices[page * limit : (page + 1) * limit]
+            offsets = [self._offsets[i] for i in indices]
+
+        records = []
+        with open(self.path, "rb") as file:
+            for offset in offsets:
+                file.seek(offset)
+                records.append(self.model.model_validate_json(file.readline()))
+
+        return records
+
+    def _bounds(self, start: Optional[datetime], end: Optional[datetime]):
+        low = 0 if start is None else bisect.bisect_left(self._keys, (start, -1))
+        high = (
+            len(self._keys)
+            if end is None
+            else bisect.bisect_left(self._keys, (end, -1))
+        )
+        return low, max(low, high)
+
+    def _index(self, timestamp: datetime, offset: int):
+        key = (timestamp, next(self._sequence))
+        if not self._keys or key >= self._keys[-1]:
+            self._keys.append(key)
+            self._offsets.append(offset)
+        else:  # out of order, e.g. after reloading an earlier checkpoint
+            i = bisect.bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._offsets.insert(i, offset)
+
+    def _load_index(self):
+        """Index the existing file, dropping a partial last line left by a crash."""
+        offset = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                record = self.model.model_validate_json(line)
+                self._index(getattr(record, self.timestamp_field), offset)
+                offset += len(line)
+
+        if offset != self.path.stat().st_size:
+            with open(self.path, "r+b") as file:
+                file.truncate(offset)
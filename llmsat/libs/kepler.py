@@ -0,0 +1,214 @@
+"""Analytic two-body orbit propagation.
+
+Evaluates Keplerian orbits locally with NumPy, so sampling an orbit at thousands of
+epochs costs a single kRPC snapshot instead of one round trip per sample.
+"""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import krpc_snapshot, utils
+
+np = utils.lazy_import("numpy")
+
+
+class OrbitalElements(BaseModel):
+    """Keplerian elements of an orbit at a reference epoch."""
+
+    body: str = Field(description="The celestial body being orbited.")
+    body_radius: float = Field(
+        description="The equatorial radius of the body being orbited, in meters."
+    )
+    gravitational_parameter: float = Field(
+        description="The standard gravitational parameter of the body, in m^3/s^2."
+    )
+    semi_major_axis: float = Field(
+        description="The semi-major axis of the orbit, in meters. Negative for hyperbolic orbits."
+    )
+    eccentricity: float = Field(description="The eccentricity of the orbit.")
+    inclination: float = Field(description="The inclination of the orbit, in radians.")
+    longitude_of_ascending_node: float = Field(
+        description="The longitude of the ascending node, in radians."
+    )
+    argument_of_periapsis: float = Field(
+        description="The argument of periapsis, in radians."
+    )
+    mean_anomaly_at_epoch: float = Field(
+        description="The mean anomaly at the reference epoch, in radians."
+    )
+    epoch: float = Field(
+        description="The universal time at which the mean anomaly at epoch was measured, in seconds."
+    )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "OrbitalElements":
+        """Build from a snapshot produced by krpc_snapshot.snapshot_orbit."""
+        return cls(
+            body=snapshot["body"]["name"],
+            body_radius=snapshot["body"]["equatorial_radius"],
+            gravitational_parameter=snapshot["body"]["gravitational_parameter"],
+            semi_major_axis=snapshot["semi_major_axis"],
+            eccentricity=snapshot["eccentricity"],
+            inclination=snapshot["inclination"],
+            longitude_of_ascending_node=snapshot["longitude_of_ascending_node"],
+            argument_of_periapsis=snapshot["argument_of_periapsis"],
+            mean_anomaly_at_epoch=snapshot["mean_anomaly_at_epoch"],
+            epoch=snapshot["epoch"],
+        )
+
+    @classmethod
+    def from_krpc(cls, orbit_obj) -> "OrbitalElements":
+        """Snapshot the elements of a kRPC orbit in one batched request."""
+        return cls.from_snapshot(krpc_snapshot.snapshot_orbit(orbit_obj))
+
+    @property
+    def is_hyperbolic(self) -> bool:
+        return self.eccentricity >= 1
+
+    @property
+    def mean_motion(self) -> float:
+        """The mean motion, in radians per second."""
+        return np.sqrt(self.gravitational_parameter / abs(self.semi_major_axis) ** 3)
+
+    @property
+    def period(self) -> float:
+        """The orbital period, in seconds. Infinite for hyperbolic orbits."""
+        if self.is_hyperbolic:
+            return np.inf
+        return 2 * np.pi / self.mean_motion
+
+    @property
+    def periapsis(self) -> float:
+        """The periapsis radius, in meters."""
+        return self.semi_major_axis * (1 - self.eccentricity)
+
+    @property
+    def semi_latus_rectum(self) -> float:
+        return self.semi_major_axis * (1 - self.eccentricity**2)
+
+
+def solve_kepler(
+    mean_anomaly: np.ndarray,
+    eccentricity: float,
+    tolerance: float = 1e-12,
+    max_iterations: int = 50,
+) -> np.ndarray:
+    """Solve Kepler's equation for every mean anomaly at once using Newton's method.
+
+    Returns the eccentric anomaly E for elliptic orbits (M = E - e sin E) or the
+    hyperbolic anomaly H for hyperbolic orbits (M = e sinh H - H).
+    """
+    mean_anomaly = np.asarray(mean_anomaly, dtype=float)
+    e = eccentricity
+
+    if e < 1:
+        # wrap to [-pi, pi] so the starting guess is always close to the root
+        mean_anomaly = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+        anomaly = np.where(e < 0.8, mean_anomaly + e * np.sin(mean_anomaly), np.pi)
+        anomaly = np.where(mean_anomaly < 0, -np.abs(anomaly), anomaly)
+        for _ in range(max_iterations):
+            step = (anomaly - e * np.sin(anomaly) - mean_anomaly) / (
+                1 - e * np.cos(anomaly)
+            )
+            anomaly = anomaly - step
+            if np.all(np.abs(step) < tolerance):
+                break
+    else:
+        anomaly = np.sign(mean_anomaly) * np.log(2 * np.abs(mean_anomaly) / e + 1.8)
+        for _ in range(max_iterations):
+            step = (e * np.sinh(anomaly) - anomaly - mean_anomaly) / (
+                e * np.cosh(anomaly) - 1
+            )
+            anomaly = anomaly - step
+            if np.all(np.abs(step) < tolerance):
+                break
+
+    return anomaly
+
+
+def mean_anomaly_at(elements: OrbitalElements, ut: np.ndarray) -> np.ndarray:
+    """The mean anomaly at the given universal times, in radians."""
+    return elements.mean_anomaly_at_epoch + elements.mean_motion * (
+        np.asarray(ut, dtype=float) - elements.epoch
+    )
+
+
+def true_anomaly_at(elements: OrbitalElements, ut: np.ndarray) -> np.ndarray:
+    """The true anomaly at the given universal times, in radians."""
+    e = elements.eccentricity
+    anomaly = solve_kepler(mean_anomaly_at(elements, ut), e)
+
+    if e < 1:
+        return 2 * np.arctan2(
+            np.sqrt(1 + e) * np.sin(anomaly / 2), np.sqrt(1 - e) * np.cos(anomaly / 2)
+        )
+    return 2 * np.arctan(np.sqrt((e + 1) / (e - 1)) * np.tanh(anomaly / 2))
+
+
+def radius_from_true_anomaly(
+    elements: OrbitalElements, true_anomaly: np.ndarray
+) -> np.ndarray:
+    """The orbital radius at the given true anomalies, in meters."""
+    return elements.semi_latus_rectum / (
+        1 + elements.eccentricity * np.cos(true_anomaly)
+    )
+
+
+def propagate(elements: OrbitalElements, ut: np.ndarray) -> dict[str, np.ndarray]:
+    """Evaluate the orbit at every given universal time in one vectorized pass.
+
+    Returns the radius and altitude in meters, the true anomaly in radians and the
+    position in meters as an (N, 3) array. Positions are expressed in a right-handed,
+    body-centred inertial frame whose x axis points along the reference direction and
+    whose z axis is normal to the reference plane.
+    """
+    true_anomaly = true_anomaly_at(elements, ut)
+    radius = radius_from_true_anomaly(elements, true_anomaly)
+
+    # rotate from the perifocal frame to the inertial frame
+    argument_of_latitude = elements.argument_of_periapsis + true_anomaly
+    cos_lan = np.cos(elements.longitude_of_ascending_node)
+    sin_lan = np.sin(elements.longitude_of_ascending_node)
+    cos_inc = np.cos(elements.inclination)
+    sin_inc = np.sin(elements.inclination)
+    cos_u = np.cos(argument_of_latitude)
+    sin_u = np.sin(argument_of_latitude)
+
+    position = np.column_stack(
+        [
+            radius * (cos_lan * cos_u - sin_lan * sin_u * cos_inc),
+            radius * (sin_lan * cos_u + cos_lan * sin_u * cos_inc),
+            radius * (sin_u * sin_inc),
+        ]
+    )
+
+    return {
+        "radius": radius,
+        "altitude": radius - elements.body_radius,
+        "true_anomaly": true_anomaly,
+        "position": position,
+    }
+
+
+def from_krpc_vector(vector) -> np.ndarray:
+    """Convert a vector in a kRPC body-centred frame, whose y axis points to the north
+    pole, to the right-handed frame of propagate, whose z axis does."""
+    x, y, z = vector
+    return np.array([x, z, y], dtype=float)
+
+
+def in_shadow(
+    position: np.ndarray, sun_direction: np.ndarray, body_radius: float
+) -> np.ndarray:
+    """Whether each (N, 3) position is in the body's shadow.
+
+    Uses a cylindrical shadow: the body blocks the sunlight of every point behind it,
+    relative to the sun, that is within one body radius of the sun line. Penumbra and
+    the divergence of the umbra are negligible at orbital distances.
+    """
+    sun_direction = np.asarray(sun_direction, dtype=float)
+    sun_direction = sun_direction / np.linalg.norm(sun_direction)
+    along = position @ sun_direction
+    across = position - along[:, np.newaxis] * sun_direction
+    return (along < 0) & (np.einsum("ij,ij->i", across, across) < body_radius**2)
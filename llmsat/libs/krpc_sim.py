@@ -0,0 +1,835 @@
+"""Simulated kRPC backend.
+
+An in-process stand-in for the object returned by krpc.connect(), covering the parts of
+the SpaceCenter, MechJeb and Kerbal Alarm Clock services the components use. The vessel
+flies an analytic Keplerian orbit and universal time advances with the wall clock, so
+components, tests and benchmarks run headless without KSP.
+
+Every property read or method call on a simulated object counts as one remote procedure
+call and sleeps for the configured latency, so RPC budgets measured against the
+simulator carry over to a real game.
+
+Example:
+    connection = SimConnection(latency=0.001)
+    spacecraft_manager = SpacecraftManager(connection)
+"""
+
+import functools
+import itertools
+import math
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import krpc
+import numpy as np
+
+from llmsat.libs import kepler, utils
+
+START_UT = 2956003200.0  # 2044-09-02 00:00:00, see utils.epoch
+ENCELADUS = dict(
+    name="Enceladus", equatorial_radius=252100.0, gravitational_parameter=7.211e9
+)
+SUN = dict(name="Sun", equatorial_radius=6.957e8, gravitational_parameter=1.327e20)
+SUN_POSITION = (1.4e12, 0.0, 0.0)  # m from Enceladus, in kRPC's (x, north, z) axes
+STREAM_UPDATE_INTERVAL = 0.01  # s
+
+# Part attributes that return a module object when the part has that module
+PART_MODULES = (
+    "antenna",
+    "cargo_bay",
+    "control_surface",
+    "decoupler",
+    "docking_port",
+    "engine",
+    "experiment",
+    "experiments",
+    "fairing",
+    "intake",
+    "leg",
+    "launch_clamp",
+    "light",
+    "parachute",
+    "radiator",
+    "resource_drain",
+    "rcs",
+    "reaction_wheel",
+    "resource_converter",
+    "resource_harvester",
+    "robotic_controller",
+    "robotic_hinge",
+    "robotic_piston",
+    "robotic_rotation",
+    "robotic_rotor",
+    "sensor",
+    "solar_panel",
+    "wheel",
+)
+
+
+def rpc(func):
+    """Mark a method or property getter of a simulated object as a remote call."""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self._client._call()
+        return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SimRPCConnection:
+    """Stands in for the kRPC RPC socket. Each message sent is one round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, message):
+        with self._lock:
+            self.count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class SimObject:
+    """Base class for simulated remote objects.
+
+    Plain fields are served from a dictionary; each read is one remote call.
+    """
+
+    def __init__(self, client: "SimConnection", **fields):
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_fields", fields)
+
+    def __getattr__(self, name):
+        fields = object.__getattribute__(self, "_fields")
+        if name not in fields:
+            raise AttributeError(f"'{type(self).__name__}' has no attribute '{name}'")
+        self._client._call()
+        return fields[name]
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(self._fields))
+
+    def __setattr__(self, name, value):
+        if name in self._fields:
+            self._client._call()
+            self._fields[name] = value
+        else:
+            object.__setattr__(self, name, value)
+
+
+class SimStream:
+    """Stands in for krpc.stream.Stream. Pushes a new value only when it changes."""
+
+    def __init__(self, client: "SimConnection", func: Callable, args: tuple):
+        self._client = client
+        self._func = func
+        self._args = args
+        self.rate = 0.0
+        self.value: Any = None
+        self.started = False
+        self._last_update = 0.0
+        self._callbacks: List[Callable[[Any], None]] = []
+        self.condition = threading.Condition()
+
+    def start(self, wait: bool = True):
+        if self.started:
+            return
+        self.started = True
+        self.update(force=True)
+
+    def __call__(self):
+        if not self.started:
+            self.start()
+        return self.value
+
+    def add_callback(self, callback: Callable[[Any], None]):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Any], None]):
+        self._callbacks.remove(callback)
+
+    def remove(self):
+        self._client._remove_stream(self)
+
+    def update(self, force: bool = False):
+        """Re-evaluate the streamed call and notify callbacks if its value changed."""
+        now = time.monotonic()
+        if not force and self.rate and now - self._last_update < 1 / self.rate:
+            return
+        self._last_update = now
+
+        value = self._client._evaluate(self._func, *self._args)
+        if not force and value == self.value:
+            return
+        self.value = value
+        with self.condition:
+            self.condition.notify_all()
+        for callback in list(self._callbacks):
+            callback(value)
+
+
+class SimBody(SimObject):
+    """A celestial body fixed in space, e.g. at its position relative to another."""
+
+    def __init__(
+        self,
+        client,
+        name,
+        equatorial_radius,
+        gravitational_parameter,
+        parent: Optional["SimBody"] = None,
+        position=(0.0, 0.0, 0.0),
+    ):
+        super().__init__(
+            client,
+            name=name,
+            equatorial_radius=equatorial_radius,
+            gravitational_parameter=gravitational_parameter,
+            orbit=None if parent is None else SimObject(client, body=parent),
+        )
+        object.__setattr__(self, "_position", np.asarray(position, dtype=float))
+        object.__setattr__(self, "_frame", SimObject(client, body=self))
+
+    @property
+    @rpc
+    def non_rotating_reference_frame(self) -> SimObject:
+        return self._frame
+
+    @rpc
+    def position(self, reference_frame: SimObject) -> tuple:
+        origin = reference_frame._fields["body"]._position
+        return tuple(float(x) for x in self._position - origin)
+
+
+class SimOrbit(SimObject):
+    """A Keplerian orbit evaluated analytically at the current universal time."""
+
+    def __init__(self, client, body: SimBody, elements: kepler.OrbitalElements):
+        super().__init__(client)
+        object.__setattr__(self, "_body", body)
+        object.__setattr__(self, "elements", elements)
+
+    @classmethod
+    def from_apsides(
+        cls,
+        client,
+        body: SimBody,
+        periapsis_altitude: float,
+        apoapsis_altitude: float,
+        inclination: float = 0.0,
+        epoch: float = START_UT,
+        mean_anomaly_at_epoch: float = 0.0,
+    ) -> "SimOrbit":
+        radius = body._fields["equatorial_radius"]
+        periapsis = radius + periapsis_altitude
+        apoapsis = radius + apoapsis_altitude
+        elements = kepler.OrbitalElements(
+            body=body._fields["name"],
+            body_radius=radius,
+            gravitational_parameter=body._fields["gravitational_parameter"],
+            semi_major_axis=(periapsis + apoapsis) / 2,
+            eccentricity=(apoapsis - periapsis) / (apoapsis + periapsis),
+            inclination=inclination,
+            longitude_of_ascending_node=0.0,
+            argument_of_periapsis=0.0,
+            mean_anomaly_at_epoch=mean_anomaly_at_epoch,
+            epoch=epoch,
+        )
+        return cls(client, body, elements)
+
+    def _radius(self, ut: float) -> float:
+        return float(kepler.propagate(self.elements, np.array([ut]))["radius"][0])
+
+    def _time_to_mean_anomaly(self, target: float) -> float:
+        mean_anomaly = kepler.mean_anomaly_at(self.elements, self._client._ut())
+        return ((target - mean_anomaly) % (2 * math.pi)) / self.elements.mean_motion
+
+    @property
+    @rpc
+    def body(self) -> SimBody:
+        return self._body
+
+    @property
+    @rpc
+    def radius(self) -> float:
+        return self._radius(self._client._ut())
+
+    @rpc
+    def radius_at(self, ut: float) -> float:
+        return self._radius(ut)
+
+    @property
+    @rpc
+    def apoapsis_altitude(self) -> float:
+        if self.elements.is_hyperbolic:
+            return math.inf
+        apoapsis = self.elements.semi_major_axis * (1 + self.elements.eccentricity)
+        return apoapsis - self.elements.body_radius
+
+    @property
+    @rpc
+    def periapsis_altitude(self) -> float:
+        return self.elements.periapsis - self.elements.body_radius
+
+    @property
+    @rpc
+    def period(self) -> float:
+        return self.elements.period
+
+    @property
+    @rpc
+    def time_to_apoapsis(self) -> float:
+        return self._time_to_mean_anomaly(math.pi)
+
+    @property
+    @rpc
+    def time_to_periapsis(self) -> float:
+        return self._time_to_mean_anomaly(0.0)
+
+    def _speed(self, ut: float) -> float:
+        mu = self.elements.gravitational_parameter
+        return math.sqrt(
+            mu * (2 / self._radius(ut) - 1 / self.elements.semi_major_axis)
+        )
+
+    @property
+    @rpc
+    def orbital_speed(self) -> float:
+        return self._speed(self._client._ut())
+
+    @property
+    @rpc
+    def time_to_soi_change(self) -> float:
+        return math.nan
+
+    @property
+    @rpc
+    def next_orbit(self) -> Optional["SimOrbit"]:
+        return None
+
+    def __getattr__(self, name):
+        elements = object.__getattribute__(self, "elements")
+        if name in kepler.OrbitalElements.model_fields and name not in (
+            "body",
+            "body_radius",
+            "gravitational_parameter",
+        ):
+            self._client._call()
+            return getattr(elements, name)
+        return super().__getattr__(name)
+
+
+class SimPart(SimObject):
+    def __init__(
+        self,
+        client,
+        name: str,
+        title: str,
+        mass: float,
+        modules: tuple = (),
+        axially_attached: bool = True,
+        max_temperature: float = 2000.0,
+    ):
+        super().__init__(
+            client,
+            tag="",
+            name=name,
+            title=title,
+            mass=mass,
+            temperature=290.0,
+            max_temperature=max_temperature,
+            axially_attached=axially_attached,
+            parent=None,
+            children=[],
+            **{
+                module: (SimpleNamespace() if module in modules else None)
+                for module in PART_MODULES
+            },
+        )
+        object.__setattr__(self, "_heating", (client._ut(), 0.0))  # (since, K/s)
+
+    @property
+    @rpc
+    def temperature(self) -> float:
+        since, rate = self._heating
+        return self._fields["temperature"] + rate * (self._client._ut() - since)
+
+    def set_heating(self, rate: float):
+        """Heat the part at rate Kelvin per second of game time, or cool it if negative."""
+        self._fields["temperature"] = self._client._quiet(lambda: self.temperature)
+        object.__setattr__(self, "_heating", (self._client._ut(), rate))
+
+    def add_child(self, part: "SimPart") -> "SimPart":
+        self._fields["children"].append(part)
+        part._fields["parent"] = self
+        return part
+
+
+class SimExperiment(SimObject):
+    def __init__(self, client, title: str, part: SimPart):
+        super().__init__(
+            client,
+            title=title,
+            part=part,
+            deployed=False,
+            rerunnable=True,
+            inoperable=False,
+            has_data=False,
+            available=True,
+            data=[],
+            science_subject=SimpleNamespace(title=title),
+        )
+
+    @rpc
+    def run(self):
+        self._fields["has_data"] = True
+        self._fields["data"] = [SimpleNamespace(data_amount=8.0, science_value=1.0)]
+
+
+class SimParts(SimObject):
+    def __init__(self, client, root: SimPart, experiments: List[SimExperiment]):
+        super().__init__(client, root=root, experiments=experiments)
+
+    @property
+    @rpc
+    def all(self) -> List[SimPart]:
+        parts = []
+        stack = [self._fields["root"]]
+        while stack:
+            part = stack.pop()
+            parts.append(part)
+            stack.extend(reversed(part._fields["children"]))
+        return parts
+
+    @rpc
+    def with_name(self, name: str) -> List[SimPart]:
+        return [
+            part
+            for part in self._client._quiet(lambda: self.all)
+            if part._fields["name"] == name
+        ]
+
+
+class SimResources(SimObject):
+    """Vessel resources that change linearly with time at a configurable rate."""
+
+    def __init__(self, client, amounts: Dict[str, float], maxima: Dict[str, float]):
+        super().__init__(client, names=list(amounts))
+        object.__setattr__(self, "_amounts", dict(amounts))
+        object.__setattr__(self, "_maxima", dict(maxima))
+        object.__setattr__(self, "rates", {name: 0.0 for name in amounts})
+        object.__setattr__(self, "_since", client._ut())
+
+    def _amount(self, name: str) -> float:
+        elapsed = self._client._ut() - self._since
+        amount = self._amounts[name] + self.rates[name] * elapsed
+        return min(max(amount, 0.0), self._maxima[name])
+
+    def set_rate(self, name: str, rate: float):
+        """Set the rate of change of a resource, in units per second."""
+        for resource in self._amounts:
+            self._amounts[resource] = self._amount(resource)
+        object.__setattr__(self, "_since", self._client._ut())
+        self.rates[name] = rate
+
+    @rpc
+    def amount(self, name: str) -> float:
+        return self._amount(name)
+
+    @rpc
+    def max(self, name: str) -> float:
+        return self._maxima[name]
+
+
+class SimNode(SimObject):
+    def __init__(self, client, ut: float, delta_v: float, orbit: SimOrbit):
+        super().__init__(
+            client,
+            prograde=delta_v,
+            normal=0.0,
+            radial=0.0,
+            delta_v=abs(delta_v),
+            remaining_delta_v=abs(delta_v),
+            ut=ut,
+            orbit=orbit,
+        )
+
+    @property
+    @rpc
+    def time_to(self) -> float:
+        return self._fields["ut"] - self._client._ut()
+
+
+class SimControl(SimObject):
+    def __init__(self, client):
+        super().__init__(client, nodes=[], solar_panels=True, current_stage=1)
+
+    @rpc
+    def remove_nodes(self):
+        self._fields["nodes"].clear()
+
+    @rpc
+    def activate_next_stage(self) -> list:
+        self._fields["current_stage"] = max(self._fields["current_stage"] - 1, 0)
+        return []
+
+
+class SimVessel(SimObject):
+    def __init__(self, client, orbit: SimOrbit, part_count: int = 12):
+        root = SimPart(client, "HECS2.ProbeCore", "Probe Core", 100.0)
+        parts = [root]
+        experiment_part = SimPart(
+            client, "sensorThermometer", "Thermometer", 5.0, modules=("experiment",)
+        )
+        parts.append(root.add_child(experiment_part))
+        templates = [
+            ("batteryBank", "Battery Bank", 50.0, ()),
+            ("RelayAntenna100", "Relay Antenna", 60.0, ("antenna",)),
+            ("largeSolarPanel", "Solar Panel", 30.0, ("solar_panel",)),
+            ("advSasModule", "Reaction Wheel", 40.0, ("reaction_wheel",)),
+            ("liquidEngine", "Engine", 500.0, ("engine",)),
+            ("fuelTank", "Fuel Tank", 250.0, ()),
+        ]
+        # a deterministic tree: each new part hangs off an earlier one
+        for i in range(max(part_count - len(parts), 0)):
+            name, title, mass, modules = templates[i % len(templates)]
+            parent = parts[i // 3]
+            parts.append(
+                parent.add_child(
+                    SimPart(
+                        client,
+                        name,
+                        title,
+                        mass,
+                        modules=modules,
+                        axially_attached=i % 2 == 0,
+                    )
+                )
+            )
+
+        experiments = [SimExperiment(client, "Temperature Scan", experiment_part)]
+        mass = sum(part._fields["mass"] for part in parts)
+        super().__init__(
+            client,
+            name="LLMSat-1",
+            situation=SimpleNamespace(name="orbiting"),
+            mass=mass,
+            dry_mass=mass * 0.6,
+            available_thrust=20000.0,
+            specific_impulse=320.0,
+            moment_of_inertia=(1000.0, 1000.0, 800.0),
+            parts=SimParts(client, root, experiments),
+            resources=SimResources(
+                client,
+                amounts={"ElectricCharge": 800.0, "LiquidFuel": 400.0},
+                maxima={"ElectricCharge": 1000.0, "LiquidFuel": 400.0},
+            ),
+            control=SimControl(client),
+        )
+        object.__setattr__(self, "_orbit", orbit)
+        object.__setattr__(self, "_launch_ut", client._ut())
+        object.__setattr__(self, "_thrust", 0.0)
+
+    @property
+    @rpc
+    def orbit(self) -> SimOrbit:
+        return self._orbit
+
+    @property
+    @rpc
+    def met(self) -> float:
+        return self._client._ut() - self._launch_ut
+
+    @property
+    @rpc
+    def thrust(self) -> float:
+        return self._thrust
+
+
+class SimSpaceCenter(SimObject):
+    def __init__(self, client, part_count: int):
+        super().__init__(client)
+        sun = SimBody(client, **SUN, position=SUN_POSITION)
+        body = SimBody(client, **ENCELADUS, parent=sun)
+        orbit = SimOrbit.from_apsides(client, body, 100000.0, 150000.0)
+        object.__setattr__(self, "bodies", {b._fields["name"]: b for b in (body, sun)})
+        object.__setattr__(
+            self, "_active_vessel", SimVessel(client, orbit, part_count=part_count)
+        )
+
+    @property
+    @rpc
+    def active_vessel(self) -> SimVessel:
+        return self._active_vessel
+
+    @property
+    @rpc
+    def ut(self) -> float:
+        return self._client._ut()
+
+    @rpc
+    def load(self, name: str):
+        pass
+
+    @rpc
+    def warp_to(self, ut: float):
+        self._client.advance(max(ut - self._client._ut(), 0.0))
+
+
+class SimAlarm(SimObject):
+    def __init__(self, client, clock: "SimAlarmClock", id: str, name: str, ut: float):
+        super().__init__(
+            client, id=id, name=name, notes="", time=ut, action=None, vessel=None
+        )
+        object.__setattr__(self, "_clock", clock)
+
+    @rpc
+    def remove(self):
+        self._clock._alarms.remove(self)
+
+
+class SimAlarmClock(SimObject):
+    AlarmType = SimpleNamespace(raw="raw", apoapsis="apoapsis", periapsis="periapsis")
+    AlarmAction = SimpleNamespace(kill_warp="kill_warp", message_only="message_only")
+
+    def __init__(self, client):
+        super().__init__(client)
+        object.__setattr__(self, "_alarms", [])
+        object.__setattr__(self, "_ids", itertools.count(1))
+
+    @property
+    @rpc
+    def alarms(self) -> List[SimAlarm]:
+        return list(self._alarms)
+
+    @rpc
+    def create_alarm(self, type, name: str, ut: float) -> SimAlarm:
+        alarm = SimAlarm(self._client, self, f"{next(self._ids):08x}", name, ut)
+        self._alarms.append(alarm)
+        return alarm
+
+
+class SimManeuverOperation(SimObject):
+    """A MechJeb maneuver planner operation that changes one orbital parameter."""
+
+    def __init__(self, client, vessel: SimVessel, parameter: Optional[str]):
+        fields = {"error_message": ""}
+        if parameter is not None:
+            fields[parameter] = 0.0
+        super().__init__(client, **fields)
+        object.__setattr__(self, "_vessel", vessel)
+        object.__setattr__(self, "_parameter", parameter)
+
+    @rpc
+    def make_nodes(self) -> List[SimNode]:
+        orbit = self._vessel._orbit
+        elements = orbit.elements
+        radius = elements.body_radius
+        periapsis = elements.periapsis
+        apoapsis = elements.semi_major_axis * (1 + elements.eccentricity)
+        inclination = elements.inclination
+
+        if self._parameter == "new_apoapsis":
+            apoapsis = radius + self._fields["new_apoapsis"]
+        elif self._parameter == "new_periapsis":
+            periapsis = radius + self._fields["new_periapsis"]
+        elif self._parameter == "new_inclination":
+            inclination = math.radians(self._fields["new_inclination"])
+        else:
+            periapsis = apoapsis
+
+        if periapsis < radius:
+            raise ValueError("Operation failed: periapsis below the surface\nTrace")
+        periapsis, apoapsis = sorted([periapsis, apoapsis])
+
+        # raise or lower the apoapsis from periapsis, everything else from apoapsis
+        if self._parameter == "new_apoapsis":
+            time_to_burn, mean_anomaly = orbit._time_to_mean_anomaly(0.0), 0.0
+        else:
+            time_to_burn, mean_anomaly = orbit._time_to_mean_anomaly(math.pi), math.pi
+        ut = self._client._ut() + time_to_burn
+        new_orbit = SimOrbit.from_apsides(
+            self._client,
+            orbit._body,
+            periapsis - radius,
+            apoapsis - radius,
+            inclination=inclination,
+            epoch=ut,
+            mean_anomaly_at_epoch=mean_anomaly,
+        )
+        delta_v = new_orbit._speed(ut) - orbit._speed(ut)
+        node = SimNode(self._client, ut, delta_v, new_orbit)
+        self._vessel._fields["control"]._fields["nodes"].append(node)
+
+        return [node]
+
+
+class SimNodeExecutor(SimObject):
+    """Executes maneuver nodes by swapping in each node's orbit after a short burn."""
+
+    def __init__(self, client, vessel: SimVessel, burn_time: float):
+        super().__init__(client, autowarp=False, enabled=False)
+        object.__setattr__(self, "_vessel", vessel)
+        object.__setattr__(self, "_burn_time", burn_time)
+
+    @rpc
+    def execute_all_nodes(self):
+        self._fields["enabled"] = True
+        threading.Thread(target=self._execute, daemon=True).start()
+
+    def _execute(self):
+        vessel = self._vessel
+        nodes = vessel._fields["control"]._fields["nodes"]
+        while nodes:
+            node = nodes[0]
+            object.__setattr__(vessel, "_thrust", vessel._fields["available_thrust"])
+            time.sleep(self._burn_time)
+            object.__setattr__(vessel, "_orbit", node._fields["orbit"])
+            object.__setattr__(vessel, "_thrust", 0.0)
+            nodes.pop(0)
+        self._fields["enabled"] = False
+
+
+class SimMechJeb(SimObject):
+    def __init__(self, client, vessel: SimVessel, burn_time: float):
+        super().__init__(
+            client,
+            maneuver_planner=SimpleNamespace(
+                operation_apoapsis=SimManeuverOperation(client, vessel, "new_apoapsis"),
+                operation_periapsis=SimManeuverOperation(
+                    client, vessel, "new_periapsis"
+                ),
+                operation_inclination=SimManeuverOperation(
+                    client, vessel, "new_inclination"
+                ),
+                operation_circularize=SimManeuverOperation(client, vessel, None),
+            ),
+            node_executor=SimNodeExecutor(client, vessel, burn_time),
+        )
+
+
+class SimConnection:
+    """Simulated kRPC connection.
+
+    Args:
+        latency: seconds each remote call blocks for, to mimic a loaded game
+        warp: simulated seconds per wall-clock second
+        part_count: number of parts on the active vessel
+        burn_time: wall-clock seconds the node executor takes per maneuver
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        warp: float = 1.0,
+        part_count: int = 12,
+        burn_time: float = 0.1,
+    ):
+        self._rpc_connection = SimRPCConnection(latency)
+        self._local = threading.local()
+        self._clock_lock = threading.Lock()
+        self._warp = warp
+        self._ut_offset = START_UT
+        self._clock_start = time.monotonic()
+
+        self._streams: List[SimStream] = []
+        self._streams_lock = threading.Lock()
+        self._stream_thread = None
+        self._closed = threading.Event()
+
+        self.space_center = SimSpaceCenter(self, part_count)
+        vessel = self.space_center._active_vessel
+        self.kerbal_alarm_clock = SimAlarmClock(self)
+        self.mech_jeb = SimMechJeb(self, vessel, burn_time)
+
+    @property
+    def rpc_count(self) -> int:
+        """Total number of remote calls made so far."""
+        return self._rpc_connection.count
+
+    def advance(self, seconds: float):
+        """Move universal time forward, e.g. to reach an alarm in a test."""
+        with self._clock_lock:
+            self._ut_offset += seconds
+
+    def add_stream(self, func: Callable, *args) -> SimStream:
+        self._call()
+        stream = SimStream(self, func, args)
+        with self._streams_lock:
+            self._streams.append(stream)
+            if self._stream_thread is None:
+                self._stream_thread = threading.Thread(
+                    name="sim-stream-update", target=self._update_streams, daemon=True
+                )
+                self._stream_thread.start()
+        return stream
+
+    def batch(self):
+        """Context manager under which all reads count as one remote call, like a
+        kRPC request carrying several procedure calls."""
+        return _SimBatch(self)
+
+    def close(self):
+        self._closed.set()
+
+    def _ut(self) -> float:
+        with self._clock_lock:
+            return self._ut_offset + (time.monotonic() - self._clock_start) * self._warp
+
+    def _call(self):
+        if getattr(self._local, "quiet", False):
+            return
+        self._rpc_connection.send_message(None)
+
+    def _quiet(self, func: Callable):
+        """Evaluate func without counting the remote calls it makes."""
+        previous = getattr(self._local, "quiet", False)
+        self._local.quiet = True
+        try:
+            return func()
+        finally:
+            self._local.quiet = previous
+
+    def _evaluate(self, func: Callable, *args):
+        return self._quiet(lambda: func(*args))
+
+    def _remove_stream(self, stream: SimStream):
+        with self._streams_lock:
+            self._streams.remove(stream)
+
+    def _update_streams(self):
+        while not self._closed.wait(STREAM_UPDATE_INTERVAL):
+            with self._streams_lock:
+                streams = [stream for stream in self._streams if stream.started]
+            for stream in streams:
+                stream.update()
+
+
+class _SimBatch:
+    def __init__(self, client: SimConnection):
+        self._client = client
+
+    def __enter__(self):
+        self._client._call()
+        self._previous = getattr(self._client._local, "quiet", False)
+        self._client._local.quiet = True
+        return self
+
+    def __exit__(self, *_):
+        self._client._local.quiet = self._previous
+
+
+def connect(name: str, simulate: bool = False, latency: float = 0.0):
+    """Connect to KSP, or start a simulated connection when simulate is set."""
+    if simulate:
+        return SimConnection(latency=latency)
+
+    if not utils.is_ksp_running():
+        raise Exception("Please make sure KSP is running")
+
+    return krpc.connect(name=name)
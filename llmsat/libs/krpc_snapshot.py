@@ -0,0 +1,159 @@
+"""Batched kRPC reads.
+
+kRPC requests can carry any number of procedure calls, which the server executes in a
+single frame. Reading every attribute an object needs in one request replaces a chain of
+blocking round trips with one.
+"""
+
+import contextlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import krpc.schema.KRPC_pb2 as KRPC
+from krpc.decoder import Decoder
+from krpc.types import ClassBase
+
+ORBIT_FIELDS = (
+    "radius",
+    "apoapsis_altitude",
+    "periapsis_altitude",
+    "period",
+    "time_to_apoapsis",
+    "time_to_periapsis",
+    "inclination",
+    "longitude_of_ascending_node",
+    "argument_of_periapsis",
+    "epoch",
+    "semi_major_axis",
+    "eccentricity",
+    "mean_anomaly_at_epoch",
+    "orbital_speed",
+    "time_to_soi_change",
+)
+BODY_FIELDS = ("name", "equatorial_radius", "gravitational_parameter")
+
+# celestial bodies never change during a session, so their properties are read once
+_body_cache: Dict[Tuple[int, int], Dict[str, Any]] = {}
+_star_cache: Dict[Tuple[int, int], Any] = {}
+_body_cache_lock = threading.Lock()
+
+
+def fetch(reads: Iterable[Tuple[Any, str]]) -> List[Any]:
+    """Read a list of (object, attribute) pairs, batching remote objects into one request.
+
+    Objects that are not kRPC remote objects are read with a plain getattr, so the same
+    code path works against local stand-ins. Stand-ins whose client offers a batch()
+    context manager, such as krpc_sim objects, are read inside it.
+    """
+    reads = list(reads)
+    values: List[Any] = [None] * len(reads)
+
+    batched = []
+    local = []
+    for i, (obj, name) in enumerate(reads):
+        if isinstance(obj, ClassBase):
+            batched.append((i, obj, name))
+        else:
+            local.append((i, obj, name))
+
+    if local:
+        local_client = getattr(local[0][1], "_client", None)
+        batch = getattr(local_client, "batch", contextlib.nullcontext)
+        with batch():
+            for i, obj, name in local:
+                values[i] = getattr(obj, name)
+
+    if not batched:
+        return values
+
+    client = batched[0][1]._client
+    request = KRPC.Request()
+    return_types = []
+    for _, obj, name in batched:
+        request.calls.extend([client.get_call(getattr, obj, name)])
+        return_types.append(client._get_return_type(getattr, obj, name))
+
+    with client._rpc_connection_lock:
+        client._rpc_connection.send_message(request)
+        response = client._rpc_connection.receive_message(KRPC.Response)
+
+    if response.HasField("error"):
+        raise client._build_error(response.error)
+
+    for (i, _, _), result, return_type in zip(batched, response.results, return_types):
+        if result.HasField("error"):
+            raise client._build_error(result.error)
+        values[i] = Decoder.decode(client, result.value, return_type)
+
+    return values
+
+
+def fetch_attributes(obj, names: Iterable[str]) -> Dict[str, Any]:
+    """Read several attributes of one object in a single request."""
+    names = list(names)
+    return dict(zip(names, fetch((obj, name) for name in names)))
+
+
+def snapshot_body(body_obj) -> Dict[str, Any]:
+    """The static properties of a celestial body, cached per session."""
+    if not isinstance(body_obj, ClassBase):
+        return fetch_attributes(body_obj, BODY_FIELDS)
+
+    key = (id(body_obj._client), body_obj._object_id)
+    with _body_cache_lock:
+        cached = _body_cache.get(key)
+    if cached is None:
+        cached = fetch_attributes(body_obj, BODY_FIELDS)
+        with _body_cache_lock:
+            _body_cache[key] = cached
+
+    return dict(cached)
+
+
+def find_star(body_obj):
+    """The star at the root of a body's system, the body that orbits nothing. Cached
+    per session."""
+    key = None
+    if isinstance(body_obj, ClassBase):
+        key = (id(body_obj._client), body_obj._object_id)
+        with _body_cache_lock:
+            star = _star_cache.get(key)
+        if star is not None:
+            return star
+
+    star = body_obj
+    while (orbit := star.orbit) is not None:
+        star = orbit.body
+
+    if key is not None:
+        with _body_cache_lock:
+            _star_cache[key] = star
+    return star
+
+
+def body_position(target_obj, body_obj) -> Tuple[float, float, float]:
+    """The position of a target body relative to a body, in meters, in the body's
+    non-rotating reference frame."""
+    return target_obj.position(body_obj.non_rotating_reference_frame)
+
+
+def sun_position(body_obj) -> Tuple[float, float, float]:
+    """The position of the star relative to a body, in meters, in the body's
+    non-rotating reference frame."""
+    return body_position(find_star(body_obj), body_obj)
+
+
+def snapshot_orbit(orbit_obj) -> Optional[Dict[str, Any]]:
+    """Read every field of an orbit in one request, following next_orbit.
+
+    Returns a plain dictionary with the body properties under "body" and the snapshot of
+    the orbit after the next sphere of influence change under "next_orbit".
+    """
+    if orbit_obj is None:
+        return None
+
+    values = fetch_attributes(orbit_obj, ORBIT_FIELDS + ("body", "next_orbit"))
+    values["body"] = snapshot_body(values["body"])
+    values["next_orbit"] = snapshot_orbit(values["next_orbit"])
+
+    return values
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from llmsat.libs import utils
+from llmsat.libs import krpc_snapshot, utils
 import math
 
 
@@ -71,36 +71,43 @@ class Orbit(BaseModel):
     )
 
     def __init__(self, orbit_obj):
+        """Build from a kRPC orbit, or from a snapshot produced by
+        krpc_snapshot.snapshot_orbit."""
+        if isinstance(orbit_obj, dict):
+            snapshot = orbit_obj
+        else:
+            snapshot = krpc_snapshot.snapshot_orbit(orbit_obj)
+
         next_orbit = None
-        if orbit_obj.next_orbit:
-            next_orbit = Orbit(orbit_obj.next_orbit)
+        if snapshot["next_orbit"]:
+            next_orbit = Orbit(snapshot["next_orbit"])
 
         super().__init__(
-            body=orbit_obj.body.name,
-            # apoapsis=orbit_obj.apoapsis,
-            # periapsis=orbit_obj.periapsis,
-            # radius=orbit_obj.radius,
-            current_altitude=orbit_obj.radius - orbit_obj.body.equatorial_radius,
-            apoapsis_altitude=orbit_obj.apoapsis_altitude,
-            periapsis_altitude=orbit_obj.periapsis_altitude,
-            # semi_major_axis=orbit_obj.semi_major_axis,
-            # semi_minor_axis=orbit_obj.semi_minor_axis,
-            period=orbit_obj.period,
-            time_to_apoapsis=orbit_obj.time_to_apoapsis,
-            time_to_periapsis=orbit_obj.time_to_periapsis,
-            # eccentricity=orbit_obj.eccentricity,
-            inclination=math.degrees(orbit_obj.inclination),
+            body=snapshot["body"]["name"],
+            # apoapsis=snapshot["apoapsis"],
+            # periapsis=snapshot["periapsis"],
+            # radius=snapshot["radius"],
+            current_altitude=snapshot["radius"] - snapshot["body"]["equatorial_radius"],
+            apoapsis_altitude=snapshot["apoapsis_altitude"],
+            periapsis_altitude=snapshot["periapsis_altitude"],
+            # semi_major_axis=snapshot["semi_major_axis"],
+            # semi_minor_axis=snapshot["semi_minor_axis"],
+            period=snapshot["period"],
+            time_to_apoapsis=snapshot["time_to_apoapsis"],
+            time_to_periapsis=snapshot["time_to_periapsis"],
+            # eccentricity=snapshot["eccentricity"],
+            inclination=math.degrees(snapshot["inclination"]),
             longitude_of_ascending_node=math.degrees(
-                orbit_obj.longitude_of_ascending_node
+                snapshot["longitude_of_ascending_node"]
             ),
-            argument_of_periapsis=math.degrees(orbit_obj.argument_of_periapsis),
-            # mean_anomaly_at_epoch=orbit_obj.mean_anomaly_at_epoch,
-            epoch=orbit_obj.epoch,
-            # mean_anomaly=orbit_obj.mean_anomaly,
-            # eccentric_anomaly=orbit_obj.eccentric_anomaly,
-            # true_anomaly=orbit_obj.true_anomaly,
-            orbital_speed=orbit_obj.orbital_speed,
-            time_to_soi_change=orbit_obj.time_to_soi_change,
+            argument_of_periapsis=math.degrees(snapshot["argument_of_periapsis"]),
+            # mean_anomaly_at_epoch=snapshot["mean_anomaly_at_epoch"],
+            epoch=snapshot["epoch"],
+            # mean_anomaly=snapshot["mean_anomaly"],
+            # eccentric_anomaly=snapshot["eccentric_anomaly"],
+            # true_anomaly=snapshot["true_anomaly"],
+            orbital_speed=snapshot["orbital_speed"],
+            time_to_soi_change=snapshot["time_to_soi_change"],
             next_orbit=next_orbit,
         )
 
@@ -134,15 +141,28 @@ class Node(BaseModel):
     )
 
     def __init__(self, node_obj):
+        values = krpc_snapshot.fetch_attributes(
+            node_obj,
+            [
+                "prograde",
+                "normal",
+                "radial",
+                "delta_v",
+                "remaining_delta_v",
+                "ut",
+                "time_to",
+                "orbit",
+            ],
+        )
         super().__init__(
-            prograde=node_obj.prograde,
-            normal=node_obj.normal,
-            radial=node_obj.radial,
-            delta_v=node_obj.delta_v,
-            remaining_delta_v=node_obj.remaining_delta_v,
-            ut=utils.ksp_ut_to_datetime(node_obj.ut),
-            time_to=node_obj.time_to,
-            orbit=Orbit(node_obj.orbit),
+            prograde=values["prograde"],
+            normal=values["normal"],
+            radial=values["radial"],
+            delta_v=values["delta_v"],
+            remaining_delta_v=values["remaining_delta_v"],
+            ut=utils.ksp_ut_to_datetime(values["ut"]),
+            time_to=values["time_to"],
+            orbit=Orbit(values["orbit"]),
         )
 
 
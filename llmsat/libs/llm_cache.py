@@ -0,0 +1,164 @@
+"""LLM response cache and session replay"""
+
+import hashlib
+import itertools
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, Generation, LLMResult
+from pydantic import BaseModel
+
+from llmsat.libs.jsonl_log import JsonlLog
+
+LLM_CACHE_PATH = Path("disk/llm_cache.db")
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class LRUDiskCache(BaseCache):
+    """Content-addressed LLM response cache in SQLite, evicting the least recently used
+    responses beyond max_entries.
+
+    Responses are keyed by a hash of the prompt and the model's parameters, which
+    include its name and temperature, so an identical request is answered without
+    calling the model.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            generations TEXT NOT NULL,
+            last_used INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+    """
+
+    def __init__(
+        self, path: Path = LLM_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        (last_used,) = self._db.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM responses"
+        ).fetchone()
+        self._clock = itertools.count(last_used + 1)  # recency, ordered across runs
+
+    def __bool__(self) -> bool:
+        return True  # an empty cache is still a cache to langchain's `cache or ...`
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.key(prompt, llm_string)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT generations FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                (next(self._clock), key),
+            )
+            self.hits += 1
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        generations = json.dumps([dumps(generation) for generation in return_val])
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (self.key(prompt, llm_string), generations, next(self._clock)),
+            )
+            self._db.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def clear(self, **kwargs: Any):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+
+class RecordedResponse(BaseModel):
+    timestamp: datetime
+    text: str
+
+
+class SessionRecorder(BaseCallbackHandler):
+    """Records every response of the model it is attached to, for replay."""
+
+    def __init__(self, path: Path):
+        self.log = JsonlLog(path, RecordedResponse)
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        self.log.append(
+            RecordedResponse(
+                timestamp=datetime.now(), text=response.generations[0][0].text
+            )
+        )
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that gives the responses of a recorded session in order, without
+    calling a model."""
+
+    responses: List[str]
+    position: int = 0
+
+    @classmethod
+    def from_recording(cls, path: Path) -> "ReplayChatModel":
+        log = JsonlLog(path, RecordedResponse)
+        try:
+            records = log.read(newest_first=False)
+        finally:
+            log.close()
+        return cls(responses=[record.text for record in records])
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager: CallbackManagerForLLMRun = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.position >= len(self.responses):
+            raise ValueError(
+                f"Recorded session has no response {self.position + 1}, it has {len(self.responses)}"
+            )
+        text = self.responses[self.position]
+        self.position += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
@@ -0,0 +1,145 @@
+"""Scripted missions for driving the console without a language model"""
+
+import json
+import shlex
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# read-only commands that are cheap enough to repeat thousands of times
+DEFAULT_SCRIPT = [
+    "get_ut",
+    "get_met",
+    "get_spacecraft_properties",
+    "get_resources",
+    "get_orbit",
+    "read_tasks",
+    "get_alarms",
+    "get_experiments",
+    "check_autopilot_status",
+    "check_orbit_safety",
+]
+PERCENTILES = (50, 90, 99)
+
+
+def load_script(path: Path) -> List[str]:
+    """Console commands of a mission script, one per line. Blank lines and lines
+    starting with '#' are skipped."""
+    commands = []
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            commands.append(line)
+    return commands
+
+
+def command_name(command: str) -> str:
+    """The command of a console command line, without its arguments."""
+    return shlex.split(command)[0] if command.strip() else ""
+
+
+def format_action(action: str, action_input: Any, thought: str = None) -> str:
+    """An agent response taking an action, in the structured chat format."""
+    blob = json.dumps({"action": action, "action_input": action_input}, indent=2)
+    thought = f"Thought: {thought}\n" if thought else ""
+    return f"{thought}Action:\n```\n{blob}\n```"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that runs the commands of a mission script in order and then gives
+    its final answer, without calling a model.
+
+    After the final answer the script starts over, so each console session replays the
+    whole mission.
+    """
+
+    commands: List[str]
+    final_answer: str = "Mission script complete"
+    position: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager: CallbackManagerForLLMRun = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.position < len(self.commands):
+            text = format_action("run", self.commands[self.position])
+            self.position += 1
+        else:
+            text = format_action("Final Answer", self.final_answer)
+            self.position = 0
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class CommandTimer(BaseCallbackHandler):
+    """Records how long each console command the agent runs takes, by command."""
+
+    def __init__(self, tool_name: str = "run"):
+        self.tool_name = tool_name
+        self.latencies: Dict[str, List[float]] = {}
+        self._started: Dict[UUID, tuple] = {}  # (command, start time) by tool run
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        if serialized.get("name") == self.tool_name:
+            self._started[run_id] = (input_str, time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            command, start = started
+            self.record(command, time.perf_counter() - start)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._started.pop(run_id, None)
+
+    def record(self, command: str, latency: float):
+        self.latencies.setdefault(command_name(command), []).append(latency)
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """The sample below which percent of the samples fall, interpolated."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(percent) - 1]
+
+
+def format_latency_report(latencies: Dict[str, List[float]], elapsed: float) -> str:
+    """A table of command latency percentiles in milliseconds, by command, with the
+    overall throughput."""
+    header = f"{'command':<28} {'count':>7}" + "".join(
+        f" {f'p{p} ms':>9}" for p in PERCENTILES
+    )
+    lines = [header + f" {'max ms':>9}"]
+    everything = [latency for samples in latencies.values() for latency in samples]
+    for name, samples in sorted(latencies.items()) + [("(all)", everything)]:
+        if not samples:
+            continue
+        line = f"{name:<28} {len(samples):>7}"
+        for p in PERCENTILES:
+            line += f" {percentile(samples, p) * 1000:>9.2f}"
+        lines.append(line + f" {max(samples) * 1000:>9.2f}")
+    lines.append(
+        f"{len(everything)} commands in {elapsed:.2f}s, "
+        f"{len(everything) / elapsed:.0f} commands/s"
+    )
+    return "\n".join(lines)
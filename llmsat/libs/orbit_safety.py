@@ -0,0 +1,243 @@
+"""Orbit safety checks.
+
+Finds when an orbit drops below a safe altitude directly from its Keplerian elements.
+The closest approach on a conic is its periapsis, and the times at which the orbit
+crosses a given radius follow in closed form from the conic equation, so no sampling
+is needed and no dip can be missed between samples.
+"""
+
+import math
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import kepler, utils
+
+np = utils.lazy_import("numpy")
+
+SAFE_ALTITUDE_THRESHOLD = 50000  # m
+
+
+class OrbitSegment(BaseModel):
+    """A stretch of trajectory spent inside one sphere of influence."""
+
+    elements: kepler.OrbitalElements
+    start: float = Field(description="Universal time the segment begins, in seconds.")
+    end: float = Field(
+        description="Universal time the segment ends, in seconds. Infinite if the orbit does not leave the sphere of influence."
+    )
+
+
+class ViolationInterval(BaseModel):
+    """A time interval during which the orbit is below the safe altitude."""
+
+    body: str = Field(description="The celestial body being orbited.")
+    start: datetime = Field(description="Universal time the violation begins.")
+    end: datetime = Field(description="Universal time the violation ends.")
+    min_altitude: float = Field(
+        description="The lowest altitude reached during the violation, in meters."
+    )
+
+
+class SafetyReport(BaseModel):
+    """Result of checking an orbit against a safe altitude threshold."""
+
+    threshold_altitude: float = Field(description="The safe altitude, in meters.")
+    closest_approach_body: str = Field(
+        description="The body of closest approach within the checked window."
+    )
+    closest_approach_altitude: float = Field(
+        description="The lowest altitude reached within the checked window, in meters."
+    )
+    closest_approach_time: datetime = Field(
+        description="Universal time of the closest approach."
+    )
+    violations: List[ViolationInterval] = Field(
+        description="Intervals during which the orbit is below the safe altitude."
+    )
+    evaluations: int = Field(
+        description="Number of orbit state evaluations used for the check."
+    )
+
+    @property
+    def safe(self) -> bool:
+        return not self.violations
+
+
+def orbit_segments(snapshot: dict, ut: float) -> List[OrbitSegment]:
+    """Split a snapshot from krpc_snapshot.snapshot_orbit into per-SOI segments.
+
+    Args:
+        snapshot: orbit snapshot, including the next_orbit chain
+        ut: universal time at which the snapshot was taken
+    """
+    segments = []
+    start = ut
+    while snapshot is not None:
+        time_to_soi_change = snapshot["time_to_soi_change"]
+        if math.isnan(time_to_soi_change):
+            end = math.inf
+        else:
+            end = ut + time_to_soi_change
+
+        segments.append(
+            OrbitSegment(
+                elements=kepler.OrbitalElements.from_snapshot(snapshot),
+                start=start,
+                end=end,
+            )
+        )
+        start = end
+        snapshot = snapshot["next_orbit"]
+
+    return segments
+
+
+def _crossing_mean_anomaly(
+    elements: kepler.OrbitalElements, radius: float
+) -> Optional[float]:
+    """Mean anomaly, measured from periapsis, at which the orbit crosses the radius
+    on its way out. None if the orbit never reaches the radius."""
+    e = elements.eccentricity
+    cos_true_anomaly = (elements.semi_latus_rectum / radius - 1) / e
+    if cos_true_anomaly < -1:
+        return None  # the whole orbit lies below the radius
+    true_anomaly = math.acos(min(cos_true_anomaly, 1.0))
+
+    if e < 1:
+        eccentric_anomaly = 2 * math.atan(
+            math.sqrt((1 - e) / (1 + e)) * math.tan(true_anomaly / 2)
+        )
+        return eccentric_anomaly - e * math.sin(eccentric_anomaly)
+
+    hyperbolic_anomaly = 2 * math.atanh(
+        math.sqrt((e - 1) / (e + 1)) * math.tan(true_anomaly / 2)
+    )
+    return e * math.sinh(hyperbolic_anomaly) - hyperbolic_anomaly
+
+
+def _periapsis_times(elements: kepler.OrbitalElements, start: float, end: float):
+    """Universal times of every periapsis passage whose neighbourhood may overlap
+    the window, padded by one orbit on each side."""
+    n = elements.mean_motion
+    mean_anomaly_start = kepler.mean_anomaly_at(elements, start)
+    mean_anomaly_end = kepler.mean_anomaly_at(elements, end)
+
+    if elements.is_hyperbolic:
+        return np.array([elements.epoch - elements.mean_anomaly_at_epoch / n])
+
+    first = math.floor(mean_anomaly_start / (2 * math.pi))
+    last = math.ceil(mean_anomaly_end / (2 * math.pi))
+    revolutions = np.arange(first, last + 1)
+    return (
+        elements.epoch
+        + (2 * math.pi * revolutions - elements.mean_anomaly_at_epoch) / n
+    )
+
+
+def check_segment(
+    segment: OrbitSegment, threshold_altitude: float, start: float, end: float
+) -> tuple[List[ViolationInterval], tuple[float, float], int]:
+    """Check one segment within the window [start, end].
+
+    Returns the violation intervals, the (altitude, time) of closest approach and the
+    number of orbit state evaluations used.
+    """
+    elements = segment.elements
+    start = max(start, segment.start)
+    end = min(end, segment.end)
+
+    # closest approach is a periapsis passage inside the window or a window edge
+    periapsis_times = _periapsis_times(elements, start, end)
+    inside = periapsis_times[(periapsis_times >= start) & (periapsis_times <= end)]
+    edge_altitudes = kepler.propagate(elements, np.array([start, end]))["altitude"]
+    evaluations = 2
+
+    if inside.size:
+        closest = (elements.periapsis - elements.body_radius, float(inside[0]))
+    elif edge_altitudes[0] <= edge_altitudes[1]:
+        closest = (float(edge_altitudes[0]), start)
+    else:
+        closest = (float(edge_altitudes[1]), end)
+
+    if closest[0] >= threshold_altitude:
+        return [], closest, evaluations
+
+    threshold_radius = elements.body_radius + threshold_altitude
+    if elements.eccentricity < 1e-12:
+        crossing = None  # circular and entirely below the threshold
+    else:
+        crossing = _crossing_mean_anomaly(elements, threshold_radius)
+
+    if crossing is None:
+        windows = [(start, end)]
+    else:
+        half_width = crossing / elements.mean_motion
+        windows = [
+            (max(t - half_width, start), min(t + half_width, end))
+            for t in periapsis_times
+            if t + half_width > start and t - half_width < end
+        ]
+
+    violations = []
+    for window_start, window_end in windows:
+        passages = inside[(inside >= window_start) & (inside <= window_end)]
+        if passages.size:
+            min_altitude = elements.periapsis - elements.body_radius
+        else:
+            altitudes = kepler.propagate(
+                elements, np.array([window_start, window_end])
+            )["altitude"]
+            evaluations += 2
+            min_altitude = float(altitudes.min())
+
+        violations.append(
+            ViolationInterval(
+                body=elements.body,
+                start=utils.ksp_ut_to_datetime(window_start),
+                end=utils.ksp_ut_to_datetime(window_end),
+                min_altitude=min_altitude,
+            )
+        )
+
+    return violations, closest, evaluations
+
+
+def check_orbit(
+    segments: List[OrbitSegment],
+    start: float,
+    end: float,
+    threshold_altitude: float = SAFE_ALTITUDE_THRESHOLD,
+) -> SafetyReport:
+    """Find every interval within [start, end] during which the trajectory is below
+    the threshold altitude, following sphere of influence changes."""
+    if end < start:
+        raise ValueError("end must be after start")
+
+    violations = []
+    closest = None
+    evaluations = 0
+    for segment in segments:
+        if segment.end <= start or segment.start >= end:
+            continue
+
+        segment_violations, segment_closest, segment_evaluations = check_segment(
+            segment, threshold_altitude, start, end
+        )
+        violations.extend(segment_violations)
+        evaluations += segment_evaluations
+        if closest is None or segment_closest[0] < closest[0]:
+            closest = (*segment_closest, segment.elements.body)
+
+    if closest is None:
+        raise ValueError("No orbit segment covers the requested window")
+
+    return SafetyReport(
+        threshold_altitude=threshold_altitude,
+        closest_approach_altitude=closest[0],
+        closest_approach_time=utils.ksp_ut_to_datetime(closest[1]),
+        closest_approach_body=closest[2],
+        violations=violations,
+        evaluations=evaluations,
+    )
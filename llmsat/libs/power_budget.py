@@ -0,0 +1,242 @@
+"""Electric charge over a planned timeline.
+
+A plan is a sequence of activities, each drawing a constant load on top of the idle
+vessel's, while the solar panels charge the battery whenever the vessel is in
+sunlight. The charge is integrated over the whole plan at once on a fixed time grid,
+with the battery saturating when full, so checking a plan of days takes milliseconds.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import utils
+
+np = utils.lazy_import("numpy")
+
+ACTIVITY_LOADS = {  # EC/s drawn on top of the idle vessel's
+    "sleep": 0.0,
+    "experiment": 0.5,
+    "maneuver": 1.0,
+}
+DEFAULT_SOLAR_RATE = 1.0  # EC/s generated in sunlight
+DEFAULT_BASE_LOAD = 0.05  # EC/s drawn by the idle vessel
+DEFAULT_RESERVE = 0.1  # fraction of the battery a plan must keep
+DEFAULT_STEP = 10.0  # s of game time between integration points
+FULL_MARGIN = 1e-3  # fraction of the battery within which it counts as full or empty
+
+
+class PowerModel(BaseModel):
+    """How fast the vessel gains and uses electric charge"""
+
+    solar_rate: float = Field(
+        description="Electric charge generated in sunlight, in units per second."
+    )
+    base_load: float = Field(
+        description="Electric charge drawn by the idle vessel, in units per second."
+    )
+    history: float = Field(
+        description="Game time of resource history the rates were estimated from, in seconds. 0 if configured or defaulted."
+    )
+
+
+class PlanStep(BaseModel):
+    """An activity of a power plan"""
+
+    activity: str = Field(description="Activity, e.g. experiment, maneuver or sleep.")
+    duration: float = Field(description="Duration of the activity, in seconds.")
+    load: float = Field(
+        description="Electric charge drawn by the activity on top of the idle vessel's, in units per second."
+    )
+
+    @classmethod
+    def parse(cls, text: str) -> "PlanStep":
+        """Parse "activity:duration" or "activity:duration:load", e.g. "experiment:600"."""
+        fields = text.split(":")
+        if len(fields) not in (2, 3):
+            raise ValueError(
+                f"Invalid plan step '{text}'. Must be activity:duration or activity:duration:load"
+            )
+        activity = fields[0]
+        try:
+            duration = float(fields[1])
+            load = float(fields[2]) if len(fields) == 3 else ACTIVITY_LOADS[activity]
+        except KeyError:
+            raise ValueError(
+                f"Unknown activity '{activity}'. Give its load or use one of: {list(ACTIVITY_LOADS)}"
+            )
+        except ValueError:
+            raise ValueError(f"Invalid duration or load in plan step '{text}'")
+        if duration <= 0:
+            raise ValueError(f"Duration of plan step '{text}' must be positive")
+        return cls(activity=activity, duration=duration, load=load)
+
+
+class StepBudget(BaseModel):
+    """Electric charge during an activity of a power plan"""
+
+    activity: str = Field(description="Activity of the step.")
+    start: datetime = Field(description="Universal time at which the step starts.")
+    end: datetime = Field(description="Universal time at which the step ends.")
+    sunlight: float = Field(description="Fraction of the step spent in sunlight.")
+    min_charge: float = Field(description="Lowest electric charge during the step.")
+    end_charge: float = Field(description="Electric charge at the end of the step.")
+
+
+class PowerPlanReport(BaseModel):
+    """Electric charge over a power plan"""
+
+    valid: bool = Field(
+        description="Whether the electric charge stays above the reserve for the whole plan."
+    )
+    capacity: float = Field(description="Max electric charge the vessel can hold.")
+    reserve: float = Field(
+        description="Electric charge the plan must keep, as a fraction of the capacity."
+    )
+    start_charge: float = Field(description="Electric charge at the start of the plan.")
+    end_charge: float = Field(description="Electric charge at the end of the plan.")
+    min_charge: float = Field(description="Lowest electric charge during the plan.")
+    min_charge_at: datetime = Field(
+        description="Universal time of the lowest electric charge."
+    )
+    below_reserve_at: Optional[datetime] = Field(
+        description="Universal time at which the electric charge first drops below the reserve. None if it does not."
+    )
+    depleted_at: Optional[datetime] = Field(
+        description="Universal time at which the battery first runs empty. None if it does not."
+    )
+    model: PowerModel = Field(description="Power model the plan was checked with.")
+    steps: List[StepBudget] = Field(description="Electric charge during each step.")
+
+
+def estimate_power_model(
+    ut: np.ndarray,
+    amount: np.ndarray,
+    capacity: float,
+    sunlit: np.ndarray,
+    solar_rate: float = DEFAULT_SOLAR_RATE,
+    base_load: float = DEFAULT_BASE_LOAD,
+) -> PowerModel:
+    """Estimate the solar rate and base load from a sampled history of electric charge.
+
+    The base load is the average drain between samples in shadow, and the solar rate
+    the average gain between samples in sunlight plus the base load. Intervals with
+    the battery full or empty are left out, as their rates are clipped. A rate the
+    history does not cover, e.g. without any samples in shadow, falls back to the
+    given default.
+
+    Args:
+        ut: universal times of the samples
+        amount: electric charge at each sample
+        capacity: max electric charge
+        sunlit: whether the vessel was in sunlight at the middle of each interval
+            between samples
+    """
+    ut = np.asarray(ut, dtype=float)
+    amount = np.asarray(amount, dtype=float)
+    dt = np.diff(ut)
+    change = np.diff(amount)
+
+    margin = FULL_MARGIN * capacity
+    unclipped = (
+        (dt > 0)
+        & (np.minimum(amount[:-1], amount[1:]) > margin)
+        & (np.maximum(amount[:-1], amount[1:]) < capacity - margin)
+    )
+    shadow = unclipped & ~sunlit
+    light = unclipped & sunlit
+
+    if shadow.any():
+        base_load = max(-change[shadow].sum() / dt[shadow].sum(), 0.0)
+    if light.any():
+        solar_rate = max(change[light].sum() / dt[light].sum() + base_load, 0.0)
+
+    return PowerModel(
+        solar_rate=float(solar_rate),
+        base_load=float(base_load),
+        history=float(dt[unclipped].sum()),
+    )
+
+
+def check_plan(
+    steps: Sequence[PlanStep],
+    start: float,
+    charge: float,
+    capacity: float,
+    model: PowerModel,
+    in_sunlight: Callable[[np.ndarray], np.ndarray],
+    reserve: float = DEFAULT_RESERVE,
+    step: float = DEFAULT_STEP,
+) -> PowerPlanReport:
+    """Integrate the electric charge over a plan starting at universal time start.
+
+    Args:
+        steps: activities in the order they are carried out
+        charge: electric charge at the start
+        capacity: max electric charge
+        in_sunlight: whether the vessel is in sunlight at each of an array of
+            universal times
+        reserve: fraction of the capacity the charge must stay above
+        step: game seconds between integration points
+    """
+    if not steps:
+        raise ValueError("A plan needs at least one step")
+
+    # integration points on the grid, plus the step boundaries
+    bounds = start + np.concatenate(([0.0], np.cumsum([s.duration for s in steps])))
+    ut = np.union1d(np.arange(start, bounds[-1], step), bounds)
+    dt = np.diff(ut)
+    middle = ut[:-1] + dt / 2
+    index = np.searchsorted(bounds, middle) - 1  # step of each interval
+    load = np.array([s.load for s in steps])[index]
+    sunlit = np.asarray(in_sunlight(middle), dtype=bool)
+
+    rate = model.solar_rate * sunlit - model.base_load - load
+    # cumulative charge without limits, then clipped at full: the charge lost to a
+    # full battery up to each point is the largest overshoot so far
+    unbounded = charge + np.concatenate(([0.0], np.cumsum(rate * dt)))
+    overshoot = np.maximum.accumulate(np.maximum(unbounded - capacity, 0.0))
+    level = unbounded - overshoot
+
+    def at(i) -> datetime:
+        return utils.ksp_ut_to_datetime(float(ut[i]))
+
+    below_reserve = np.flatnonzero(level < reserve * capacity)
+    empty = np.flatnonzero(level <= 0)
+    if len(empty):
+        # the vessel is dead once the battery is empty, so nothing charges it again
+        level[empty[0] :] = 0.0
+    lowest = int(np.argmin(level))
+
+    budgets = []
+    first = np.searchsorted(ut, bounds)
+    for i, plan_step in enumerate(steps):
+        points = slice(first[i], first[i + 1] + 1)
+        intervals = slice(first[i], first[i + 1])
+        budgets.append(
+            StepBudget(
+                activity=plan_step.activity,
+                start=at(first[i]),
+                end=at(first[i + 1]),
+                sunlight=float(np.average(sunlit[intervals], weights=dt[intervals])),
+                min_charge=float(level[points].min()),
+                end_charge=float(level[first[i + 1]]),
+            )
+        )
+
+    return PowerPlanReport(
+        valid=not len(below_reserve),
+        capacity=capacity,
+        reserve=reserve,
+        start_charge=float(level[0]),
+        end_charge=float(level[-1]),
+        min_charge=float(level[lowest]),
+        min_charge_at=at(lowest),
+        below_reserve_at=at(below_reserve[0]) if len(below_reserve) else None,
+        depleted_at=at(empty[0]) if len(empty) else None,
+        model=model,
+        steps=budgets,
+    )
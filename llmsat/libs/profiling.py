@@ -0,0 +1,131 @@
+"""Profiling utilities"""
+
+import contextlib
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class RPCCounter:
+    """Counts the kRPC requests sent over a connection while active.
+
+    Every request is one blocking round trip to the game, regardless of how many
+    procedure calls it carries. Counters can be nested or overlap: while any is
+    active, one hook on the connection counts every request for all of them.
+
+    Example:
+        with RPCCounter(connection) as counter:
+            vessel.orbit.apoapsis
+        print(counter.count)
+    """
+
+    _hooks_lock = threading.Lock()
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        rpc_connection = self.connection._rpc_connection
+        with RPCCounter._hooks_lock:
+            counters = rpc_connection.__dict__.get("_rpc_counters")
+            if counters is None:
+                counters = rpc_connection._rpc_counters = []
+                # the instance's own send_message, if already overridden
+                rpc_connection._rpc_counters_previous = rpc_connection.__dict__.get(
+                    "send_message"
+                )
+                send_message = rpc_connection.send_message
+
+                def counted_send_message(message):
+                    for counter in list(counters):
+                        counter._add()
+                    return send_message(message)
+
+                rpc_connection.send_message = counted_send_message
+            counters.append(self)
+        return self
+
+    def __exit__(self, *_):
+        rpc_connection = self.connection._rpc_connection
+        with RPCCounter._hooks_lock:
+            counters = rpc_connection.__dict__.get("_rpc_counters", [])
+            if self not in counters:
+                return
+            counters.remove(self)
+            if counters:
+                return
+
+            previous = rpc_connection._rpc_counters_previous
+            if previous is None:
+                del rpc_connection.send_message
+            else:
+                rpc_connection.send_message = previous
+            del rpc_connection._rpc_counters
+            del rpc_connection._rpc_counters_previous
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+    def _add(self):
+        with self._lock:
+            self.count += 1
+
+
+class StartupProfile:
+    """Wall time and kRPC requests of each phase of startup, for a report.
+
+    Requests are counted from count_rpcs() on, including those sent by background
+    threads while a phase runs.
+
+    Example:
+        profile = StartupProfile()
+        with profile.phase("connect"):
+            connection = krpc.connect()
+        profile.count_rpcs(connection)
+        with profile.phase("components"):
+            ...
+        print(profile.report())
+    """
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float, Optional[int]]] = []  # (name, s, RPCs)
+        self._counter: Optional[RPCCounter] = None
+
+    def count_rpcs(self, connection):
+        """Start counting the requests sent over connection."""
+        self._counter = RPCCounter(connection).__enter__()
+
+    def stop(self):
+        """Stop counting requests."""
+        if self._counter is not None:
+            self._counter.__exit__()
+            self._counter = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start_count = self._counter.count if self._counter else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            rpcs = None
+            if self._counter is not None and start_count is not None:
+                rpcs = self._counter.count - start_count
+            self.phases.append((name, seconds, rpcs))
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds, _ in self.phases)
+
+    def report(self) -> str:
+        width = max([len(name) for name, _, _ in self.phases] + [len("total")])
+        lines = [f"{'phase':<{width}} {'ms':>8} {'RPCs':>6}"]
+        for name, seconds, rpcs in self.phases:
+            count = "-" if rpcs is None else str(rpcs)
+            lines.append(f"{name:<{width}} {seconds * 1000:>8.1f} {count:>6}")
+        lines.append(f"{'total':<{width}} {self.total * 1000:>8.1f}")
+        return "\n".join(lines)
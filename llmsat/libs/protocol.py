@@ -0,0 +1,235 @@
+"""Console and agent wire protocol.
+
+Every message is a fixed header followed by its payload:
+
+    header   6 bytes: magic b"LSAT", protocol version (uint8), message type (uint8)
+             version 2 adds 4 bytes: correlation ID (uint32)
+             version 3 adds 2 more: channel (uint8), priority (uint8)
+    payload  UTF-8 message data, empty if there is none
+
+Small messages travel as a single frame holding both. Payloads of
+ZERO_COPY_THRESHOLD bytes or more are sent as a second frame of a multipart message
+without copying them into ZMQ, and received without copying them out.
+
+The first 6 header bytes are the same in every protocol version, so a peer can always
+read the version of a message before parsing the rest.
+
+Version 2 streams command output: each COMMAND carries a correlation ID, and the
+console answers with any number of OUTPUT messages tagged with that ID as the command
+prints, then an END message. Unsolicited output such as alerts has ID 0. Version 1 has
+no IDs and answers each command with a single OUTPUT.
+
+Version 3 tags every message with a channel, so that command replies and alerts share
+the socket without being mistaken for each other, and alerts with a priority. Messages
+decoded from earlier versions get their channel inferred: control message types are
+CONTROL, output with a correlation ID is COMMAND and any other output is ALERT.
+
+Versions are negotiated on connect: the controller sends CONNECT, encoded as version 1
+so that any console can read it, with the versions it supports as its payload. The
+console answers with VERSION carrying the highest version both support. Both sides
+then use that version for the rest of the session.
+
+From version 3 the dashboard that follows VERSION carries its revision as its ID. A
+controller reconnecting to the same console can append that revision to its offer, as
+"1,2,3;dashboard=<revision>", to receive only the dashboard sections that changed.
+"""
+
+import struct
+from typing import Iterable, List, Optional, Union
+
+import zmq
+import zmq.asyncio
+
+from llmsat.libs import utils
+
+MAGIC = b"LSAT"
+HEADER = struct.Struct("!4sBB")
+HEADER_EXTENSIONS = {  # header fields that follow HEADER, by version
+    1: (struct.Struct("!"), ()),
+    2: (struct.Struct("!I"), ("id",)),
+    3: (struct.Struct("!IBB"), ("id", "channel", "priority")),
+}
+PROTOCOL_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+STREAMING_VERSION = 2  # first version with correlation IDs and streamed output
+ENVELOPE_VERSION = 3  # first version with channels and priorities
+ZERO_COPY_THRESHOLD = 64 * 1024  # bytes, below this copying is cheaper
+
+TYPE_CODES = {
+    utils.MessageType.CONNECT: 1,
+    utils.MessageType.DISCONNECT: 2,
+    utils.MessageType.COMMAND: 3,
+    utils.MessageType.OUTPUT: 4,
+    utils.MessageType.VERSION: 5,
+    utils.MessageType.END: 6,
+}
+TYPES = {code: message_type for message_type, code in TYPE_CODES.items()}
+CHANNEL_CODES = {
+    utils.Channel.CONTROL: 0,
+    utils.Channel.COMMAND: 1,
+    utils.Channel.ALERT: 2,
+}
+CHANNELS = {code: channel for channel, code in CHANNEL_CODES.items()}
+CONTROL_TYPES = (
+    utils.MessageType.CONNECT,
+    utils.MessageType.DISCONNECT,
+    utils.MessageType.VERSION,
+)
+
+
+class ProtocolError(ValueError):
+    """Raised for messages that do not follow the protocol."""
+
+
+def encode(message: utils.Message, version: int = PROTOCOL_VERSION) -> List[bytes]:
+    """Encode a message as one frame, or as header and payload frames if large."""
+    extension, names = HEADER_EXTENSIONS[version]
+    fields = {
+        "id": message.id,
+        "channel": CHANNEL_CODES[message.channel],
+        "priority": int(message.priority),
+    }
+    header = HEADER.pack(MAGIC, version, TYPE_CODES[message.type])
+    header += extension.pack(*(fields[name] for name in names))
+    payload = message.data.encode("utf-8") if message.data is not None else b""
+    if len(payload) < ZERO_COPY_THRESHOLD:
+        return [header + payload]
+    return [header, payload]
+
+
+def decode(frames: List[Union[bytes, zmq.Frame]]) -> utils.Message:
+    """Decode frames received as bytes or as zero-copy ZMQ frames."""
+    buffers = [
+        memoryview(frame.buffer if isinstance(frame, zmq.Frame) else frame)
+        for frame in frames
+    ]
+    if len(buffers) not in (1, 2):
+        raise ProtocolError(f"Expected 1 or 2 frames, got {len(frames)}")
+    if len(buffers[0]) < HEADER.size:
+        raise ProtocolError(f"Invalid header length {len(buffers[0])}")
+
+    magic, version, type_code = HEADER.unpack(buffers[0][: HEADER.size])
+    if magic != MAGIC:
+        raise ProtocolError("Invalid magic bytes")
+    if version not in SUPPORTED_VERSIONS:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    if type_code not in TYPES:
+        raise ProtocolError(f"Unknown message type {type_code}")
+
+    extension, names = HEADER_EXTENSIONS[version]
+    header_size = HEADER.size + extension.size
+    if len(buffers[0]) < header_size:
+        raise ProtocolError(f"Invalid header length {len(buffers[0])}")
+    fields = dict(zip(names, extension.unpack(buffers[0][HEADER.size : header_size])))
+    message_type = TYPES[type_code]
+    id = fields.get("id", 0)
+
+    if "channel" in fields:
+        if fields["channel"] not in CHANNELS:
+            raise ProtocolError(f"Unknown channel {fields['channel']}")
+        channel = CHANNELS[fields["channel"]]
+    else:
+        channel = _infer_channel(message_type, id)
+    priority = fields.get("priority", utils.Priority.NORMAL)
+    if priority not in utils.Priority._value2member_map_:
+        raise ProtocolError(f"Unknown priority {priority}")
+
+    if len(buffers) == 1:
+        payload = buffers[0][header_size:]
+    elif len(buffers[0]) != header_size:
+        raise ProtocolError(f"Invalid header length {len(buffers[0])}")
+    else:
+        payload = buffers[1]
+
+    try:
+        data = str(payload, "utf-8") if len(payload) else None
+    except UnicodeDecodeError as e:
+        raise ProtocolError(f"Invalid payload: {e}")
+    return utils.Message(
+        type=message_type, data=data, id=id, channel=channel, priority=priority
+    )
+
+
+def _infer_channel(message_type: utils.MessageType, id: int) -> utils.Channel:
+    """The channel of a message from a version without channels."""
+    if message_type in CONTROL_TYPES:
+        return utils.Channel.CONTROL
+    if id or message_type == utils.MessageType.COMMAND:
+        return utils.Channel.COMMAND
+    return utils.Channel.ALERT
+
+
+def send(socket: zmq.Socket, message: utils.Message, version: int = PROTOCOL_VERSION):
+    frames = encode(message, version)
+    if len(frames) == 1:
+        socket.send(frames[0])
+    else:
+        socket.send_multipart(frames, copy=False)
+
+
+def recv(socket: zmq.Socket) -> utils.Message:
+    header = socket.recv()
+    if not socket.getsockopt(zmq.RCVMORE):
+        return decode([header])
+    return decode([header, *socket.recv_multipart(copy=False)])
+
+
+async def send_async(
+    socket: zmq.asyncio.Socket,
+    message: utils.Message,
+    version: int = PROTOCOL_VERSION,
+):
+    """Send on an asyncio socket, waiting rather than blocking while the peer's queue
+    is full."""
+    frames = encode(message, version)
+    if len(frames) == 1:
+        await socket.send(frames[0])
+    else:
+        await socket.send_multipart(frames, copy=False)
+
+
+async def recv_async(socket: zmq.asyncio.Socket) -> utils.Message:
+    return decode(await socket.recv_multipart(copy=False))
+
+
+def offer_versions(
+    versions: Iterable[int] = SUPPORTED_VERSIONS, dashboard: int = None
+) -> str:
+    """The CONNECT payload listing the versions a controller supports, and the
+    revision of the last dashboard it received from the console, if any."""
+    offer = ",".join(str(version) for version in versions)
+    if dashboard:
+        offer += f";dashboard={dashboard}"
+    return offer
+
+
+def offered_dashboard(offer: str) -> Optional[int]:
+    """The dashboard revision in a CONNECT payload, if the controller has one."""
+    for option in (offer or "").split(";")[1:]:
+        key, _, value = option.partition("=")
+        if key == "dashboard" and value.isdigit():
+            return int(value)
+    return None
+
+
+def negotiate_version(offer: str) -> int:
+    """The highest version in a CONNECT payload that this side also supports.
+
+    A CONNECT without a payload comes from a controller that predates negotiation and
+    gets version 1.
+    """
+    if not offer:
+        return 1
+
+    try:
+        offered = {int(version) for version in offer.split(";")[0].split(",")}
+    except ValueError:
+        raise ProtocolError(f"Invalid version offer '{offer}'")
+
+    common = offered.intersection(SUPPORTED_VERSIONS)
+    if not common:
+        raise ProtocolError(
+            f"No common protocol version: offered {sorted(offered)}, supported {list(SUPPORTED_VERSIONS)}"
+        )
+
+    return max(common)
@@ -0,0 +1,277 @@
+"""Resource amounts over time, with charge and consumption rates.
+
+Reading the resources directly takes a round trip for the amount and another for the
+max of each resource, and keeps no history. The series instead streams every resource
+through the TelemetryHub and samples the cached readings into a fixed-size array, so
+rates and time to empty are computed from memory without any round trip.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import utils
+from llmsat.libs.telemetry import TelemetryHub
+
+np = utils.lazy_import("numpy")
+
+DEFAULT_CAPACITY = 3600  # samples, an hour at the default rate
+DEFAULT_SAMPLE_RATE = 1.0  # Hz
+DEFAULT_WINDOW = 120.0  # s of game time the rates are derived over
+
+
+class ResourceForecast(BaseModel):
+    """The trend of a resource"""
+
+    name: str = Field(description="Name of the resource.")
+    amount: float = Field(description="Current amount of the resource.")
+    max: float = Field(description="Max amount of the resource the vessel can hold.")
+    charge_rate: float = Field(
+        description="Average rate at which the resource was gained, in units per second of game time."
+    )
+    consumption_rate: float = Field(
+        description="Average rate at which the resource was used, in units per second of game time."
+    )
+    time_to_empty: Optional[float] = Field(
+        description="Game time until the resource runs out at its net rate, in seconds. None if it is not being depleted."
+    )
+    time_to_full: Optional[float] = Field(
+        description="Game time until the resource is full at its net rate, in seconds. None if it is not being gained."
+    )
+    window: float = Field(
+        description="Game time the rates are derived over, in seconds."
+    )
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, width: int):
+        """The latest rows of a fixed number of columns, the oldest overwritten first.
+
+        Args:
+            capacity: number of rows kept
+            width: number of columns of a row
+        """
+        self.capacity = capacity
+        self._data = np.full((capacity, width), np.nan)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row):
+        self._data[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last(self):
+        return self._data[self._next - 1]
+
+    def rows(self):
+        """A copy of the rows, oldest first."""
+        if self._count < self.capacity:
+            return self._data[: self._count].copy()
+        return np.concatenate((self._data[self._next :], self._data[: self._next]))
+
+
+class ResourceSeries:
+    """Amounts of every resource of a vessel sampled from their streams into a ring
+    buffer of bounded size, with the charge and consumption rate of each derived from
+    the samples.
+
+    The resource names are streamed too, so a resource added or lost is noticed
+    without polling; the history then starts afresh. One series is shared by the
+    components that read resources, like the TelemetryHub.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ResourceSeries, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        vessel=None,
+        telemetry: TelemetryHub = None,
+        capacity: int = DEFAULT_CAPACITY,
+        rate: float = DEFAULT_SAMPLE_RATE,
+        window: float = DEFAULT_WINDOW,
+    ):
+        """
+        Args:
+            capacity: number of samples kept
+            rate: samples per second
+            window: game seconds of the latest samples the rates are derived over
+        """
+        if ResourceSeries._initialized:
+            return
+        self.resources = vessel.resources
+        self.telemetry = telemetry
+        self.capacity = capacity
+        self.rate = rate
+        self.window = window
+        self.names: List[str] = []
+        self.max = None  # of each resource in names, at the last sample
+        self._buffer: Optional[RingBuffer] = None  # rows of (ut, amount per name)
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+
+        if "resource_names" not in self.telemetry:
+            self.telemetry.register(
+                "resource_names",
+                getattr,
+                self.resources,
+                "names",
+                rate=rate,
+                max_age=math.inf,
+            )
+
+        ResourceSeries._initialized = True
+
+    def start(self):
+        """Sample in the background at the configured rate. The first sample opens
+        the streams, so it is taken one interval later."""
+        with self._lock:
+            if self._sampler is not None:
+                return
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+        self._sampler.start()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return 0 if self._buffer is None else len(self._buffer)
+
+    def sample(self):
+        """Add a sample of every resource from its stream. A sample at the same game
+        time as the previous one, e.g. while the game is paused, is dropped."""
+        names = list(self.telemetry.get("resource_names"))
+        with self._lock:
+            if names != self.names or self._buffer is None:
+                self._track(names)
+
+            ut = self.telemetry.get("ut")
+            if len(self._buffer) and ut <= self._buffer.last()[0]:
+                return
+            amounts = [self.telemetry.get(_key(name, "amount")) for name in names]
+            self.max = np.array(
+                [self.telemetry.get(_key(name, "max")) for name in names], dtype=float
+            )
+            self._buffer.append([ut, *amounts])
+
+    def records(self) -> List[Dict[str, Any]]:
+        """The name, current amount and max of each resource."""
+        names = list(self.telemetry.get("resource_names"))
+        with self._lock:
+            if names != self.names:
+                self._track(names)
+            return [
+                {
+                    "name": name,
+                    "amount": self.telemetry.get(_key(name, "amount")),
+                    "max": self.telemetry.get(_key(name, "max")),
+                    # "density": resources.density(name),  # TODO: AttributeError: type object 'Resources' has no attribute '_client'
+                    # "flow_mode": resources.flow_mode(name),
+                }
+                for name in names
+            ]
+
+    def history(self, name: str):
+        """The sampled universal times and amounts of a resource, oldest first."""
+        with self._lock:
+            if name not in self.names:
+                raise ValueError(f"Unknown resource '{name}'")
+            rows = self._buffer.rows()
+            column = self.names.index(name) + 1
+        return rows[:, 0], rows[:, column]
+
+    def forecast(self) -> List[ResourceForecast]:
+        """The charge and consumption rate of each resource over the window, and the
+        time until it is empty or full at its net rate, from the samples alone."""
+        if not len(self):
+            self.sample()
+
+        with self._lock:
+            names = list(self.names)
+            maxima = self.max
+            rows = self._buffer.rows()
+
+        latest = rows[-1]
+        recent = rows[rows[:, 0] >= latest[0] - self.window]
+        if len(recent) < 2:
+            recent = rows[-2:]
+        span = recent[-1, 0] - recent[0, 0]
+
+        amounts = latest[1:]
+        if span > 0:
+            steps = np.diff(recent[:, 1:], axis=0)
+            charge = np.maximum(steps, 0).sum(axis=0) / span
+            consumption = np.maximum(-steps, 0).sum(axis=0) / span
+        else:
+            charge = consumption = np.zeros(len(names))
+        net = charge - consumption
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_empty = np.where(net < 0, amounts / -net, np.inf)
+            to_full = np.where(net > 0, np.maximum(maxima - amounts, 0) / net, np.inf)
+
+        return [
+            ResourceForecast(
+                name=name,
+                amount=float(amounts[i]),
+                max=float(maxima[i]),
+                charge_rate=float(charge[i]),
+                consumption_rate=float(consumption[i]),
+                time_to_empty=_finite(to_empty[i]),
+                time_to_full=_finite(to_full[i]),
+                window=float(span),
+            )
+            for i, name in enumerate(names)
+        ]
+
+    def _track(self, names: List[str]):
+        """Stream the amount and max of each resource in names, replacing the streams
+        of the resources tracked before, and start the history afresh."""
+        for name in self.names:
+            for field in ("amount", "max"):
+                self.telemetry.unregister(_key(name, field))
+
+        for name in names:
+            self.telemetry.register(
+                _key(name, "amount"),
+                self.resources.amount,
+                name,
+                rate=self.rate,
+                max_age=math.inf,
+            )
+            self.telemetry.register(
+                _key(name, "max"),
+                self.resources.max,
+                name,
+                rate=self.rate,
+                max_age=math.inf,
+            )
+        self.names = names
+        self.max = np.zeros(len(names))
+        self._buffer = RingBuffer(self.capacity, len(names) + 1)
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(1 / self.rate)
+            try:
+                self.sample()
+            except Exception as e:
+                logging.warning(f"Resource sampling failed: {e}")
+
+
+def _key(name: str, field: str) -> str:
+    return f"resource/{name}/{field}"
+
+
+def _finite(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
@@ -0,0 +1,173 @@
+"""Streamed command responses"""
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterator, List, Optional
+
+from llmsat.libs import utils
+
+
+class ResponseStream:
+    """Output of one console command, assembled from OUTPUT messages as they arrive.
+
+    Iterating yields each chunk as soon as it is received, so output can be used before
+    the command finishes. The stream ends when the console sends END, which also
+    resolves future with the complete output.
+    """
+
+    def __init__(self, id: int, command: str):
+        self.id = id
+        self.command = command
+        self.finished = False
+        self.detached = False
+        self.opened_at = time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._chunks: List[str] = []
+        self._read = 0  # chunks already handed out
+        self._condition = threading.Condition()
+        self.future: Future[str] = Future()
+
+    @property
+    def time_to_first_chunk(self) -> Optional[float]:
+        """Seconds from sending the command to receiving its first output."""
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.opened_at
+
+    def put(self, chunk: str):
+        with self._condition:
+            if self.first_chunk_at is None:
+                self.first_chunk_at = time.monotonic()
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self):
+        with self._condition:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._condition.notify_all()
+            output = "\n".join(self._chunks)
+        self.future.set_result(output)
+
+    def result(self, timeout: float = None) -> str:
+        """The complete output, once the command has finished."""
+        return self.future.result(timeout)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.chunks()
+
+    def chunks(self, timeout: float = None) -> Iterator[str]:
+        """Yield chunks as they arrive until the stream ends.
+
+        Raises TimeoutError if the stream has not ended within timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                while self._read == len(self._chunks) and not self.finished:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"Command '{self.command}' still running")
+                    self._condition.wait(remaining)
+
+                if self._read == len(self._chunks):
+                    return
+                chunk = self._chunks[self._read]
+                self._read += 1
+            yield chunk
+
+    def read(self, timeout: float = None) -> str:
+        """The output received until the stream ends or the timeout passes.
+
+        If the timeout passes first, the stream is detached: output that arrives
+        afterwards is handed to the router's late output callback when the command
+        finishes.
+        """
+        chunks = []
+        try:
+            for chunk in self.chunks(timeout):
+                chunks.append(chunk)
+        except TimeoutError:
+            chunks.extend(self._detach())
+        return "\n".join(chunks)
+
+    async def read_async(self, timeout: float = None) -> str:
+        """Like read, but waits on the event loop instead of blocking a thread."""
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(self.future)), timeout
+            )
+        except asyncio.TimeoutError:
+            pass
+        return "\n".join(self._detach())
+
+    def _detach(self) -> List[str]:
+        """Take the unread output, and detach the stream unless it has ended."""
+        with self._condition:
+            chunks = self._chunks[self._read :]
+            self._read = len(self._chunks)
+            if not self.finished:
+                self.detached = True
+        return chunks
+
+    def unread(self) -> str:
+        """Output received but not yet read."""
+        with self._condition:
+            chunks = self._chunks[self._read :]
+            self._read = len(self._chunks)
+        return "\n".join(chunks)
+
+
+class ResponseRouter:
+    """Allocates correlation IDs for commands and routes replies to their streams."""
+
+    MAX_ID = 2**32 - 1
+
+    def __init__(self, on_late_output: Callable[[ResponseStream, str], None] = None):
+        """
+        Args:
+            on_late_output: called with a detached stream and the output it received
+                after being detached, once its command finishes
+        """
+        self.on_late_output = on_late_output
+        self._streams: Dict[int, ResponseStream] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def open(self, command: str) -> ResponseStream:
+        with self._lock:
+            id = next(self._ids)
+            if id > self.MAX_ID:
+                self._ids = itertools.count(2)
+                id = 1
+            stream = ResponseStream(id, command)
+            self._streams[id] = stream
+        return stream
+
+    def dispatch(self, message: utils.Message) -> bool:
+        """Route an OUTPUT or END reply to its stream. Returns False for messages that
+        do not belong to an open stream, such as alerts."""
+        if message.type not in (utils.MessageType.OUTPUT, utils.MessageType.END):
+            return False
+
+        with self._lock:
+            stream = self._streams.get(message.id)
+            if stream is not None and message.type == utils.MessageType.END:
+                del self._streams[message.id]
+        if stream is None:
+            return False
+
+        if message.type == utils.MessageType.OUTPUT:
+            stream.put(message.data or "")
+            return True
+
+        stream.finish()
+        if stream.detached and self.on_late_output is not None:
+            self.on_late_output(stream, stream.unread())
+        return True
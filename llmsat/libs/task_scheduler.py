@@ -0,0 +1,192 @@
+"""Dependency-aware task scheduling"""
+
+import heapq
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+
+class CycleError(ValueError):
+    """Raised when a dependency would make a task depend on itself."""
+
+
+class TaskScheduler:
+    """Orders tasks by their dependencies, then by a sort key such as
+    (priority, deadline).
+
+    Dependencies form a DAG kept in topological order incrementally (Pearce-Kelly), so
+    adding an edge only reorders the tasks between its endpoints and a cycle is
+    detected in the same pass. Tasks that are eligible and whose dependencies are all
+    done wait in a heap with lazy deletion, so next() is O(log n) amortized.
+
+    A task is eligible when it may be started, e.g. pending rather than in progress,
+    and done once its dependents may proceed. Task IDs can be any hashable value.
+    """
+
+    def __init__(self):
+        self._dependencies: Dict[Hashable, Set[Hashable]] = {}
+        self._dependents: Dict[Hashable, Set[Hashable]] = {}
+        self._order: Dict[Hashable, int] = {}  # topological position of each task
+        self._next_order = 0
+        self._keys: Dict[Hashable, tuple] = {}
+        self._eligible: Set[Hashable] = set()
+        self._done: Set[Hashable] = set()
+        self._unmet: Dict[Hashable, int] = {}  # dependencies not yet done
+        self._heap: List[tuple] = []
+        self._version: Dict[Hashable, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, id: Hashable) -> bool:
+        return id in self._order
+
+    def add(
+        self,
+        id: Hashable,
+        key: tuple,
+        dependencies: Iterable[Hashable] = (),
+        eligible: bool = True,
+        done: bool = False,
+    ):
+        """Add a task ordered by key, lowest first, after the given dependencies."""
+        dependencies = set(dependencies)
+        with self._lock:
+            if id in self._order:
+                raise ValueError(f"Task {id} is already scheduled")
+            self._check_known(dependencies)
+
+            # a new task has no dependents, so it can go last without breaking the order
+            self._order[id] = self._next_order
+            self._next_order += 1
+            self._dependencies[id] = set()
+            self._dependents[id] = set()
+            self._keys[id] = key
+            self._version[id] = 0
+            self._unmet[id] = 0
+            if done:
+                self._done.add(id)
+            if eligible:
+                self._eligible.add(id)
+            self._link(id, dependencies)
+            self._refresh(id)
+
+    def add_dependencies(self, id: Hashable, dependencies: Iterable[Hashable]):
+        """Make a task depend on more tasks. Raises CycleError, leaving the schedule
+        unchanged, if that would create a dependency cycle."""
+        dependencies = set(dependencies) - self._dependencies.get(id, set())
+        with self._lock:
+            self._check_known([id, *dependencies])
+
+            # apply every reordering only once all edges are known to be acyclic
+            order = dict(self._order)
+            for dependency in dependencies:
+                self._reorder(dependency, id, order)
+            self._order = order
+
+            self._link(id, dependencies)
+            self._refresh(id)
+
+    def update(
+        self,
+        id: Hashable,
+        key: tuple = None,
+        eligible: bool = None,
+        done: bool = None,
+    ):
+        """Change the sort key or state of a task."""
+        with self._lock:
+            self._check_known([id])
+            if key is not None:
+                self._keys[id] = key
+            if eligible is not None:
+                (self._eligible.add if eligible else self._eligible.discard)(id)
+            if done is not None and done != (id in self._done):
+                (self._done.add if done else self._done.discard)(id)
+                for dependent in self._dependents[id]:
+                    self._unmet[dependent] += -1 if done else 1
+                    self._refresh(dependent)
+            self._refresh(id)
+
+    def next(self) -> Optional[Hashable]:
+        """The ready task with the lowest key, None if no task is ready."""
+        with self._lock:
+            while self._heap:
+                _, version, id = self._heap[0]
+                if version == self._version.get(id) and self._is_ready(id):
+                    return id
+                heapq.heappop(self._heap)
+            return None
+
+    def ready(self) -> List[Hashable]:
+        """Every ready task, lowest key first."""
+        with self._lock:
+            ready = [id for id in self._order if self._is_ready(id)]
+            return sorted(ready, key=lambda id: (self._keys[id], self._order[id]))
+
+    def blocked_by(self, id: Hashable) -> List[Hashable]:
+        """The dependencies of a task that are not yet done."""
+        with self._lock:
+            self._check_known([id])
+            return [dep for dep in self._dependencies[id] if dep not in self._done]
+
+    def topological_order(self) -> List[Hashable]:
+        """Every task, each after all of its dependencies."""
+        with self._lock:
+            return sorted(self._order, key=self._order.__getitem__)
+
+    def _is_ready(self, id: Hashable) -> bool:
+        return id in self._eligible and id not in self._done and self._unmet[id] == 0
+
+    def _refresh(self, id: Hashable):
+        """Invalidate the heap entry of a task and push a new one if it is ready."""
+        self._version[id] += 1
+        if self._is_ready(id):
+            heapq.heappush(
+                self._heap, ((self._keys[id], self._order[id]), self._version[id], id)
+            )
+
+    def _link(self, id: Hashable, dependencies: Set[Hashable]):
+        for dependency in dependencies:
+            self._dependencies[id].add(dependency)
+            self._dependents[dependency].add(id)
+            if dependency not in self._done:
+                self._unmet[id] += 1
+
+    def _reorder(self, before: Hashable, after: Hashable, order: Dict[Hashable, int]):
+        """Restore topological order for a new edge before -> after (Pearce-Kelly)."""
+        lower, upper = order[after], order[before]
+        if lower < upper:
+            forward = self._search(after, self._dependents, order, upper, before)
+            backward = self._search(before, self._dependencies, order, lower)
+            tasks = sorted(backward, key=order.__getitem__) + sorted(
+                forward, key=order.__getitem__
+            )
+            positions = sorted(order[task] for task in tasks)
+            for task, position in zip(tasks, positions):
+                order[task] = position
+        elif lower == upper:
+            raise CycleError(f"Task {after} cannot depend on itself")
+
+    def _search(self, start, edges, order, bound, target=None) -> List[Hashable]:
+        """Tasks reachable from start whose order lies between start and bound."""
+        forward = target is not None
+        visited = {start}
+        stack = [start]
+        while stack:
+            for task in edges[stack.pop()]:
+                if task == target:
+                    raise CycleError(
+                        f"Task {target} already depends on task {start} directly or indirectly"
+                    )
+                if task in visited:
+                    continue
+                if (order[task] < bound) if forward else (order[task] > bound):
+                    visited.add(task)
+                    stack.append(task)
+        return list(visited)
+
+    def _check_known(self, ids: Iterable[Hashable]):
+        for id in ids:
+            if id not in self._order:
+                raise ValueError(f"Task {id} is not scheduled")
@@ -0,0 +1,187 @@
+"""Shared telemetry cache"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_RATE = 20.0  # Hz
+DEFAULT_MAX_AGE = 1.0  # s
+
+
+class TelemetryChannel:
+    def __init__(self, key: str, call: tuple, rate: float, max_age: float):
+        """A single streamed value and its cached reading.
+
+        Args:
+            key: name the value is looked up by
+            call: (function, *args) of the remote procedure call to stream
+            rate: stream update rate in Hz, zero for unlimited
+            max_age: seconds a reading may go without a stream update before it is
+                refreshed with a direct call
+        """
+        self.key = key
+        self.call = call
+        self.rate = rate
+        self.max_age = max_age
+        self.stream = None
+        self.value: Any = None
+        self.updated_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.callbacks: List[Callable[[Any], None]] = []
+        self.lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return (
+            self.updated_at is not None
+            and time.monotonic() - self.updated_at <= self.max_age
+        )
+
+
+class TelemetryHub:
+    """Owns the kRPC streams for frequently read values and shares cached readings
+    between components.
+
+    Stream values are pushed by the server, so cached readings cost no round trip. A
+    reading that has not been updated within its staleness limit (e.g. a value that
+    has stopped changing) is refreshed with one direct call. Safe to use from any
+    thread.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(TelemetryHub, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, krpc_connection=None):
+        if TelemetryHub._initialized:
+            return
+        self.connection = krpc_connection
+        self._channels: Dict[str, TelemetryChannel] = {}
+        self._lock = threading.Lock()
+
+        space_center = self.connection.space_center
+        vessel = space_center.active_vessel
+        self.register("ut", getattr, space_center, "ut")
+        self.register("met", getattr, vessel, "met")
+        self.register("thrust", getattr, vessel, "thrust")
+        self.register("orbit", getattr, vessel, "orbit")
+
+        TelemetryHub._initialized = True
+
+    def register(
+        self,
+        key: str,
+        func: Callable,
+        *args,
+        rate: float = DEFAULT_RATE,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        """Register a value to stream, e.g. register("ut", getattr, space_center, "ut").
+
+        The stream itself is only opened the first time the value is read.
+        """
+        with self._lock:
+            if key in self._channels:
+                raise ValueError(f"Telemetry key '{key}' is already registered")
+            self._channels[key] = TelemetryChannel(key, (func, *args), rate, max_age)
+
+    def unregister(self, key: str):
+        """Stop streaming a value, e.g. one of a part that is no longer attached."""
+        with self._lock:
+            channel = self._channels.pop(key, None)
+        if channel is None:
+            return
+        with channel.lock:
+            if channel.stream is not None:
+                channel.stream.remove()
+                channel.stream = None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._channels
+
+    def configure(self, key: str, rate: float = None, max_age: float = None):
+        """Change the update rate or staleness limit of a registered value."""
+        channel = self._get_channel(key)
+        with channel.lock:
+            if rate is not None:
+                channel.rate = rate
+                if channel.stream is not None:
+                    channel.stream.rate = rate
+            if max_age is not None:
+                channel.max_age = max_age
+
+    def get(self, key: str) -> Any:
+        """The latest reading of a registered value."""
+        channel = self._get_channel(key)
+        self._ensure_stream(channel)
+
+        with channel.lock:
+            if channel.is_fresh():
+                channel.hits += 1
+                return channel.value
+            channel.misses += 1
+
+        func, *args = channel.call
+        value = func(*args)
+        with channel.lock:
+            channel.value = value
+            channel.updated_at = time.monotonic()
+
+        return value
+
+    def add_callback(self, key: str, callback: Callable[[Any], None]):
+        """Invoke callback with the new value whenever the stream updates.
+
+        Callbacks run on the kRPC stream thread and must not block.
+        """
+        channel = self._get_channel(key)
+        with channel.lock:
+            channel.callbacks.append(callback)
+        self._ensure_stream(channel)
+
+    def remove_callback(self, key: str, callback: Callable[[Any], None]):
+        channel = self._get_channel(key)
+        with channel.lock:
+            channel.callbacks.remove(callback)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Cache hit and miss counts per key."""
+        with self._lock:
+            channels = list(self._channels.values())
+
+        return {
+            channel.key: {"hits": channel.hits, "misses": channel.misses}
+            for channel in channels
+        }
+
+    def _get_channel(self, key: str) -> TelemetryChannel:
+        with self._lock:
+            try:
+                return self._channels[key]
+            except KeyError:
+                raise KeyError(f"No telemetry registered under '{key}'")
+
+    def _ensure_stream(self, channel: TelemetryChannel):
+        """Open the stream for a channel if it is not already open."""
+        with channel.lock:
+            if channel.stream is not None:
+                return
+            stream = self.connection.add_stream(*channel.call)
+            stream.rate = channel.rate
+            channel.stream = stream
+
+        def on_update(value):
+            with channel.lock:
+                channel.value = value
+                channel.updated_at = time.monotonic()
+                callbacks = list(channel.callbacks)
+            for callback in callbacks:
+                callback(value)
+
+        stream.add_callback(on_update)
+        stream.start()
@@ -0,0 +1,144 @@
+"""Part heating rates and time to temperature limits.
+
+Tracks every part's temperature as one vector, so the heating rate and time to limit of
+the whole vessel are a handful of array operations per reading, and reports only the
+parts that have just crossed the warning threshold or are newly predicted to reach
+their limit within the horizon.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import utils
+
+np = utils.lazy_import("numpy")
+
+DEFAULT_THRESHOLD = 0.9  # fraction of a part's max temperature
+DEFAULT_HORIZON = 300.0  # s of game time
+SMOOTHING = 0.3  # weight of the newest heating rate sample
+REARM_MARGIN = 0.05  # fraction of max temperature to cool below the threshold by
+
+
+class PartThermal(BaseModel):
+    """The thermal state of a part"""
+
+    part: str = Field(description="ID of the part.")
+    title: str = Field(description="Title of the part.")
+    temperature: float = Field(description="Temperature of the part, in Kelvin.")
+    max_temperature: float = Field(
+        description="Temperature at which the part explodes, in Kelvin."
+    )
+    heating_rate: float = Field(
+        description="How fast the part is heating, in Kelvin per second of game time. Negative when cooling."
+    )
+    time_to_limit: Optional[float] = Field(
+        description="Game time until the part reaches its max temperature at its current heating rate, in seconds. None if it is not heating."
+    )
+
+
+class HeatingTracker:
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        horizon: float = DEFAULT_HORIZON,
+        smoothing: float = SMOOTHING,
+    ):
+        """Heating rate and time to limit of every part, from successive readings.
+
+        Args:
+            threshold: fraction of its max temperature above which a part is reported
+            horizon: game seconds within which a predicted breach is reported
+            smoothing: weight of the newest sample in the smoothed heating rate
+        """
+        self.threshold = threshold
+        self.horizon = horizon
+        self.smoothing = smoothing
+
+        # arrays over the parts in ids, set by the first reading
+        self.ids: List[str] = []
+        self.ut: Optional[float] = None
+        self.temperature = None
+        self.max_temperature = None
+        self.heating_rate = None
+        self.time_to_limit = None
+        self._hot = None  # reported above the threshold
+        self._breaching = None  # reported as a predicted breach
+
+    def update(
+        self,
+        ids: Sequence[str],
+        temperature: Sequence[float],
+        max_temperature: Sequence[float],
+        ut: float,
+    ) -> List[Tuple[int, str]]:
+        """Add a reading of every part at universal time ut. Returns the index and
+        reason, "threshold" or "predicted", of each part that needs reporting."""
+        ids = list(ids)
+        temperature = np.asarray(temperature, dtype=float)
+        max_temperature = np.asarray(max_temperature, dtype=float)
+
+        previous, rate, hot, breaching = self._align(ids)
+        if self.ut is not None and ut > self.ut and ids == self.ids:
+            sample = (temperature - previous) / (ut - self.ut)
+            rate = np.where(
+                np.isnan(previous),
+                0.0,
+                self.smoothing * sample + (1 - self.smoothing) * rate,
+            )
+
+        with np.errstate(divide="ignore"):
+            time_to_limit = np.where(
+                rate > 0, np.maximum(max_temperature - temperature, 0) / rate, np.inf
+            )
+
+        above = temperature >= self.threshold * max_temperature
+        rearmed = temperature < (self.threshold - REARM_MARGIN) * max_temperature
+        predicted = time_to_limit <= self.horizon
+        new_hot = above & ~hot
+        new_breaching = predicted & ~breaching & ~above
+
+        self.ids = ids
+        self.ut = ut
+        self.temperature = temperature
+        self.max_temperature = max_temperature
+        self.heating_rate = rate
+        self.time_to_limit = time_to_limit
+        self._hot = above | (hot & ~rearmed)
+        self._breaching = predicted
+
+        return [(int(i), "threshold") for i in np.flatnonzero(new_hot)] + [
+            (int(i), "predicted") for i in np.flatnonzero(new_breaching)
+        ]
+
+    def state(self, index: int, title: str) -> PartThermal:
+        time_to_limit = float(self.time_to_limit[index])
+        return PartThermal(
+            part=self.ids[index],
+            title=title,
+            temperature=float(self.temperature[index]),
+            max_temperature=float(self.max_temperature[index]),
+            heating_rate=float(self.heating_rate[index]),
+            time_to_limit=time_to_limit if np.isfinite(time_to_limit) else None,
+        )
+
+    def closest_to_limit(self, count: int) -> List[int]:
+        """Indices of the parts closest to their limit: soonest to reach it, then
+        hottest relative to it."""
+        fraction = self.temperature / np.maximum(self.max_temperature, 1e-9)
+        return [int(i) for i in np.lexsort((-fraction, self.time_to_limit))[:count]]
+
+    def _align(self, ids: List[str]):
+        """The previous temperature, heating rate and report state of each part in ids.
+        IDs are renumbered when parts are added or lost, so the parts are then tracked
+        afresh, without a previous temperature."""
+        if self.ut is not None and ids == self.ids:
+            return self.temperature, self.heating_rate, self._hot, self._breaching
+
+        count = len(ids)
+        return (
+            np.full(count, np.nan),
+            np.zeros(count),
+            np.zeros(count, dtype=bool),
+            np.zeros(count, dtype=bool),
+        )
@@ -1,11 +1,15 @@
 """Game-related utilities"""
 
+import functools
+import importlib
 import json
 import subprocess
+import sys
+import threading
 from datetime import datetime, timedelta
-from enum import Enum
+from enum import Enum, IntEnum
 from string import Template
-from typing import Optional
+from typing import Callable, Optional, Tuple, Type
 
 from cmd2 import Cmd2ArgumentParser
 from pydantic import BaseModel
@@ -22,13 +26,19 @@ class AppConfig(BaseModel):
     load_checkpoint: bool
     checkpoint_name: str
     port: int
+    simulate: bool = False
+    llm_cache: bool = True
+    llm_cache_size: int = 10_000  # responses
+    record_session: Optional[str] = None  # path to record model responses to
+    replay_session: Optional[str] = None  # path of recorded responses to replay
 
 
 def is_ksp_running():
     """Determine whether Kerbal Space Program is currently running on the system."""
     try:
         # List processes and grep for KSP
-        output = subprocess.check_output("tasklist", shell=True).decode("utf-8")
+        command = "tasklist" if sys.platform == "win32" else "ps -A"
+        output = subprocess.check_output(command, shell=True).decode("utf-8")
         return "KSP" in output
     except:
         return False
@@ -85,6 +95,14 @@ class CustomCmd2ArgumentParser(Cmd2ArgumentParser):
         """Custom parser to pipe output to poutput so the agent can process these messages."""
         super().__init__(*args, **kwargs)
         self.cmd_instance_method = cmd_instance_method
+        self._help: Tuple[int, str] = (-1, "")  # (arguments, help) when last formatted
+
+    def format_help(self) -> str:
+        """Help text, formatted once for each set of arguments as return schemas make
+        it long."""
+        if self._help[0] != len(self._actions):
+            self._help = (len(self._actions), super().format_help())
+        return self._help[1]
 
     def _print_message(self, message, file=None):
         if message:
@@ -95,7 +113,6 @@ class CustomCmd2ArgumentParser(Cmd2ArgumentParser):
 class CustomGenerateJsonSchema(GenerateJsonSchema):
     def generate(self, schema, mode="validation"):
         json_schema = super().generate(schema, mode=mode)
-        print(json.dumps(json_schema, indent=4))
         reduced_schema = json_schema["$defs"]
 
         primary_key = list(reduced_schema.keys())[0]
@@ -109,12 +126,18 @@ class CustomGenerateJsonSchema(GenerateJsonSchema):
         return reduced_schema
 
 
-def format_return_obj_str(obj: BaseModel, template: Template = None):
+@functools.lru_cache(maxsize=None)
+def model_schema(obj: Type[BaseModel]) -> dict:
+    """JSON schema of a pydantic model, generated once per process. Do not modify it."""
+    return obj.model_json_schema()
+
+
+def format_return_obj_str(obj: Type[BaseModel], template: Template = None):
     """Formats a pydantic object as a return schema string for a cmd2 argument parser epilog. Template must have $obj"""
 
     statement = "Returns:\n"
 
-    obj_schema = json.dumps(obj.model_json_schema(), indent=4)
+    obj_schema = json.dumps(model_schema(obj), indent=4)
 
     if template:
         output = statement + template.substitute(obj=obj_schema)
@@ -125,12 +148,76 @@ def format_return_obj_str(obj: BaseModel, template: Template = None):
     return output
 
 
+class LazyModule:
+    def __init__(self, name: str):
+        """Module imported on first attribute access, for heavy dependencies that are
+        not needed until a command uses them.
+
+        Args:
+            name: absolute name of the module, e.g. "pandas"
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}'>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Import a module on first use rather than now, to keep console startup fast."""
+    return LazyModule(name)
+
+
+def typechecked(func: Callable) -> Callable:
+    """Check the argument and return types of every call with beartype, which is
+    imported and applied on the first call."""
+    checked = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal checked
+        if checked is None:
+            from beartype import beartype
+
+            checked = beartype(func)
+        return checked(*args, **kwargs)
+
+    return wrapper
+
+
 class MessageType(Enum):
     CONNECT = "connect"
     DISCONNECT = "disconnect"
     COMMAND = "command"
+    OUTPUT = "output"
+    VERSION = "version"
+    END = "end"
+
+
+class Channel(Enum):
+    CONTROL = "control"  # session setup and teardown
+    COMMAND = "command"  # commands and their replies
+    ALERT = "alert"  # unsolicited notifications
+
+
+class Priority(IntEnum):
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
 
 
 class Message(BaseModel):
     type: MessageType
     data: Optional[str] = None
+    id: int = 0  # correlation ID of the command a reply belongs to, 0 if unsolicited
+    channel: Channel = Channel.COMMAND
+    priority: Priority = Priority.NORMAL
+    received_at: Optional[float] = None  # local time.monotonic() of receipt, not sent
@@ -0,0 +1,206 @@
+"""Cached model of a vessel's parts.
+
+Reading a part tree attribute by attribute takes a round trip per attribute, and
+finding each part's type probes every module attribute in turn. The model instead reads
+the static facts of every part (name, title, type, attachment and topology) in one
+batched request, and only again when the part count or the stage changes. Masses and
+temperatures, which change during flight, are streamed through the TelemetryHub.
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from llmsat.libs import krpc_snapshot
+from llmsat.libs.krpc_types import AttachmentMode, Part, PartType
+from llmsat.libs.telemetry import TelemetryHub
+
+STATIC_FIELDS = ("name", "title", "axially_attached", "parent", "max_temperature")
+DYNAMIC_FIELDS = ("mass", "temperature")
+PART_RATE = 1.0  # Hz, stream update rate of the dynamic values of each part
+
+
+class PartFacts(BaseModel):
+    """What does not change about a part while it stays attached."""
+
+    id: str
+    name: str
+    title: str
+    type: PartType
+    attachment: AttachmentMode
+    max_temperature: float
+    children: List[str] = []
+
+
+class PartsModel:
+    """Static facts of a vessel's parts, read once and refreshed when the part count or
+    the stage changes, with their masses and temperatures streamed.
+
+    Part IDs number the parts depth-first from the root part, starting at "000". One
+    model is shared by the components that read parts, like the TelemetryHub.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(PartsModel, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self, vessel=None, telemetry: TelemetryHub = None, rate: float = PART_RATE
+    ):
+        if PartsModel._initialized:
+            return
+        self.vessel = vessel
+        self.telemetry = telemetry
+        self.rates = {field: rate for field in DYNAMIC_FIELDS}  # Hz
+        self.parts: Dict[str, PartFacts] = {}  # by ID, depth-first from the root
+        self.refreshes = 0
+        self._objects: Dict[str, Any] = {}  # kRPC part by ID
+        self._signature: Optional[Tuple[int, int]] = None  # (part count, stage)
+        self._lock = threading.Lock()
+
+        # the stage and part list are streamed, so checking for changes is free
+        if "parts" not in self.telemetry:
+            self.telemetry.register(
+                "parts", getattr, vessel.parts, "all", rate=rate, max_age=math.inf
+            )
+        if "current_stage" not in self.telemetry:
+            self.telemetry.register(
+                "current_stage",
+                getattr,
+                vessel.control,
+                "current_stage",
+                max_age=math.inf,
+            )
+
+        PartsModel._initialized = True
+
+    def configure(self, field: str, rate: float):
+        """Change the stream update rate of a dynamic field of every part."""
+        with self._lock:
+            self.rates[field] = rate
+            for id in self.parts:
+                self.telemetry.configure(_key(id, field), rate=rate)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-read the static facts if the part count or the stage has changed.
+        Returns whether they were re-read."""
+        parts = self.telemetry.get("parts")
+        signature = (len(parts), self.telemetry.get("current_stage"))
+        with self._lock:
+            if not force and signature == self._signature:
+                return False
+
+            self._read(parts)
+            self._signature = signature
+            self.refreshes += 1
+        return True
+
+    def tree(self) -> Optional[Part]:
+        """The parts tree from the root part, with current masses and temperatures."""
+        self.refresh()
+        with self._lock:
+            parts = dict(self.parts)
+        if not parts:
+            return None
+
+        def build(facts: PartFacts) -> Part:
+            return Part(
+                id=facts.id,
+                name=facts.name,
+                title=facts.title,
+                type=facts.type,
+                attachment=facts.attachment,
+                mass=self.telemetry.get(_key(facts.id, "mass")),
+                temperature=self.telemetry.get(_key(facts.id, "temperature")),
+                max_temperature=facts.max_temperature,
+                children=[build(parts[child]) for child in facts.children],
+            )
+
+        return build(next(iter(parts.values())))
+
+    def readings(self, field: str) -> Dict[str, Any]:
+        """The latest value of a dynamic field of each part, by ID."""
+        self.refresh()
+        with self._lock:
+            return {id: self.telemetry.get(_key(id, field)) for id in self.parts}
+
+    def _read(self, parts: List[Any]):
+        """Read the static facts of every part in one request and stream its dynamic
+        values, replacing the streams of the parts read before."""
+        for id in self._objects:
+            for field in DYNAMIC_FIELDS:
+                self.telemetry.unregister(_key(id, field))
+        self.parts = {}
+        self._objects = {}
+        if not parts:
+            return
+
+        # every part is of the same class, so one has every module attribute
+        types = [
+            part_type for part_type in PartType if part_type.value in dir(parts[0])
+        ]
+        fields = STATIC_FIELDS + tuple(part_type.value for part_type in types)
+        values = krpc_snapshot.fetch(
+            (part, field) for part in parts for field in fields
+        )
+        rows = [
+            dict(zip(fields, values[i : i + len(fields)]))
+            for i in range(0, len(values), len(fields))
+        ]
+
+        index = {part: i for i, part in enumerate(parts)}
+        children: List[List[int]] = [[] for _ in parts]
+        root = 0
+        for i, row in enumerate(rows):
+            parent = row["parent"]
+            if parent is None or parent not in index:
+                root = i
+            else:
+                children[index[parent]].append(i)
+
+        order = []
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            stack.extend(reversed(children[i]))
+        ids = {i: f"{number:03}" for number, i in enumerate(order)}
+
+        for i in order:
+            row = rows[i]
+            id = ids[i]
+            self.parts[id] = PartFacts(
+                id=id,
+                name=row["name"],
+                title=row["title"],
+                type=next(
+                    (t for t in types if row[t.value] is not None), PartType.NONE
+                ),
+                attachment=(
+                    AttachmentMode.AXIAL
+                    if row["axially_attached"]
+                    else AttachmentMode.RADIAL
+                ),
+                max_temperature=row["max_temperature"],
+                children=[ids[child] for child in children[i]],
+            )
+            self._objects[id] = parts[i]
+            for field in DYNAMIC_FIELDS:
+                self.telemetry.register(
+                    _key(id, field),
+                    getattr,
+                    parts[i],
+                    field,
+                    rate=self.rates[field],
+                    max_age=math.inf,
+                )
+
+
+def _key(id: str, field: str) -> str:
+    return f"part/{id}/{field}"
@@ -0,0 +1,155 @@
+"""Eclipse and line-of-sight intervals.
+
+The orbited body blocks the line of sight from the vessel to a distant target, the sun
+for an eclipse or another body for an occultation, whenever the vessel is within the
+body's cylindrical shadow cast away from the target. Every orbit of the horizon is
+sampled in one vectorized pass, and the entry and exit times found between samples are
+refined together by bisection, so many orbits cost a few array operations.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from typing import List, Tuple
+
+from pydantic import BaseModel, Field
+
+from llmsat.libs import kepler, utils
+
+np = utils.lazy_import("numpy")
+
+SAMPLES_PER_ORBIT = 720  # intervals shorter than 1/720 of an orbit may be missed
+TOLERANCE = 0.1  # s, of the refined entry and exit times
+
+
+class OccultationInterval(BaseModel):
+    """A time interval during which the orbited body blocks the line of sight to the
+    target"""
+
+    start: datetime = Field(
+        description="Universal time the line of sight is lost. The start of the search if it was already lost."
+    )
+    end: datetime = Field(
+        description="Universal time the line of sight is regained. The end of the search if it is still lost then."
+    )
+    duration: float = Field(description="Duration of the interval, in seconds.")
+
+
+class OccultationReport(BaseModel):
+    """When the orbited body blocks the line of sight to a target, e.g. the eclipses
+    when the target is the sun"""
+
+    body: str = Field(description="The celestial body being orbited.")
+    target: str = Field(description="The celestial body the line of sight is to.")
+    start: datetime = Field(description="Universal time the search starts.")
+    end: datetime = Field(description="Universal time the search ends.")
+    intervals: List[OccultationInterval] = Field(
+        description="Intervals during which the line of sight is blocked, in order."
+    )
+    blocked_fraction: float = Field(
+        description="Fraction of the search during which the line of sight is blocked."
+    )
+    evaluations: int = Field(
+        description="Number of orbit state evaluations used for the search."
+    )
+
+
+def blocked_intervals(
+    elements: kepler.OrbitalElements,
+    direction,
+    start: float,
+    end: float,
+    samples_per_orbit: int = SAMPLES_PER_ORBIT,
+    tolerance: float = TOLERANCE,
+) -> Tuple[List[Tuple[float, float]], int]:
+    """The (start, end) universal times of every interval within [start, end] during
+    which the body blocks the line of sight in direction, and the number of orbit
+    state evaluations used.
+
+    Args:
+        elements: orbit of the vessel
+        direction: vector from the body to the target, in the frame of
+            kepler.propagate, taken as fixed over [start, end]
+        samples_per_orbit: grid points per orbital period of the first pass
+        tolerance: seconds to refine entry and exit times to
+    """
+    if end < start:
+        raise ValueError("end must be after start")
+    if end == start:
+        return [], 0
+
+    def blocked(ut: np.ndarray) -> np.ndarray:
+        position = kepler.propagate(elements, ut)["position"]
+        return kepler.in_shadow(position, direction, elements.body_radius)
+
+    period = elements.period
+    if not math.isfinite(period):  # a single pass, sampled as finely as one orbit
+        period = end - start
+    count = max(math.ceil((end - start) / period * samples_per_orbit), 1) + 1
+    ut = np.linspace(start, end, count)
+    state = blocked(ut)
+    evaluations = count
+
+    # bracket every change of state between samples and bisect them all at once
+    changes = np.flatnonzero(state[1:] != state[:-1])
+    low = ut[changes]
+    high = ut[changes + 1]
+    entering = ~state[changes]
+    if changes.size:
+        step = (end - start) / (count - 1)
+        for _ in range(max(math.ceil(math.log2(step / tolerance)), 0)):
+            middle = (low + high) / 2
+            moved = blocked(middle) == entering  # the change is before the middle
+            high = np.where(moved, middle, high)
+            low = np.where(moved, low, middle)
+            evaluations += changes.size
+    crossings = (low + high) / 2
+
+    entries = list(crossings[entering])
+    exits = list(crossings[~entering])
+    if state[0]:
+        entries.insert(0, start)
+    if state[-1]:
+        exits.append(end)
+
+    return [(float(a), float(b)) for a, b in zip(entries, exits)], evaluations
+
+
+def occultation_report(
+    elements: kepler.OrbitalElements,
+    direction,
+    target: str,
+    start: float,
+    end: float,
+    samples_per_orbit: int = SAMPLES_PER_ORBIT,
+) -> OccultationReport:
+    """Find when the body blocks the line of sight to the target within [start, end].
+
+    The direction to the target is fixed over the search, so the search should be
+    short compared with the period of the body and target around each other: the
+    shadow turns by 360 degrees over that period, about 1 degree over 10 low orbits
+    of Kerbin for the sun. For a moon as the target it is only approximate beyond
+    a fraction of an orbit of the moon.
+    """
+    intervals, evaluations = blocked_intervals(
+        elements, direction, start, end, samples_per_orbit=samples_per_orbit
+    )
+    blocked = sum(b - a for a, b in intervals)
+
+    return OccultationReport(
+        body=elements.body,
+        target=target,
+        start=utils.ksp_ut_to_datetime(start),
+        end=utils.ksp_ut_to_datetime(end),
+        intervals=[
+            OccultationInterval(
+                start=utils.ksp_ut_to_datetime(a),
+                end=utils.ksp_ut_to_datetime(b),
+                duration=b - a,
+            )
+            for a, b in intervals
+        ],
+        blocked_fraction=blocked / (end - start) if end > start else 0.0,
+        evaluations=evaluations,
+    )
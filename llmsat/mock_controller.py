@@ -1,6 +1,110 @@
+import argparse
+import collections
+import itertools
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
 import zmq
 
-from llmsat.libs import utils
+from llmsat.libs import protocol, utils
+from llmsat.libs.dispatch import Dispatcher
+from llmsat.libs.mission_script import (
+    DEFAULT_SCRIPT,
+    command_name,
+    format_latency_report,
+    load_script,
+)
+
+CONNECT_TIMEOUT = 10  # seconds
+COMMAND_TIMEOUT = 30  # seconds
+
+
+class ScriptedController:
+    """Controller that plays the commands of a mission script to the console, keeping
+    up to window commands in flight, and measures how long each takes."""
+
+    def __init__(self, port: int = 5556, host: str = "localhost"):
+        self.dispatcher = Dispatcher(on_version=self.on_version)
+        self.protocol_version = protocol.PROTOCOL_VERSION
+        self.send_lock = threading.Lock()
+        self.socket = zmq.Context.instance().socket(zmq.PAIR)
+        self.socket.connect(f"tcp://{host}:{port}")
+        threading.Thread(
+            name="controller-receive-message", target=self.receive_message, daemon=True
+        ).start()
+
+    def on_version(self, version: int):
+        self.protocol_version = version
+
+    def send_message(self, message: utils.Message, version: int = None):
+        with self.send_lock:
+            protocol.send(self.socket, message, version or self.protocol_version)
+
+    def receive_message(self):
+        while True:
+            self.dispatcher.dispatch(protocol.recv(self.socket))
+
+    def connect(self) -> str:
+        """Start a console session. Returns the dashboard."""
+        dashboard = self.dispatcher.expect_connection()
+        self.send_message(
+            utils.Message(
+                type=utils.MessageType.CONNECT, data=self.dispatcher.connect_payload()
+            ),
+            version=1,
+        )
+        return dashboard.result(CONNECT_TIMEOUT)
+
+    def disconnect(self):
+        self.send_message(utils.Message(type=utils.MessageType.DISCONNECT))
+
+    def play(
+        self, commands: List[str], repeat: int = 1, window: int = 1
+    ) -> Dict[str, List[float]]:
+        """Run the commands repeat times over. Returns the seconds from sending each
+        command to receiving the end of its output, by command."""
+        if self.protocol_version < protocol.STREAMING_VERSION:
+            raise ValueError(
+                f"Console protocol version {self.protocol_version} cannot correlate replies"
+            )
+
+        latencies: Dict[str, List[float]] = {}
+        in_flight = collections.deque()
+        for command in itertools.chain.from_iterable(
+            itertools.repeat(commands, repeat)
+        ):
+            if len(in_flight) >= window:
+                self._finish(in_flight.popleft(), latencies)
+            stream = self.dispatcher.open(command)
+            self.send_message(
+                utils.Message(
+                    type=utils.MessageType.COMMAND, data=command, id=stream.id
+                )
+            )
+            in_flight.append(stream)
+        while in_flight:
+            self._finish(in_flight.popleft(), latencies)
+        return latencies
+
+    @staticmethod
+    def _finish(stream, latencies: Dict[str, List[float]]):
+        stream.result(COMMAND_TIMEOUT)
+        latencies.setdefault(command_name(stream.command), []).append(
+            stream.finished_at - stream.opened_at
+        )
+
+
+def play_script(args):
+    commands = load_script(args.script) if args.script else DEFAULT_SCRIPT
+    controller = ScriptedController(args.port)
+    controller.connect()
+    start = time.perf_counter()
+    latencies = controller.play(commands, args.repeat, args.window)
+    elapsed = time.perf_counter() - start
+    controller.disconnect()
+    print(format_latency_report(latencies, elapsed))
 
 
 def main():
@@ -20,10 +124,28 @@ def main():
             or None
         )
 
+        if message_type == utils.MessageType.CONNECT and data_input is None:
+            data_input = protocol.offer_versions()
+
         message = utils.Message(type=message_type, data=data_input)
-        socket.send_pyobj(message)
+        protocol.send(socket, message)
         print("Message sent to the server.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Send messages to the console by hand, or play a mission script"
+    )
+    parser.add_argument("--script", type=Path, help="mission script to play")
+    parser.add_argument(
+        "--play", action="store_true", help="play the script, or the default one"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--window", type=int, default=1, help="commands in flight")
+    parser.add_argument("--port", type=int, default=5556)
+    args = parser.parse_args()
+
+    if args.play or args.script:
+        play_script(args)
+    else:
+        main()
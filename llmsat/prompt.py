@@ -33,3 +33,5 @@ Action:
 }}}}
 ```"""
 SUFFIX = """Consider risk to yourself and the mission when making plans and decisions. Be concise in your thoughts and constrain them to no longer than a few sentences. Consider your limited resources. Remember to ALWAYS respond with a valid json blob of a single action. Use tools if necessary. All quantities are expressed in base units (e.g. lengths are in meters in function arguments and return values). DO NOT communicate with mission control or terminate the console session unless you are absolutely certain a mission cannot be met. If you go to sleep without setting an alarm and there are no upcoming notifications, you may not wake up and will fail the mission."""
+INTERRUPTED = "I was interrupted by a notification."
+NOTIFIED = "A notification arrived."
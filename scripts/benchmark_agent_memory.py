@@ -0,0 +1,269 @@
+"""Benchmark the agent's prompt size and step latency on a replayed session.
+
+Replays a recorded agent session (scripts/input.txt by default) through the agent
+manager twice, as two consecutive console sessions: a scripted chat model gives the
+recorded responses, and an in-process stand-in for the console answers commands with
+the recorded observations and sends the simulated console's dashboard on connect. Each
+step's prompt tokens and latency are reported with unbounded memory, which keeps the
+whole conversation verbatim, and with the token-budgeted memory.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_agent_memory.py
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import zmq
+from langchain_core.language_models.fake_chat_models import (
+    FakeListChatModel,
+    GenericFakeChatModel,
+)
+from langchain_core.messages import AIMessage
+
+from llmsat.agent_manager import MEMORY_TOKEN_LIMIT, STEPS_TOKEN_LIMIT, AgentManager
+from llmsat.libs import protocol, utils
+from llmsat.libs.agent_memory import TokenBudgetMemory, estimate_tokens
+
+TRANSCRIPT_PATH = Path("scripts/input.txt")
+SUMMARY = "The agent completed an earlier session of the same mission."
+ACTION = re.compile(r'"action":\s*"([^"]+)"')
+
+
+def parse_transcript(path: Path) -> List[Tuple[str, str]]:
+    """The (response, observation) steps of a recorded session. The last response is
+    the final answer and has no observation."""
+    parts = path.read_text().split("Observation:")
+    steps = []
+    response = parts[0]
+    for part in parts[1:]:
+        observation, _, next_response = part.partition("\nThought:")
+        steps.append((response.strip(), observation.strip()))
+        response = next_response
+    steps.append((response.strip(), ""))
+    return steps
+
+
+def simulated_dashboard(port: int) -> str:
+    """The dashboard of a console connected to simulated KSP."""
+    from llmsat.console import (
+        AlarmManager,
+        AutopilotService,
+        CommunicationService,
+        Console,
+        ExperimentManager,
+        OrbitPropagator,
+        SpacecraftManager,
+        TaskManager,
+    )
+    from llmsat.libs import krpc_sim
+
+    connection = krpc_sim.SimConnection()
+    console = Console(
+        port=port,
+        quiet=True,
+        command_sets=[
+            cls(connection)
+            for cls in (
+                SpacecraftManager,
+                AutopilotService,
+                ExperimentManager,
+                TaskManager,
+                CommunicationService,
+                AlarmManager,
+                OrbitPropagator,
+            )
+        ],
+    )
+    console.get_output()
+    console.display_dashboard()
+    return console.get_output()
+
+
+class ReplayConsole:
+    """Answers commands with recorded observations, in order."""
+
+    def __init__(self, port: int, dashboard: str):
+        self.dashboard = dashboard
+        self.observations: List[str] = []
+        self.socket = zmq.Context.instance().socket(zmq.PAIR)
+        self.socket.bind(f"tcp://127.0.0.1:{port}")
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def send(self, message: utils.Message, version: int = protocol.PROTOCOL_VERSION):
+        with self.lock:
+            protocol.send(self.socket, message, version)
+
+    def serve(self):
+        while True:
+            message = protocol.recv(self.socket)
+            if message.type == utils.MessageType.CONNECT:
+                version = protocol.negotiate_version(message.data)
+                for type, data in [
+                    (utils.MessageType.VERSION, str(version)),
+                    (utils.MessageType.OUTPUT, self.dashboard),
+                ]:
+                    self.send(
+                        utils.Message(
+                            type=type, data=data, channel=utils.Channel.CONTROL
+                        ),
+                        version,
+                    )
+            elif message.type == utils.MessageType.COMMAND:
+                output = self.observations.pop(0) if self.observations else ""
+                self.send(
+                    utils.Message(
+                        type=utils.MessageType.OUTPUT, data=output, id=message.id
+                    )
+                )
+                self.send(utils.Message(type=utils.MessageType.END, id=message.id))
+
+    def notify(self, text: str):
+        self.send(
+            utils.Message(
+                type=utils.MessageType.OUTPUT, data=text, channel=utils.Channel.ALERT
+            )
+        )
+
+
+class ReplayChatModel(GenericFakeChatModel):
+    """Gives the recorded responses, recording the size and time of each prompt, and
+    has the console send the recorded notification when a response goes to sleep."""
+
+    console: Any
+    notifications: List[str] = []
+    calls: List[Tuple[float, int]] = []  # (start time, prompt tokens)
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        self.calls.append((time.perf_counter(), tokens))
+        result = await super()._agenerate(messages, *args, **kwargs)
+        if ACTION.findall(result.generations[0].message.content) == ["sleep"]:
+            threading.Timer(
+                0.01, self.console.notify, [self.notifications.pop(0)]
+            ).start()
+        return result
+
+
+async def replay(steps, dashboard: str, memory_kwargs: dict, port: int, sessions: int):
+    AgentManager._instance = None
+    AgentManager._initialized = False
+
+    console = ReplayConsole(port, dashboard)
+    responses = [response for response, _ in steps] * sessions
+    llm = ReplayChatModel(
+        messages=iter(AIMessage(content=response) for response in responses),
+        console=console,
+    )
+    manager = AgentManager("", "", None, None, port, llm=llm)
+    summarizer = FakeListChatModel(responses=[SUMMARY])
+    manager.memory = TokenBudgetMemory(
+        llm=summarizer, return_messages=True, **memory_kwargs
+    )
+    manager.agent.memory = manager.memory
+
+    receiver = asyncio.create_task(manager.receive_message())
+    results = []
+    for _ in range(sessions):
+        for response, observation in steps:
+            action = ACTION.findall(response)
+            if action == ["run"]:
+                console.observations.append(observation)
+            elif action == ["sleep"]:
+                llm.notifications.append(observation)
+
+        connection = asyncio.wrap_future(manager.dispatcher.expect_connection())
+        await manager.send_message(
+            utils.Message(
+                type=utils.MessageType.CONNECT, data=protocol.offer_versions()
+            ),
+            version=1,
+        )
+        llm.calls.clear()
+        await manager.run_session(manager.memory.deduplicate(await connection))
+        end = time.perf_counter()
+
+        starts = [start for start, _ in llm.calls] + [end]
+        results.append(
+            [
+                (tokens, starts[i + 1] - start)
+                for i, (start, tokens) in enumerate(llm.calls)
+            ]
+        )
+    receiver.cancel()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--transcript", type=Path, default=TRANSCRIPT_PATH)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--memory-tokens", type=int, default=MEMORY_TOKEN_LIMIT)
+    parser.add_argument("--steps-tokens", type=int, default=STEPS_TOKEN_LIMIT)
+    parser.add_argument("--port", type=int, default=5595)
+    args = parser.parse_args()
+
+    steps = parse_transcript(args.transcript)
+    with tempfile.TemporaryDirectory() as directory:
+        # the console reads the mission from disk/ and writes its task database there
+        cwd = os.getcwd()
+        shutil.copytree("disk", Path(directory, "disk"))
+        os.chdir(directory)
+        try:
+            dashboard = simulated_dashboard(args.port - 1)
+        finally:
+            os.chdir(cwd)
+
+    unbounded = 10**9
+    configs = {
+        "unbounded": dict(
+            max_token_limit=unbounded,
+            steps_token_limit=unbounded,
+            pinned_prefixes=(),
+            min_section_tokens=unbounded,
+        ),
+        "budgeted": dict(
+            max_token_limit=args.memory_tokens, steps_token_limit=args.steps_tokens
+        ),
+    }
+    results = {
+        name: asyncio.run(
+            replay(steps, dashboard, kwargs, args.port + i, args.sessions)
+        )
+        for i, (name, kwargs) in enumerate(configs.items())
+    }
+
+    print(f"{'session':>7} {'step':>4}", end="")
+    for name in configs:
+        print(f" {name + ' tokens':>18} {'ms':>7}", end="")
+    print()
+    for session in range(args.sessions):
+        for step in range(len(results["budgeted"][session])):
+            print(f"{session + 1:>7} {step + 1:>4}", end="")
+            for name in configs:
+                tokens, latency = results[name][session][step]
+                print(f" {tokens:>18} {latency * 1000:>7.1f}", end="")
+            print()
+
+    for name in configs:
+        steps_run = [step for session in results[name] for step in session]
+        total = sum(tokens for tokens, _ in steps_run)
+        print(
+            f"{name}: {total} prompt tokens in {len(steps_run)} steps, "
+            f"{total / len(steps_run):.0f} per step, "
+            f"max {max(tokens for tokens, _ in steps_run)}"
+        )
+    print(f"Dashboard: {estimate_tokens(dashboard)} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the kRPC traffic generated by the alarm monitor while idle.
+
+Compares the previous busy-polling loop, which re-fetched every Kerbal Alarm Clock
+alarm on each iteration, against the event-driven AlarmManager scheduler.
+KSP must be running with a flight scene loaded, unless run with --sim.
+
+Usage:
+    python scripts/benchmark_alarm_polling.py --duration 60 --alarms 10
+"""
+
+import argparse
+import threading
+import time
+from datetime import timedelta
+
+from llmsat.components.alarm_manager import AlarmManager
+from llmsat.libs import krpc_sim, utils
+from llmsat.libs.profiling import RPCCounter
+
+
+def legacy_monitor(manager: AlarmManager, stop: threading.Event):
+    """The busy-polling loop AlarmManager.monitor_alarms used to run."""
+    while not stop.is_set():
+        current_time = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+        for alarm in manager.get_alarms().values():
+            alarm.get_remaining_time(current_time) <= timedelta(0)
+
+
+def measure_rpc_rate(counter: RPCCounter, duration: float, target=None) -> float:
+    """RPC requests per second over the given duration, optionally running target."""
+    stop = threading.Event()
+    thread = None
+    if target is not None:
+        thread = threading.Thread(target=target, args=[stop], daemon=True)
+
+    counter.reset()
+    start = time.perf_counter()
+    if thread is not None:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    count = counter.count
+    if thread is not None:
+        thread.join()
+
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60, help="seconds per run")
+    parser.add_argument("--alarms", type=int, default=10, help="idle alarms to create")
+    parser.add_argument(
+        "--sim", action="store_true", help="run against the simulated kRPC backend"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.001, help="simulated seconds per RPC"
+    )
+    args = parser.parse_args()
+
+    connection = krpc_sim.connect("Benchmark", simulate=args.sim, latency=args.latency)
+    manager = AlarmManager(connection, remove_alarms_on_init=False)
+
+    # alarms far enough in the future that none trigger during the benchmark
+    now = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+    alarms = [
+        manager.add_alarm(
+            name=f"benchmark-{i}", time=now + timedelta(days=365), description=None
+        )
+        for i in range(args.alarms)
+    ]
+
+    try:
+        with RPCCounter(connection) as counter:
+            # the event-driven monitor is already running inside AlarmManager
+            after = measure_rpc_rate(counter, args.duration)
+            before = measure_rpc_rate(
+                counter,
+                args.duration,
+                target=lambda stop: legacy_monitor(manager, stop),
+            )
+    finally:
+        for alarm in alarms:
+            alarm.obj.remove()
+        connection.close()
+
+    print(f"Idle alarm monitor with {args.alarms} alarm(s) over {args.duration}s:")
+    print(f"  busy-polling loop:  {before:10.1f} RPC/s")
+    print(f"  event-driven:       {after:10.1f} RPC/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark how quickly the agent reacts to alerts from the console.
+
+Runs the agent manager against an in-process stand-in for the console and a scripted
+chat model, and measures the time from the console sending an alert to the agent being
+handed it: while the agent is asleep, and while it is busy generating a response for
+alerts that preempt the response and for alerts that wait for it.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_alert_latency.py --trials 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+
+import zmq
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from llmsat.agent_manager import AgentManager
+from llmsat.libs import protocol, utils
+
+SLEEP = 'Action:\n```\n{"action": "sleep", "action_input": {}}\n```'
+FINAL_ANSWER = 'Action:\n```\n{"action": "Final Answer", "action_input": "Done"}\n```'
+
+
+class SlowChatModel(GenericFakeChatModel):
+    """Replays scripted responses, taking think_time seconds to produce each."""
+
+    think_time: float = 0.0
+
+    async def _agenerate(self, *args, **kwargs):
+        await asyncio.sleep(self.think_time)
+        return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        await asyncio.sleep(self.think_time)
+        for chunk in self._stream(*args, **kwargs):
+            yield chunk
+
+
+class Console:
+    """Answers the agent's CONNECT and sends alerts on request."""
+
+    def __init__(self, port: int):
+        self.socket = zmq.Context.instance().socket(zmq.PAIR)
+        self.socket.bind(f"tcp://127.0.0.1:{port}")
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def send(self, message: utils.Message, version: int = protocol.PROTOCOL_VERSION):
+        with self.lock:
+            protocol.send(self.socket, message, version)
+
+    def serve(self):
+        while True:
+            message = protocol.recv(self.socket)
+            if message.type == utils.MessageType.CONNECT:
+                version = protocol.negotiate_version(message.data)
+                for type, data in [
+                    (utils.MessageType.VERSION, str(version)),
+                    (utils.MessageType.OUTPUT, "dashboard"),
+                ]:
+                    self.send(
+                        utils.Message(
+                            type=type, data=data, channel=utils.Channel.CONTROL
+                        ),
+                        version,
+                    )
+
+    def alert(self, delay: float, priority: utils.Priority, sent_at: list):
+        time.sleep(delay)
+        sent_at.append(time.monotonic())
+        self.send(
+            utils.Message(
+                type=utils.MessageType.OUTPUT,
+                data="Alarm triggered",
+                channel=utils.Channel.ALERT,
+                priority=priority,
+            )
+        )
+
+
+async def trial(
+    manager: AgentManager, console: Console, delay: float, priority: utils.Priority
+) -> float:
+    sent_at = []
+    threading.Thread(target=console.alert, args=[delay, priority, sent_at]).start()
+    await manager.run_session("dashboard")
+    return manager.reactions[-1].reacted_at - sent_at[0]
+
+
+async def benchmark(trials: int, think_time: float, port: int):
+    console = Console(port)
+    responses = itertools.cycle(
+        [
+            # asleep when the alert arrives
+            SLEEP,
+            FINAL_ANSWER,
+            # busy, the first response is preempted before it is produced
+            FINAL_ANSWER,
+            # busy, the alert is handled after the first response
+            FINAL_ANSWER,
+            FINAL_ANSWER,
+        ]
+    )
+    llm = SlowChatModel(
+        messages=(AIMessage(content=response) for response in responses),
+        think_time=think_time,
+    )
+    manager = AgentManager("", "", None, None, port, llm=llm)
+
+    receiver = asyncio.create_task(manager.receive_message())
+    connection = asyncio.wrap_future(manager.dispatcher.expect_connection())
+    await manager.send_message(
+        utils.Message(type=utils.MessageType.CONNECT, data=protocol.offer_versions()),
+        version=1,
+    )
+    await connection
+
+    scenarios = {
+        "asleep": (think_time * 1.5, utils.Priority.HIGH),
+        "busy, HIGH": (think_time / 2, utils.Priority.HIGH),
+        "busy, NORMAL": (think_time / 2, utils.Priority.NORMAL),
+    }
+    latencies = {name: [] for name in scenarios}
+    for _ in range(trials):
+        for name, (delay, priority) in scenarios.items():
+            latencies[name].append(await trial(manager, console, delay, priority))
+    receiver.cancel()
+
+    print(f"{'agent state':<14} {'median':>10} {'max':>10}")
+    for name, values in latencies.items():
+        print(
+            f"{name:<14} {statistics.median(values) * 1000:>8.2f}ms {max(values) * 1000:>8.2f}ms"
+        )
+    print(
+        f"Model responses take {think_time * 1000:.0f}ms, alerts arrive halfway through"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument(
+        "--think-time", type=float, default=0.2, help="seconds per model response"
+    )
+    parser.add_argument("--port", type=int, default=5598)
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.trials, args.think_time, args.port))
+
+
+if __name__ == "__main__":
+    main()
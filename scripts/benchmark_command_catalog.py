@@ -0,0 +1,126 @@
+"""Benchmark console import time and the cost of help and the dashboard.
+
+Import time is measured in fresh interpreters. The rest runs on a console in-process on
+simulated KSP: the first dashboard, which builds the command list, later dashboards,
+'help -v' and '<command> -h' for every command.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_command_catalog.py
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+IMPORT = "import time; start = time.perf_counter(); import llmsat.console; print(time.perf_counter() - start)"
+
+
+def import_time(runs: int) -> float:
+    return statistics.median(
+        float(
+            subprocess.run(
+                [sys.executable, "-c", IMPORT],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        )
+        for _ in range(runs)
+    )
+
+
+def timed(function, runs: int = 1) -> float:
+    """Median seconds per call."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5591)
+    args = parser.parse_args()
+
+    print(f"import llmsat.console: {import_time(args.runs) * 1000:.0f} ms")
+
+    from llmsat.console import (
+        AlarmManager,
+        AutopilotService,
+        CommunicationService,
+        Console,
+        ExperimentManager,
+        OrbitPropagator,
+        SpacecraftManager,
+        TaskManager,
+    )
+    from cmd2.constants import CMD_ATTR_ARGPARSER
+
+    from llmsat.libs import krpc_sim
+
+    logging.disable(logging.INFO)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # the console reads the mission from disk/ and writes its task database there
+        shutil.copytree("disk", Path(directory, "disk"))
+        os.chdir(directory)
+        try:
+            connection = krpc_sim.SimConnection()
+            console = Console(
+                port=args.port,
+                quiet=True,
+                command_sets=[
+                    cls(connection)
+                    for cls in (
+                        SpacecraftManager,
+                        AutopilotService,
+                        ExperimentManager,
+                        TaskManager,
+                        CommunicationService,
+                        AlarmManager,
+                        OrbitPropagator,
+                    )
+                ],
+            )
+            console.get_output()
+
+            def run(command):
+                console.onecmd_plus_hooks(command)
+                console.get_output()
+
+            def dashboard():
+                console.display_dashboard()
+                console.get_output()
+
+            commands = [  # '-h' runs commands without a parser
+                command
+                for command in sorted(console.get_visible_commands())
+                if hasattr(console.cmd_func(command), CMD_ATTR_ARGPARSER)
+            ]
+            results = {
+                "first dashboard": timed(dashboard),
+                "dashboard": timed(dashboard, 20),
+                "help -v": timed(lambda: run("help -v"), 20),
+                f"<command> -h, {len(commands)} commands": timed(
+                    lambda: [run(f"{command} -h") for command in commands], 5
+                ),
+            }
+        finally:
+            os.chdir(cwd)
+
+    for name, seconds in results.items():
+        print(f"{name}: {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark console startup: the time and kRPC requests until the prompt.
+
+Each run starts a fresh interpreter, which imports the console, builds its components
+on simulated KSP with a large vessel and displays the first dashboard, as the console
+does before its first prompt.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_console_startup.py --parts 200
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+def start_console(args) -> list:
+    """Start the console as its main does, in this process. Returns the phases."""
+    import logging
+
+    from llmsat.libs.profiling import StartupProfile
+
+    profile = StartupProfile()
+    with profile.phase("import llmsat.console"):
+        import llmsat.console as console
+
+    from llmsat.libs import krpc_sim
+
+    logging.disable(logging.INFO)
+    connection = krpc_sim.SimConnection(latency=args.latency, part_count=args.parts)
+    profile.count_rpcs(connection)
+    command_sets = []
+    for cls in (
+        console.SpacecraftManager,
+        console.AutopilotService,
+        console.ExperimentManager,
+        console.TaskManager,
+        console.CommunicationService,
+        console.AlarmManager,
+        console.OrbitPropagator,
+        console.ThermalMonitor,
+        console.EPS,
+    ):
+        with profile.phase(cls.__name__):
+            command_sets.append(cls(connection))
+    with profile.phase("Console"):
+        app = console.Console(port=args.port, quiet=True, command_sets=command_sets)
+    with profile.phase("dashboard"):
+        app.preloop()
+    profile.stop()
+    return profile.phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--parts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.001, help="s per RPC")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5594)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(start_console(args)))
+        return
+
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        # the console reads the mission from disk/ and writes its task database there
+        shutil.copytree("disk", Path(directory, "disk"))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.getcwd(), "llmsat"]))
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"]
+                + ["--parts", str(args.parts), "--latency", str(args.latency)]
+                + ["--port", str(args.port)],
+                cwd=directory,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(
+        f"{args.parts} parts, {args.latency * 1000:g} ms per RPC, median of {args.runs}"
+    )
+    print(f"{'phase':<24} {'ms':>8} {'RPCs':>6}")
+    total = 0.0
+    for index, (name, _, rpcs) in enumerate(runs[0]):
+        seconds = statistics.median(run[index][1] for run in runs)
+        total += seconds
+        count = "-" if rpcs is None else str(rpcs)
+        print(f"{name:<24} {seconds * 1000:>8.1f} {count:>6}")
+    print(f"{'total':<24} {total * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
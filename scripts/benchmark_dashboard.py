@@ -0,0 +1,96 @@
+"""Benchmark the console's dashboard: controller connect latency and size.
+
+Starts the console in-process on simulated KSP and connects a controller to it several
+times, as a returning agent would. The first connect receives the whole dashboard and
+each reconnect only the sections that changed since the previous one.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_dashboard.py --connects 20
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from llmsat.libs import krpc_sim
+from llmsat.libs.agent_memory import estimate_tokens
+
+
+def start_console(port: int):
+    from llmsat.console import (
+        AlarmManager,
+        AutopilotService,
+        CommunicationService,
+        Console,
+        ExperimentManager,
+        OrbitPropagator,
+        SpacecraftManager,
+        TaskManager,
+    )
+
+    connection = krpc_sim.SimConnection()
+    return Console(
+        port=port,
+        quiet=True,
+        command_sets=[
+            cls(connection)
+            for cls in (
+                SpacecraftManager,
+                AutopilotService,
+                ExperimentManager,
+                TaskManager,
+                CommunicationService,
+                AlarmManager,
+                OrbitPropagator,
+            )
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--connects", type=int, default=20)
+    parser.add_argument("--port", type=int, default=5593)
+    args = parser.parse_args()
+
+    from llmsat.mock_controller import ScriptedController
+
+    logging.disable(logging.INFO)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # the console reads the mission from disk/ and writes its task database there
+        shutil.copytree("disk", Path(directory, "disk"))
+        os.chdir(directory)
+        try:
+            start_console(args.port)
+            controller = ScriptedController(args.port)
+            results = []  # (seconds, dashboard)
+            for _ in range(args.connects):
+                start = time.perf_counter()
+                dashboard = controller.connect()
+                results.append((time.perf_counter() - start, dashboard))
+                controller.disconnect()
+        finally:
+            os.chdir(cwd)
+
+    first_latency, first = results[0]
+    reconnects = results[1:]
+    print(f"{'':>10} {'connect ms':>10} {'chars':>7} {'tokens':>7}")
+    print(
+        f"{'first':>10} {first_latency * 1000:>10.2f} {len(first):>7} "
+        f"{estimate_tokens(first):>7}"
+    )
+    if reconnects:
+        latency = statistics.median(seconds for seconds, _ in reconnects)
+        size = statistics.median(len(dashboard) for _, dashboard in reconnects)
+        tokens = statistics.median(estimate_tokens(text) for _, text in reconnects)
+        print(f"{'reconnect':>10} {latency * 1000:>10.2f} {size:>7.0f} {tokens:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark finding eclipses over many orbits: a dense time grid versus the sweep.
+
+The dense grid evaluates the orbit every second and reads the eclipse entry and exit
+times off the samples. The sweep samples each orbit coarsely and bisects the entries
+and exits it brackets, all at once. Both run locally from one snapshot of the orbit of
+simulated KSP; the benchmark reports the time, orbit state evaluations and largest
+difference between the two in entry and exit times.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_eclipse_search.py --orbits 10 100
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from llmsat.components.orbit_propagator import OrbitPropagator
+from llmsat.libs import kepler, krpc_sim, visibility
+
+
+def dense_intervals(elements, direction, start: float, end: float, step: float = 1.0):
+    """Eclipse (start, end) times read off samples step seconds apart."""
+    ut = np.arange(start, end, step)
+    position = kepler.propagate(elements, ut)["position"]
+    shadow = kepler.in_shadow(position, direction, elements.body_radius)
+    changes = np.flatnonzero(shadow[1:] != shadow[:-1]) + 1
+    entries = list(ut[changes][shadow[changes]])
+    exits = list(ut[changes][~shadow[changes]])
+    if shadow[0]:
+        entries.insert(0, start)
+    if shadow[-1]:
+        exits.append(end)
+    return list(zip(entries, exits)), len(ut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--orbits", type=int, nargs="+", default=[10, 100])
+    args = parser.parse_args()
+
+    connection = krpc_sim.SimConnection()
+    propagator = OrbitPropagator(connection)
+    elements = propagator.get_orbital_elements()
+    direction = propagator.get_sun_direction(elements)
+    start = connection.space_center.ut
+    connection.close()
+
+    print(f"period {elements.period:.0f} s")
+    print(f"{'orbits':>6} {'':>6} {'ms':>9} {'evaluations':>12} {'max error s':>12}")
+    for orbits in args.orbits:
+        end = start + orbits * elements.period
+        results = {}
+        for name, function in (
+            ("dense", dense_intervals),
+            ("sweep", visibility.blocked_intervals),
+        ):
+            began = time.perf_counter()
+            intervals, evaluations = function(elements, direction, start, end)
+            results[name] = (time.perf_counter() - began, evaluations, intervals)
+
+        error = max(
+            abs(a - b)
+            for dense, sweep in zip(results["dense"][2], results["sweep"][2])
+            for a, b in zip(dense, sweep)
+        )
+        for name, (seconds, evaluations, _) in results.items():
+            print(
+                f"{orbits:>6} {name:>6} {seconds * 1000:>9.1f} {evaluations:>12} {error:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
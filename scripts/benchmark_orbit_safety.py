@@ -0,0 +1,114 @@
+"""Benchmark the orbit safety checker against the fixed-sample validator.
+
+Runs offline on randomly generated orbits around Enceladus. For each orbit, one period
+is checked against the 50 km threshold by the previous 100-sample approach and by
+llmsat.libs.orbit_safety, and both are compared with a dense reference sampling.
+
+Usage:
+    python scripts/benchmark_orbit_safety.py --orbits 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from llmsat.libs import kepler, orbit_safety, utils
+
+ENCELADUS_MU = 7.211e9  # m^3/s^2
+ENCELADUS_RADIUS = 252100.0  # m
+THRESHOLD = orbit_safety.SAFE_ALTITUDE_THRESHOLD
+
+
+def random_segment(rng: np.random.Generator) -> orbit_safety.OrbitSegment:
+    eccentricity = rng.uniform(0.01, 0.8)
+    periapsis = ENCELADUS_RADIUS + rng.uniform(20000, 80000)
+    elements = kepler.OrbitalElements(
+        body="Enceladus",
+        body_radius=ENCELADUS_RADIUS,
+        gravitational_parameter=ENCELADUS_MU,
+        semi_major_axis=periapsis / (1 - eccentricity),
+        eccentricity=eccentricity,
+        inclination=rng.uniform(0, np.pi),
+        longitude_of_ascending_node=rng.uniform(0, 2 * np.pi),
+        argument_of_periapsis=rng.uniform(0, 2 * np.pi),
+        mean_anomaly_at_epoch=rng.uniform(0, 2 * np.pi),
+        epoch=0.0,
+    )
+    return orbit_safety.OrbitSegment(elements=elements, start=0.0, end=np.inf)
+
+
+def sample_check(segment, end, samples):
+    """Threshold the altitude at evenly spaced samples, as validate_orbit used to."""
+    ut = np.linspace(0.0, end, samples)
+    altitude = kepler.propagate(segment.elements, ut)["altitude"]
+    unsafe = ut[altitude < THRESHOLD]
+    start = unsafe[0] if unsafe.size else None
+    return start, altitude.min()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orbits", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = {"sampler": [], "checker": []}
+    for _ in range(args.orbits):
+        segment = random_segment(rng)
+        end = segment.elements.period
+        reference_start, reference_min = sample_check(segment, end, 200001)
+        violating = reference_start is not None
+
+        start_time = time.perf_counter()
+        sampled_start, sampled_min = sample_check(segment, end, 100)
+        sampler_time = time.perf_counter() - start_time
+        results["sampler"].append(
+            (
+                100,
+                sampler_time,
+                violating and sampled_start is None,
+                abs(sampled_min - reference_min),
+                abs(sampled_start - reference_start)
+                if violating and sampled_start is not None
+                else np.nan,
+            )
+        )
+
+        start_time = time.perf_counter()
+        report = orbit_safety.check_orbit([segment], 0.0, end, THRESHOLD)
+        checker_time = time.perf_counter() - start_time
+        checked_start = (
+            min(utils.datetime_to_ksp_ut(v.start) for v in report.violations)
+            if report.violations
+            else None
+        )
+        results["checker"].append(
+            (
+                report.evaluations,
+                checker_time,
+                violating and checked_start is None,
+                abs(report.closest_approach_altitude - reference_min),
+                abs(checked_start - reference_start)
+                if violating and checked_start is not None
+                else np.nan,
+            )
+        )
+
+    print(f"Safety check of one period on {args.orbits} random orbits:")
+    print(
+        f"  {'method':<8} {'evals/check':>11} {'ms/check':>9} {'missed':>7} "
+        f"{'min alt err [m]':>16} {'entry err [s]':>14}"
+    )
+    for name, rows in results.items():
+        evaluations, seconds, missed, altitude_error, entry_error = np.array(rows).T
+        print(
+            f"  {name:<8} {evaluations.mean():11.1f} {seconds.mean() * 1000:9.3f} "
+            f"{int(missed.sum()):7d} {altitude_error.mean():16.1f} "
+            f"{np.nanmean(entry_error):14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark the latency of building a krpc_types.Orbit from the active vessel.
+
+Compares reading each attribute with its own blocking RPC, as Orbit used to, against
+the batched snapshot in llmsat.libs.krpc_snapshot. KSP must be running with a flight
+scene loaded, unless run with --sim.
+
+Usage:
+    python scripts/benchmark_orbit_snapshot.py --iterations 200
+"""
+
+import argparse
+import statistics
+import time
+
+from llmsat.libs import krpc_sim, krpc_snapshot
+from llmsat.libs.krpc_types import Orbit
+from llmsat.libs.profiling import RPCCounter
+
+
+def read_orbit_per_attribute(orbit_obj) -> dict:
+    """Read an orbit the way Orbit.__init__ used to, one RPC per attribute."""
+    values = {name: getattr(orbit_obj, name) for name in krpc_snapshot.ORBIT_FIELDS}
+    values["body"] = {
+        "name": orbit_obj.body.name,
+        "equatorial_radius": orbit_obj.body.equatorial_radius,
+    }
+    next_orbit = orbit_obj.next_orbit
+    values["next_orbit"] = (
+        read_orbit_per_attribute(next_orbit) if next_orbit is not None else None
+    )
+    return values
+
+
+def benchmark(name: str, build, counter: RPCCounter, iterations: int):
+    """Time the given Orbit builder and print latency and round trip statistics."""
+    build()  # warm up caches and stubs
+
+    latencies = []
+    counter.reset()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()
+        latencies.append((time.perf_counter() - start) * 1000)
+    rpcs = counter.count / iterations
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"  {name:<16} mean {statistics.mean(latencies):8.2f} ms | "
+        f"p50 {statistics.median(latencies):8.2f} ms | p95 {p95:8.2f} ms | "
+        f"{rpcs:5.1f} RPC/call"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--sim", action="store_true", help="run against the simulated kRPC backend"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.001, help="simulated seconds per RPC"
+    )
+    args = parser.parse_args()
+
+    connection = krpc_sim.connect("Benchmark", simulate=args.sim, latency=args.latency)
+    orbit_obj = connection.space_center.active_vessel.orbit
+
+    print(f"Orbit construction over {args.iterations} iterations:")
+    with RPCCounter(connection) as counter:
+        benchmark(
+            "per-attribute",
+            lambda: Orbit(read_orbit_per_attribute(orbit_obj)),
+            counter,
+            args.iterations,
+        )
+        benchmark("batched", lambda: Orbit(orbit_obj), counter, args.iterations)
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
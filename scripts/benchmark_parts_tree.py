@@ -0,0 +1,107 @@
+"""Benchmark reading the parts tree of a large vessel.
+
+Compares the previous recursive read, which took a round trip per attribute and probed
+every module attribute for a part's type, against the cached PartsModel, on the first
+read and on repeated reads. Runs on simulated KSP with the given round trip latency.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_parts_tree.py --parts 200
+"""
+
+import argparse
+import itertools
+import statistics
+import time
+
+from llmsat.libs import krpc_sim
+from llmsat.libs.krpc_types import AttachmentMode, Part, PartType
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.vessel_parts import PartsModel
+
+
+def legacy_part_type(krpc_part) -> PartType:
+    """How SpacecraftManager used to find a part's type."""
+    for part_type in PartType:
+        attribute_name = part_type.value
+        if (
+            hasattr(krpc_part, attribute_name)
+            and getattr(krpc_part, attribute_name) is not None
+        ):
+            return part_type
+
+    return PartType.NONE
+
+
+def legacy_parts_tree(krpc_part, numbers=None) -> Part:
+    """How SpacecraftManager used to read the parts tree. Numbers the parts depth-first
+    from the root, as PartsModel assigns its IDs, rather than reading the tags that
+    used to be written to the parts."""
+    numbers = itertools.count() if numbers is None else numbers
+    return Part(
+        id=f"{next(numbers):03}",
+        name=krpc_part.name,
+        title=krpc_part.title,
+        type=legacy_part_type(krpc_part),
+        attachment=(
+            AttachmentMode.AXIAL
+            if krpc_part.axially_attached
+            else AttachmentMode.RADIAL
+        ),
+        mass=krpc_part.mass,
+        temperature=krpc_part.temperature,
+        max_temperature=krpc_part.max_temperature,
+        children=[legacy_parts_tree(child, numbers) for child in krpc_part.children],
+    )
+
+
+def structure(part: Part) -> dict:
+    """The part and its children by ID, without the values that change between reads."""
+    return part.model_dump(exclude={"mass", "temperature"}) | {
+        "children": [structure(child) for child in part.children]
+    }
+
+
+def measure(connection, function, runs: int):
+    """Median seconds and RPC requests per call."""
+    times = []
+    counts = []
+    for _ in range(runs):
+        with RPCCounter(connection) as counter:
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        counts.append(counter.count)
+    return statistics.median(times), statistics.median(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--parts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.001, help="s per RPC")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    connection = krpc_sim.SimConnection(latency=args.latency, part_count=args.parts)
+    vessel = connection.space_center.active_vessel
+    model = PartsModel(vessel, TelemetryHub(connection))
+
+    results = {
+        "legacy": measure(
+            connection, lambda: legacy_parts_tree(vessel.parts.root), args.runs
+        ),
+        "model, first read": measure(connection, model.tree, 1),
+        "model": measure(connection, model.tree, args.runs),
+    }
+    if structure(legacy_parts_tree(vessel.parts.root)) != structure(model.tree()):
+        raise SystemExit("the legacy read and PartsModel disagree on the parts tree")
+    connection.close()
+
+    print(f"{args.parts} parts, {args.latency * 1000:g} ms per RPC")
+    print(f"{'':>18} {'ms':>9} {'RPCs':>6}")
+    for name, (seconds, count) in results.items():
+        print(f"{name:>18} {seconds * 1000:>9.1f} {count:>6.0f}")
+
+
+if __name__ == "__main__":
+    main()
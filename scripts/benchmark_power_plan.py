@@ -0,0 +1,105 @@
+"""Benchmark checking a power plan: a step-by-step loop versus the vectorized EPS check.
+
+The loop integrates the electric charge one grid point at a time, predicting sunlight
+for each point on its own, as a plan stepped through interactively would be. The EPS
+check predicts sunlight for the whole grid in one pass and integrates it with array
+operations. Both run on simulated KSP over plans of increasing length.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_power_plan.py --days 1 3 10
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from llmsat.components.eps import EPS
+from llmsat.libs import krpc_sim, power_budget
+from llmsat.libs.power_budget import PlanStep
+from llmsat.libs.profiling import RPCCounter
+
+
+def plan(days: float):
+    """An experiment and a maneuver each day, sleeping in between."""
+    steps = []
+    for _ in range(int(days)):
+        steps += [
+            PlanStep.parse("experiment:600"),
+            PlanStep.parse("sleep:40000"),
+            PlanStep.parse("maneuver:300"),
+            PlanStep.parse("sleep:45500"),
+        ]
+    return steps
+
+
+def loop_check(eps: EPS, steps, step: float = power_budget.DEFAULT_STEP) -> float:
+    """The lowest charge over the plan, integrated one grid point at a time."""
+    elements = eps.orbit_propagator.get_orbital_elements()
+    model = eps.get_power_model(elements)
+    capacity = eps.get_max_electric_charge()
+    charge = lowest = eps.get_total_electric_charge()
+    ut = eps.telemetry.get("ut")
+    for plan_step in steps:
+        end = ut + plan_step.duration
+        while ut < end:
+            dt = min(step, end - ut)
+            sunlit = eps.orbit_propagator.in_sunlight(np.array([ut + dt / 2]), elements)
+            rate = model.solar_rate * sunlit[0] - model.base_load - plan_step.load
+            charge = min(max(charge + rate * dt, 0.0), capacity)
+            lowest = min(lowest, charge)
+            ut += dt
+    return lowest
+
+
+def measure(connection, function, runs: int):
+    """Median seconds and RPC requests per call, and the lowest charge."""
+    times = []
+    counts = []
+    for _ in range(runs):
+        with RPCCounter(connection) as counter:
+            start = time.perf_counter()
+            lowest = function()
+            times.append(time.perf_counter() - start)
+        counts.append(counter.count)
+    return statistics.median(times), statistics.median(counts), lowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--days", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--latency", type=float, default=0.001, help="s per RPC")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    connection = krpc_sim.SimConnection(latency=args.latency)
+    eps = EPS(connection)
+    # the simulated battery does not charge in sunlight, so its rates are given
+    eps.configure_power_model(
+        solar_rate=power_budget.DEFAULT_SOLAR_RATE,
+        base_load=power_budget.DEFAULT_BASE_LOAD,
+    )
+    eps.validate_power_plan(plan(1))  # reads the sun's direction, as after first use
+
+    print(f"{args.latency * 1000:g} ms per RPC")
+    print(f"{'days':>5} {'':>10} {'ms':>9} {'RPCs':>5} {'min charge':>11}")
+    for days in args.days:
+        steps = plan(days)
+        results = {
+            "loop": measure(connection, lambda: loop_check(eps, steps), args.runs),
+            "EPS": measure(
+                connection,
+                lambda: eps.validate_power_plan(steps).min_charge,
+                args.runs,
+            ),
+        }
+        for name, (seconds, count, lowest) in results.items():
+            print(
+                f"{days:>5g} {name:>10} {seconds * 1000:>9.1f} {count:>5.0f} {lowest:>11.1f}"
+            )
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark reading the resources: direct reads versus the streamed ResourceSeries.
+
+The direct read is how get_resources used to read each resource, with a round trip for
+its amount and another for its max. The series answers records from its streams and
+forecasts from its sampled history. Runs on simulated KSP with the given round trip
+latency, with electric charge being drawn.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_resource_forecast.py --latency 0.005
+"""
+
+import argparse
+import statistics
+import time
+
+from llmsat.libs import krpc_sim
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.resource_series import ResourceSeries
+from llmsat.libs.telemetry import DEFAULT_RATE, TelemetryHub
+
+
+def legacy_resource_records(vessel):
+    """How get_resources used to read the resources."""
+    resources = vessel.resources
+    return [
+        {"name": name, "amount": resources.amount(name), "max": resources.max(name)}
+        for name in resources.names
+    ]
+
+
+def measure(connection, function, runs: int):
+    """Median seconds and RPC requests per call."""
+    times = []
+    counts = []
+    for _ in range(runs):
+        with RPCCounter(connection) as counter:
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        counts.append(counter.count)
+    return statistics.median(times), statistics.median(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--latency", type=float, default=0.005, help="s per RPC")
+    parser.add_argument("--samples", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    connection = krpc_sim.SimConnection(latency=args.latency)
+    vessel = connection.space_center.active_vessel
+    vessel.resources.set_rate("ElectricCharge", -0.5)
+    series = ResourceSeries(vessel, TelemetryHub(connection), rate=0)
+    series.records()  # opens the streams, as after startup
+
+    # fill the history as the background sampler would, a game second apart
+    for _ in range(args.samples):
+        series.sample()
+        connection.advance(1)
+        time.sleep(1.5 / DEFAULT_RATE)
+
+    results = {
+        "direct read": measure(
+            connection, lambda: legacy_resource_records(vessel), args.runs
+        ),
+        "series records": measure(connection, series.records, args.runs),
+        "series forecast": measure(connection, series.forecast, args.runs),
+    }
+    connection.close()
+
+    forecast = next(f for f in series.forecast() if f.name == "ElectricCharge")
+    print(f"{len(series)} samples, {args.latency * 1000:g} ms per RPC")
+    print(f"{'':>16} {'ms':>8} {'RPCs':>6}")
+    for name, (seconds, count) in results.items():
+        print(f"{name:>16} {seconds * 1000:>8.2f} {count:>6.0f}")
+    print(
+        f"ElectricCharge: {forecast.consumption_rate:.3f}/s used, empty in {forecast.time_to_empty:.0f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
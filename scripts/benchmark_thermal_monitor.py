@@ -0,0 +1,114 @@
+"""Benchmark watching part temperatures: polling the parts tree versus the ThermalMonitor.
+
+Polling reads the whole tree as get_parts_tree used to and scans it for hot parts. The
+monitor reads streamed temperatures and pushes an alert. Both run on simulated KSP with
+a large vessel, where one part starts heating towards its limit; the benchmark reports
+the kRPC requests per second each approach costs and how long after the heating starts
+the part is flagged.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/benchmark_thermal_monitor.py --parts 200
+"""
+
+import argparse
+import threading
+import time
+
+from benchmark_parts_tree import legacy_parts_tree
+
+from llmsat.components.thermal_monitor import ThermalMonitor
+from llmsat.libs import krpc_sim
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.thermal import DEFAULT_HORIZON, DEFAULT_THRESHOLD
+from llmsat.libs.vessel_parts import PartsModel
+
+HEATING_RATE = 20.0  # K/s of game time
+
+
+def flatten(part):
+    yield part
+    for child in part.children:
+        yield from flatten(child)
+
+
+def reset_singletons():
+    for cls in (TelemetryHub, PartsModel, ThermalMonitor):
+        cls._instance = None
+        cls._initialized = False
+
+
+def poll(connection, counter: RPCCounter, interval: float, timeout: float):
+    """Poll the tree until a part is over the threshold or predicted to breach."""
+    vessel = connection.space_center.active_vessel
+    previous = {}
+    vessel.parts.all[-1].set_heating(HEATING_RATE)
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        polled_at = time.perf_counter()
+        for part in flatten(legacy_parts_tree(vessel.parts.root)):
+            if part.temperature >= DEFAULT_THRESHOLD * part.max_temperature:
+                return time.perf_counter() - start
+            rate = (
+                part.temperature - previous.get(part.id, part.temperature)
+            ) / interval
+            if (
+                rate > 0
+                and (part.max_temperature - part.temperature) / rate <= DEFAULT_HORIZON
+            ):
+                return time.perf_counter() - start
+            previous[part.id] = part.temperature
+        time.sleep(max(interval - (time.perf_counter() - polled_at), 0))
+    return None
+
+
+def monitor(connection, counter: RPCCounter, rate: float, timeout: float):
+    """Wait for the ThermalMonitor to alert on the heating part."""
+    thermal_monitor = ThermalMonitor(connection, rate=rate)
+    alerted = threading.Event()
+    thermal_monitor._on_thermal_alert = lambda part, reason: alerted.set()
+    thermal_monitor.get_thermal_status()  # opens the streams, as after startup
+
+    connection.space_center.active_vessel.parts.all[-1].set_heating(HEATING_RATE)
+    counter.reset()
+    start = time.perf_counter()
+    if alerted.wait(timeout):
+        return time.perf_counter() - start
+    return None
+
+
+def measure(connection, function, *args):
+    """Seconds until the heating part is flagged, and RPC requests per second until
+    then, not counting the monitor's setup."""
+    with RPCCounter(connection) as counter:
+        detected = function(connection, counter, *args)
+    return detected, counter.count / (detected or args[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--parts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.001, help="s per RPC")
+    parser.add_argument("--rate", type=float, default=1.0, help="readings per second")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    results = {}
+    for name, function, extra in (
+        ("poll parts tree", poll, 1 / args.rate),
+        ("ThermalMonitor", monitor, args.rate),
+    ):
+        reset_singletons()
+        connection = krpc_sim.SimConnection(latency=args.latency, part_count=args.parts)
+        results[name] = measure(connection, function, extra, args.timeout)
+        connection.close()
+
+    print(f"{args.parts} parts, {args.latency * 1000:g} ms per RPC, {args.rate:g} Hz")
+    print(f"{'':>16} {'detected after s':>16} {'RPCs/s':>8}")
+    for name, (detected, rpc_rate) in results.items():
+        detected = "-" if detected is None else f"{detected:.2f}"
+        print(f"{name:>16} {detected:>16} {rpc_rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark the console/agent ZMQ link.
+
+Compares the previous pickle path (send_pyobj of a Message, replies with send_string)
+against the framed protocol in llmsat.libs.protocol, echoing payloads of several sizes
+between two PAIR sockets over TCP on localhost.
+
+Usage:
+    python scripts/benchmark_zmq_protocol.py --iterations 2000
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import zmq
+
+from llmsat.libs import protocol, utils
+
+PAYLOAD_SIZES = (100, 10_000, 1_000_000)  # bytes
+
+
+def pickle_echo(socket: zmq.Socket, count: int):
+    for _ in range(count):
+        message = socket.recv_pyobj()
+        socket.send_string(message.data)
+
+
+def pickle_round_trip(socket: zmq.Socket, message: utils.Message):
+    socket.send_pyobj(message)
+    socket.recv_string()
+
+
+def framed_echo(socket: zmq.Socket, count: int):
+    for _ in range(count):
+        message = protocol.recv(socket)
+        protocol.send(
+            socket, utils.Message(type=utils.MessageType.OUTPUT, data=message.data)
+        )
+
+
+def framed_round_trip(socket: zmq.Socket, message: utils.Message):
+    protocol.send(socket, message)
+    protocol.recv(socket)
+
+
+def benchmark(name, echo, round_trip, payload_size, iterations, port):
+    context = zmq.Context()
+    server = context.socket(zmq.PAIR)
+    server.bind(f"tcp://127.0.0.1:{port}")
+    client = context.socket(zmq.PAIR)
+    client.connect(f"tcp://127.0.0.1:{port}")
+
+    message = utils.Message(type=utils.MessageType.COMMAND, data="x" * payload_size)
+    warmup = 10
+    thread = threading.Thread(target=echo, args=[server, iterations + warmup])
+    thread.start()
+
+    for _ in range(warmup):
+        round_trip(client, message)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        round_trip(client, message)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    elapsed = time.perf_counter() - start
+
+    thread.join()
+    client.close()
+    server.close()
+    context.term()
+
+    throughput = 2 * payload_size * iterations / elapsed / 1e6
+    print(
+        f"  {name:<8} {payload_size:>9} B | p50 {statistics.median(latencies):9.1f} us | "
+        f"p95 {statistics.quantiles(latencies, n=20)[18]:9.1f} us | "
+        f"{iterations / elapsed:8.0f} msg/s | {throughput:8.1f} MB/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=5599)
+    args = parser.parse_args()
+
+    print(f"Round trips over {args.iterations} iterations:")
+    for payload_size in PAYLOAD_SIZES:
+        # fewer round trips for large payloads to keep runs short
+        iterations = max(args.iterations * 10_000 // max(payload_size, 10_000), 50)
+        benchmark(
+            "pickle",
+            pickle_echo,
+            pickle_round_trip,
+            payload_size,
+            iterations,
+            args.port,
+        )
+        benchmark(
+            "framed",
+            framed_echo,
+            framed_round_trip,
+            payload_size,
+            iterations,
+            args.port + 1,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Load-test the console by playing a mission script against simulated KSP.
+
+Starts the console in-process on the simulated kRPC connection, with a copy of disk/ and
+the given mission brief, and plays a mission script to it over ZMQ: either straight from
+a scripted controller, keeping several commands in flight, or through the agent manager
+with a scripted chat model in place of the language model, so that the whole agent loop
+is exercised. Reports the latency percentiles of each command and the throughput.
+
+The harness measures throughput but does not reach thousands of commands per second.
+The console runs each command synchronously through cmd2 on its receive thread, so
+commands in flight only hide the network round trip. The default script costs about
+0.7 ms per command in cmd2 alone, and about 1.6 ms per command end to end over ZMQ.
+That is about 600 commands/s on simulated KSP, and get_resources formatting its table
+with pandas is a third of the command time.
+
+Usage:
+    PYTHONPATH=.:llmsat python scripts/load_test_console.py --repeat 500 --window 8
+    PYTHONPATH=.:llmsat python scripts/load_test_console.py --agent --repeat 50 \
+        --mission missions/temperature_reading.md \
+        --script missions/scripts/temperature_reading.txt
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from llmsat.libs import krpc_sim, utils
+from llmsat.libs.mission_script import (
+    DEFAULT_SCRIPT,
+    CommandTimer,
+    ScriptedChatModel,
+    format_latency_report,
+    load_script,
+)
+
+SUMMARY = "The agent played the mission script in earlier sessions."
+
+
+def start_console(port: int, latency: float):
+    """A console on simulated KSP, serving the controller on port."""
+    from llmsat.console import (
+        AlarmManager,
+        AutopilotService,
+        CommunicationService,
+        Console,
+        ExperimentManager,
+        OrbitPropagator,
+        SpacecraftManager,
+        TaskManager,
+    )
+
+    connection = krpc_sim.SimConnection(latency=latency)
+    console = Console(
+        port=port,
+        quiet=True,
+        command_sets=[
+            cls(connection)
+            for cls in (
+                SpacecraftManager,
+                AutopilotService,
+                ExperimentManager,
+                TaskManager,
+                CommunicationService,
+                AlarmManager,
+                OrbitPropagator,
+            )
+        ],
+    )
+    return console
+
+
+def play_direct(commands, args):
+    from llmsat.mock_controller import ScriptedController
+
+    controller = ScriptedController(args.port)
+    controller.connect()
+    start = time.perf_counter()
+    latencies = controller.play(commands, args.repeat, args.window)
+    elapsed = time.perf_counter() - start
+    controller.disconnect()
+    return latencies, elapsed
+
+
+async def play_agent(commands, args):
+    from llmsat.agent_manager import AgentManager
+
+    timer = CommandTimer()
+    manager = AgentManager(
+        None, None, None, None, args.port, llm=ScriptedChatModel(commands=commands)
+    )
+    manager.memory.llm = FakeListChatModel(responses=[SUMMARY])
+    for tool in manager.agent.tools:
+        tool.callbacks = [timer]
+
+    receiver = asyncio.create_task(manager.receive_message())
+    start = time.perf_counter()
+    for _ in range(args.repeat):  # one console session per repetition
+        dashboard = asyncio.wrap_future(manager.dispatcher.expect_connection())
+        await manager.send_message(
+            utils.Message(
+                type=utils.MessageType.CONNECT,
+                data=manager.dispatcher.connect_payload(),
+            ),
+            version=1,
+        )
+        await manager.run_session(manager.memory.deduplicate(await dashboard))
+    elapsed = time.perf_counter() - start
+    receiver.cancel()
+    return timer.latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--script", type=Path, help="default: read-only commands")
+    parser.add_argument("--mission", type=Path, help="mission brief for the console")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--window", type=int, default=1, help="commands in flight")
+    parser.add_argument("--agent", action="store_true", help="drive the agent manager")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--port", type=int, default=5597)
+    args = parser.parse_args()
+
+    commands = load_script(args.script) if args.script else DEFAULT_SCRIPT
+    logging.disable(logging.INFO)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # the console reads the mission from disk/ and writes its task database there
+        shutil.copytree("disk", Path(directory, "disk"))
+        if args.mission:
+            shutil.copy(args.mission, Path(directory, "disk", "mission.md"))
+        os.chdir(directory)
+        try:
+            start_console(args.port, args.rpc_latency)
+            if args.agent:
+                latencies, elapsed = asyncio.run(play_agent(commands, args))
+            else:
+                latencies, elapsed = play_direct(commands, args)
+        finally:
+            os.chdir(cwd)
+
+    print(format_latency_report(latencies, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import krpc
+import numpy as np
 import pytest
 
 from llmsat.components.orbit_propagator import OrbitPropagator
@@ -38,6 +39,18 @@ def test_radius_at(ksp_connection):
     print(output)
 
 
+def test_radius_at_analytic_matches_krpc(ksp_connection):
+    service = OrbitPropagator(ksp_connection)
+
+    date_start = utils.ksp_ut_to_datetime(ksp_connection.space_center.ut)
+    date_end = date_start + timedelta(hours=6)
+
+    analytic = service.radius_at(date=date_start, date_end=date_end, method="analytic")
+    krpc_radii = service.radius_at(date=date_start, date_end=date_end, method="krpc")
+
+    np.testing.assert_allclose(analytic["radius"], krpc_radii["radius"], rtol=1e-4)
+
+
 def test_validate_orbit(ksp_connection):
     service = OrbitPropagator(ksp_connection)
 
@@ -0,0 +1,90 @@
+import asyncio
+
+from langchain_core.agents import AgentAction
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import SystemMessage
+
+from llmsat.libs.agent_memory import TokenBudgetMemory, estimate_tokens
+
+BRIEF = "# Mission Brief\nTake a temperature reading in orbit around Enceladus."
+PROPERTIES = 'Spacecraft Properties:\n{\n    "name": "LLMSat-1",\n    "mass": 1215.0\n}'
+DASHBOARD = f"SatelliteOS\nUT: 2044-09-02\n\n{BRIEF}\n\n{PROPERTIES}"
+
+
+def memory(**kwargs) -> TokenBudgetMemory:
+    llm = FakeListChatModel(responses=["summary 1", "summary 2", "summary 3"])
+    return TokenBudgetMemory(llm=llm, return_messages=True, **kwargs)
+
+
+def test_pins_brief_and_deduplicates_remembered_sections():
+    agent_memory = memory()
+
+    first = agent_memory.deduplicate(DASHBOARD)
+    assert BRIEF not in first
+    assert PROPERTIES in first
+    agent_memory.save_context({"input": first}, {"output": "Done"})
+
+    second = agent_memory.deduplicate(DASHBOARD.replace("09-02", "09-03"))
+    assert "UT: 2044-09-03" in second  # changed
+    assert PROPERTIES not in second
+    assert "(Spacecraft Properties:: unchanged" in second
+
+    history = agent_memory.load_memory_variables({})["history"]
+    assert isinstance(history[0], SystemMessage)
+    assert BRIEF in history[0].content
+
+
+def test_pins_headings_with_their_body():
+    agent_memory = memory()
+    brief = f"{BRIEF}\n\n## Requirements\n\n- Shall be in orbit around Enceladus"
+    dashboard = f"SatelliteOS\n\n{brief}\n\n{PROPERTIES}"
+
+    text = agent_memory.deduplicate(dashboard)
+
+    assert agent_memory.pinned["## Requirements"].endswith("around Enceladus")
+    assert "Shall be in orbit" not in text
+    assert "(## Requirements: see pinned facts)" in text
+    assert PROPERTIES in text
+    assert PROPERTIES not in agent_memory._pinned_message().content
+
+
+def test_history_stays_within_budget():
+    agent_memory = memory(max_token_limit=100)
+    agent_memory.pin(BRIEF)
+    for turn in range(6):
+        agent_memory.save_context({"input": "x" * 200}, {"output": f"turn {turn}"})
+
+    history = agent_memory.load_memory_variables({})["history"]
+    assert agent_memory.count_tokens(history) <= 100
+    assert agent_memory.moving_summary_buffer.startswith("summary")
+    assert history[-1].content == "turn 5"
+    assert BRIEF in history[0].content
+
+
+def test_async_save_summarizes():
+    agent_memory = memory(max_token_limit=60)
+
+    async def save():
+        for turn in range(3):
+            await agent_memory.asave_context(
+                {"input": "x" * 200}, {"output": f"turn {turn}"}
+            )
+
+    asyncio.run(save())
+    assert agent_memory.moving_summary_buffer == "summary 2"
+    assert agent_memory.count_tokens(agent_memory.chat_memory.messages) <= 60
+
+
+def test_compact_steps_elides_oldest_observations():
+    agent_memory = memory(steps_token_limit=150)
+    steps = [
+        (AgentAction(tool="run", tool_input=f"command {i}", log=f"step {i}"), "y" * 200)
+        for i in range(4)
+    ]
+
+    compacted = agent_memory.compact_steps(steps)
+    assert [action for action, _ in compacted] == [action for action, _ in steps]
+    assert compacted[-1] == steps[-1]
+    assert "50 tokens of output elided" in compacted[0][1]
+    assert sum(estimate_tokens(a.log) + estimate_tokens(o) for a, o in compacted) <= 150
+    assert agent_memory.compact_steps(steps[:1]) == steps[:1]
@@ -0,0 +1,76 @@
+import cmd2
+from cmd2 import CommandSet, with_argparser, with_default_category
+from pydantic import BaseModel
+
+from llmsat.libs import utils
+from llmsat.libs.command_catalog import CommandCatalog
+
+
+class Reading(BaseModel):
+    value: float
+
+
+class App(cmd2.Cmd):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output = []
+
+    def poutput(self, msg="", *args, **kwargs):
+        self.output.append(str(msg))
+
+
+@with_default_category("Sensors")
+class Sensors(CommandSet):
+    read_parser = utils.CustomCmd2ArgumentParser(
+        lambda: None, epilog=utils.format_return_obj_str(Reading)
+    )
+    read_parser.add_argument("-name", type=str, required=True, help="sensor name")
+    read_parser.add_argument("-unit", type=str, help="unit of the reading")
+
+    @with_argparser(read_parser)
+    def do_read(self, args):
+        """Read a sensor"""
+
+    def do_calibrate(self, _=None):
+        """Calibrate all sensors"""
+
+
+@with_default_category("Radio")
+class Radio(CommandSet):
+    def do_ping(self, _=None):
+        """Ping mission control"""
+
+
+def test_catalog_describes_commands():
+    app = App(auto_load_commands=False, command_sets=[Sensors()])
+    catalog = CommandCatalog()
+    summary = catalog.summary(app)
+
+    assert (
+        "Sensors:\n- calibrate: Calibrate all sensors\n- read -name NAME: Read a sensor"
+        in summary
+    )
+    read = catalog.commands["read"]
+    assert [argument.flag for argument in read.arguments] == ["-name", "-unit"]
+    assert read.returns.startswith("Returns:\n")
+    assert '"value"' in read.returns
+
+
+def test_catalog_rebuilds_when_commands_change():
+    app = App(auto_load_commands=False, command_sets=[Sensors()])
+    catalog = CommandCatalog()
+    first = catalog.summary(app)
+    assert catalog.summary(app) is first
+
+    app.register_command_set(Radio())
+    assert "- ping: Ping mission control" in catalog.summary(app)
+
+
+def test_help_is_formatted_once():
+    parser = utils.CustomCmd2ArgumentParser(lambda: None, prog="read")
+    parser.add_argument("-name")
+    assert parser.format_help() is parser.format_help()
+
+    parser.add_argument("-unit")
+    assert "-unit" in parser.format_help()
+    assert utils.model_schema(Reading) is utils.model_schema(Reading)
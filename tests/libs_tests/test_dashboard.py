@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from llmsat.libs.dashboard import Dashboard, compact_json
+
+
+def sections(ut="00:00", resources="ElectricCharge: 800/1000"):
+    return [
+        ("", f"SatelliteOS | UT: {ut}"),
+        ("Mission Brief", "# Mission Brief\nTake a temperature reading."),
+        ("Resources", f"Resources (amount/max):\n{resources}"),
+    ]
+
+
+def test_reconnect_receives_only_changed_sections():
+    dashboard = Dashboard()
+    revision, full = dashboard.render(sections())
+    assert "# Mission Brief" in full
+
+    _, delta = dashboard.render(
+        sections(ut="00:05", resources="ElectricCharge: 700/1000"), since=revision
+    )
+    assert delta.split("\n\n") == [
+        "SatelliteOS | UT: 00:05",
+        "(Mission Brief: unchanged since the last session)",
+        "Resources (amount/max):\nElectricCharge: 700/1000",
+    ]
+
+
+def test_unknown_revision_receives_everything():
+    dashboard = Dashboard()
+    revision, full = dashboard.render(sections())
+
+    assert dashboard.render(sections(), since=revision + 1)[1] == full
+    assert dashboard.render(sections(), since=None)[1] == full
+    assert dashboard.render(sections())[0] == revision  # same content
+
+
+def test_compact_json():
+    class Task(BaseModel):
+        id: int
+        description: Optional[str] = None
+        end: datetime
+
+    tasks = {1: Task(id=1, end=datetime(2044, 9, 2))}
+    assert compact_json(tasks) == '{"1":{"id":1,"end":"2044-09-02T00:00:00"}}'
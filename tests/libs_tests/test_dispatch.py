@@ -0,0 +1,145 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+
+from llmsat.libs import protocol, utils
+from llmsat.libs.dispatch import AlertQueue, Dispatcher
+
+
+def reply(id, data=None, type=utils.MessageType.OUTPUT):
+    return utils.Message(type=type, data=data, id=id)
+
+
+def alert(data, priority=utils.Priority.NORMAL):
+    return utils.Message(
+        type=utils.MessageType.OUTPUT,
+        data=data,
+        channel=utils.Channel.ALERT,
+        priority=priority,
+    )
+
+
+def test_alerts_by_priority_then_arrival():
+    alerts = AlertQueue()
+    alerts.put(alert("low", utils.Priority.LOW))
+    alerts.put(alert("first"))
+    alerts.put(alert("alarm", utils.Priority.HIGH))
+    alerts.put(alert("second"))
+
+    assert len(alerts) == 4
+    assert alerts.peek().data == "alarm"
+    assert [alerts.get().data for _ in range(4)] == ["alarm", "first", "second", "low"]
+    with pytest.raises(queue.Empty):
+        alerts.get(timeout=0.01)
+
+
+def test_get_blocks_until_alert():
+    alerts = AlertQueue()
+    threading.Timer(0.05, alerts.put, [alert("alarm")]).start()
+
+    assert alerts.get(timeout=2).data == "alarm"
+
+
+def test_get_async_waits_on_the_loop():
+    alerts = AlertQueue()
+
+    async def wait():
+        cancelled = asyncio.create_task(alerts.get_async())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+
+        waiting = asyncio.create_task(alerts.get_async())
+        threading.Timer(0.05, alerts.put, [alert("alarm")]).start()
+        return await asyncio.wait_for(waiting, 2)
+
+    assert asyncio.run(wait()).data == "alarm"
+    assert len(alerts) == 0
+    assert not alerts._waiters
+
+
+def test_concurrent_commands_resolve_their_futures():
+    dispatcher = Dispatcher()
+    orbit = dispatcher.open("get_orbit")
+    parts = dispatcher.open("get_parts_tree")
+
+    # replies interleaved on the wire, with an alert in between
+    for message in [
+        reply(parts.id, "parts 1"),
+        reply(orbit.id, "orbit"),
+        alert("alarm", utils.Priority.HIGH),
+        reply(parts.id, "parts 2"),
+        reply(orbit.id, type=utils.MessageType.END),
+        reply(parts.id, type=utils.MessageType.END),
+    ]:
+        dispatcher.dispatch(message)
+
+    assert orbit.result(timeout=1) == "orbit"
+    assert parts.result(timeout=1) == "parts 1\nparts 2"
+    assert dispatcher.alerts.get(block=False).data == "alarm"
+
+
+def test_alerts_never_reach_command_replies():
+    dispatcher = Dispatcher()
+    stream = dispatcher.open("warp_to")
+    unsolicited = alert("alarm")
+    unsolicited.id = stream.id  # even if it happens to carry a live ID
+
+    dispatcher.dispatch(unsolicited)
+    dispatcher.dispatch(reply(stream.id, type=utils.MessageType.END))
+
+    assert stream.result(timeout=1) == ""
+    assert len(dispatcher.alerts) == 1
+
+
+def test_control_messages():
+    versions = []
+    dispatcher = Dispatcher(on_version=versions.append)
+    dashboard = dispatcher.expect_connection()
+
+    for message in (
+        protocol.decode(
+            protocol.encode(utils.Message(type=utils.MessageType.VERSION, data="3"))
+        ),
+        utils.Message(
+            type=utils.MessageType.OUTPUT,
+            data="dashboard",
+            channel=utils.Channel.CONTROL,
+        ),
+    ):
+        dispatcher.dispatch(message)
+
+    assert versions == [3]
+    assert dashboard.result(timeout=1) == "dashboard"
+    assert len(dispatcher.alerts) == 0
+    assert dispatcher.connect_payload() == protocol.offer_versions()
+
+
+def test_reconnect_offers_last_dashboard_revision():
+    dispatcher = Dispatcher()
+    dispatcher.expect_connection()
+    dispatcher.dispatch(
+        utils.Message(
+            type=utils.MessageType.OUTPUT,
+            data="dashboard",
+            id=1234,
+            channel=utils.Channel.CONTROL,
+        )
+    )
+
+    assert protocol.offered_dashboard(dispatcher.connect_payload()) == 1234
+
+
+def test_late_output_becomes_alert():
+    dispatcher = Dispatcher()
+    stream = dispatcher.open("execute_maneuver_nodes")
+    stream.read(timeout=0.01)
+
+    dispatcher.dispatch(reply(stream.id, "burn complete"))
+    dispatcher.dispatch(reply(stream.id, type=utils.MessageType.END))
+
+    late = dispatcher.alerts.get(block=False)
+    assert late.channel == utils.Channel.ALERT
+    assert late.received_at is not None
+    assert "burn complete" in late.data
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+
+from llmsat.libs.jsonl_log import JsonlLog
+
+START = datetime(2045, 1, 1)
+
+
+class Entry(BaseModel):
+    timestamp: datetime
+    text: str
+
+
+def entry(minutes: int) -> Entry:
+    return Entry(timestamp=START + timedelta(minutes=minutes), text=f"m{minutes}")
+
+
+def test_paged_read_newest_first(tmp_path):
+    log = JsonlLog(tmp_path / "log.jsonl", Entry)
+    for i in range(25):
+        log.append(entry(i))
+
+    assert len(log) == 25
+    assert [e.text for e in log.read(limit=10)] == [f"m{i}" for i in range(24, 14, -1)]
+    assert [e.text for e in log.read(limit=10, page=2)] == [
+        f"m{i}" for i in range(4, -1, -1)
+    ]
+    assert log.read(limit=10, page=3) == []
+    assert [e.text for e in log.read(limit=3, newest_first=False)] == ["m0", "m1", "m2"]
+    log.close()
+
+
+def test_time_range(tmp_path):
+    log = JsonlLog(tmp_path / "log.jsonl", Entry)
+    for i in range(10):
+        log.append(entry(i))
+    log.append(entry(3))  # out of order, e.g. after reloading a checkpoint
+
+    start, end = START + timedelta(minutes=3), START + timedelta(minutes=5)
+    assert log.count(start, end) == 3
+    assert [e.text for e in log.read(start, end, newest_first=False)] == [
+        "m3",
+        "m3",
+        "m4",
+    ]
+    log.close()
+
+
+def test_reopen_keeps_records_and_drops_partial_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    log = JsonlLog(path, Entry)
+    for i in range(3):
+        log.append(entry(i))
+    log.close()
+
+    with open(path, "ab") as file:
+        file.write(b'{"timestamp": "2045-01-01T00:0')  # crash mid-write
+
+    log = JsonlLog(path, Entry)
+    assert len(log) == 3
+    log.append(entry(3))
+    assert [e.text for e in log.read(newest_first=False)] == ["m0", "m1", "m2", "m3"]
+    log.close()
+
+
+def test_sync_batching(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("os.fsync", lambda fd: synced.append(fd))
+
+    log = JsonlLog(tmp_path / "log.jsonl", Entry, sync_every=4, sync_interval=60)
+    for i in range(9):
+        log.append(entry(i))
+
+    assert len(synced) == 2
+    log.close()
+    assert len(synced) == 3
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from llmsat.libs import kepler
+
+ENCELADUS_MU = 7.211e9  # m^3/s^2
+ENCELADUS_RADIUS = 252100.0  # m
+
+
+def make_elements(semi_major_axis, eccentricity, **kwargs):
+    elements = dict(
+        body="Enceladus",
+        body_radius=ENCELADUS_RADIUS,
+        gravitational_parameter=ENCELADUS_MU,
+        semi_major_axis=semi_major_axis,
+        eccentricity=eccentricity,
+        inclination=0.3,
+        longitude_of_ascending_node=1.1,
+        argument_of_periapsis=0.7,
+        mean_anomaly_at_epoch=0.0,
+        epoch=0.0,
+    )
+    elements.update(kwargs)
+    return kepler.OrbitalElements(**elements)
+
+
+@pytest.mark.parametrize("eccentricity", [0.0, 0.1, 0.5, 0.95, 0.999])
+def test_solve_kepler_elliptic(eccentricity):
+    mean_anomaly = np.linspace(-20, 20, 10000)
+
+    anomaly = kepler.solve_kepler(mean_anomaly, eccentricity)
+
+    residual = anomaly - eccentricity * np.sin(anomaly)
+    wrapped = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+    np.testing.assert_allclose(residual, wrapped, atol=1e-10)
+
+
+@pytest.mark.parametrize("eccentricity", [1.001, 1.5, 5.0])
+def test_solve_kepler_hyperbolic(eccentricity):
+    mean_anomaly = np.linspace(-50, 50, 10000)
+
+    anomaly = kepler.solve_kepler(mean_anomaly, eccentricity)
+
+    residual = eccentricity * np.sinh(anomaly) - anomaly
+    np.testing.assert_allclose(residual, mean_anomaly, atol=1e-8)
+
+
+def test_propagate_elliptic_apsides():
+    elements = make_elements(semi_major_axis=400000.0, eccentricity=0.2)
+    ut = np.array([0.0, elements.period / 2, elements.period])
+
+    state = kepler.propagate(elements, ut)
+
+    np.testing.assert_allclose(state["radius"], [320000.0, 480000.0, 320000.0])
+    np.testing.assert_allclose(
+        np.linalg.norm(state["position"], axis=1), state["radius"]
+    )
+    np.testing.assert_allclose(state["altitude"], state["radius"] - ENCELADUS_RADIUS)
+
+
+def test_propagate_hyperbolic_periapsis():
+    elements = make_elements(semi_major_axis=-400000.0, eccentricity=1.8)
+    ut = np.linspace(-20000, 20000, 4001)
+
+    state = kepler.propagate(elements, ut)
+
+    assert state["radius"].min() == pytest.approx(elements.periapsis)
+    assert state["radius"][2000] == pytest.approx(elements.periapsis)
+    assert np.all(np.diff(state["true_anomaly"]) > 0)
+
+
+def test_circular_equatorial_eclipse_fraction():
+    radius = 2 * ENCELADUS_RADIUS
+    elements = make_elements(radius, 0.0, inclination=0.0)
+    ut = np.linspace(0, elements.period, 100001)[:-1]
+    position = kepler.propagate(elements, ut)["position"]
+
+    shadow = kepler.in_shadow(position, [1.0, 0.0, 0.0], ENCELADUS_RADIUS)
+
+    # the shadow spans 2 asin(R / r) of the orbit, on the side away from the sun
+    expected = 2 * np.arcsin(ENCELADUS_RADIUS / radius) / (2 * np.pi)
+    assert shadow.mean() == pytest.approx(expected, abs=1e-4)
+    assert not shadow[position[:, 0] > 0].any()
+
+
+def test_polar_orbit_facing_the_sun_is_never_eclipsed():
+    elements = make_elements(
+        2 * ENCELADUS_RADIUS,
+        0.0,
+        inclination=np.pi / 2,
+        longitude_of_ascending_node=0.0,
+    )
+    ut = np.linspace(0, elements.period, 1000)
+    position = kepler.propagate(elements, ut)["position"]
+
+    # the orbit plane is perpendicular to the sun line
+    assert not kepler.in_shadow(position, [0.0, 1.0, 0.0], ENCELADUS_RADIUS).any()
+
+
+def test_from_krpc_vector_swaps_north_axis():
+    np.testing.assert_array_equal(kepler.from_krpc_vector((1, 2, 3)), [1, 3, 2])
@@ -0,0 +1,55 @@
+import math
+from types import SimpleNamespace
+
+from llmsat.libs import krpc_snapshot
+from llmsat.libs.krpc_types import Orbit
+
+
+def make_orbit_obj(body_name, next_orbit=None):
+    body = SimpleNamespace(
+        name=body_name, equatorial_radius=252100.0, gravitational_parameter=7.2e9
+    )
+    return SimpleNamespace(
+        body=body,
+        radius=352100.0,
+        apoapsis_altitude=120000.0,
+        periapsis_altitude=80000.0,
+        period=7200.0,
+        time_to_apoapsis=1800.0,
+        time_to_periapsis=5400.0,
+        inclination=math.radians(10),
+        longitude_of_ascending_node=math.radians(20),
+        argument_of_periapsis=math.radians(30),
+        epoch=1000.0,
+        semi_major_axis=352100.0,
+        eccentricity=0.05,
+        mean_anomaly_at_epoch=0.0,
+        orbital_speed=150.0,
+        time_to_soi_change=math.nan if next_orbit is None else 3600.0,
+        next_orbit=next_orbit,
+    )
+
+
+def test_snapshot_orbit():
+    orbit_obj = make_orbit_obj("Enceladus", next_orbit=make_orbit_obj("Saturn"))
+
+    snapshot = krpc_snapshot.snapshot_orbit(orbit_obj)
+
+    assert snapshot["body"] == {
+        "name": "Enceladus",
+        "equatorial_radius": 252100.0,
+        "gravitational_parameter": 7.2e9,
+    }
+    assert snapshot["next_orbit"]["body"]["name"] == "Saturn"
+    assert snapshot["next_orbit"]["next_orbit"] is None
+
+
+def test_orbit_from_snapshot():
+    orbit_obj = make_orbit_obj("Enceladus", next_orbit=make_orbit_obj("Saturn"))
+
+    orbit = Orbit(krpc_snapshot.snapshot_orbit(orbit_obj))
+
+    assert orbit == Orbit(orbit_obj)
+    assert orbit.current_altitude == 100000.0
+    assert math.isclose(orbit.inclination, 10)
+    assert orbit.next_orbit.body == "Saturn"
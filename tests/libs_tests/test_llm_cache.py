@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.outputs import Generation
+
+from llmsat.libs.llm_cache import LRUDiskCache, ReplayChatModel, SessionRecorder
+
+
+def test_hit_requires_same_prompt_and_parameters(tmp_path):
+    cache = LRUDiskCache(tmp_path / "cache.db")
+    cache.update("prompt", "gpt-4 temperature=0.7", [Generation(text="answer")])
+
+    assert cache.lookup("prompt", "gpt-4 temperature=0.7")[0].text == "answer"
+    assert cache.lookup("prompt", "gpt-4 temperature=0.0") is None
+    assert cache.lookup("other prompt", "gpt-4 temperature=0.7") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_evicts_least_recently_used_and_persists(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = LRUDiskCache(path, max_entries=2)
+    cache.update("a", "llm", [Generation(text="A")])
+    cache.update("b", "llm", [Generation(text="B")])
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", [Generation(text="C")])
+
+    assert len(cache) == 2
+    assert cache.lookup("b", "llm") is None
+
+    reopened = LRUDiskCache(path, max_entries=2)
+    reopened.update("d", "llm", [Generation(text="D")])
+    assert reopened.lookup("a", "llm") is None  # used before c
+    assert reopened.lookup("c", "llm")[0].text == "C"
+
+
+def test_model_answers_from_cache(tmp_path):
+    cache = LRUDiskCache(tmp_path / "cache.db")
+    llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+    assert llm.invoke("hello").content == "first"
+    assert llm.invoke("hello").content == "first"
+    assert llm.invoke("goodbye").content == "second"
+    assert cache.hits == 1
+
+
+def test_replays_recorded_session(tmp_path):
+    path = tmp_path / "session.jsonl"
+    recorder = SessionRecorder(path)
+    llm = FakeListChatModel(responses=["one", "two"], callbacks=[recorder])
+    llm.invoke("first")
+    llm.invoke("second")
+    recorder.log.close()
+
+    replay = ReplayChatModel.from_recording(path)
+    assert replay.invoke("anything").content == "one"
+    assert replay.invoke("anything").content == "two"
+    with pytest.raises(ValueError):
+        replay.invoke("anything")
+
+
+def test_replays_asynchronously():
+    replay = ReplayChatModel(responses=["one"])
+    assert asyncio.run(replay.ainvoke("anything")).content == "one"
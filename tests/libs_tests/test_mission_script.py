@@ -0,0 +1,65 @@
+import pytest
+from langchain.agents.structured_chat.output_parser import StructuredChatOutputParser
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.tools import tool
+
+from llmsat.libs.mission_script import (
+    CommandTimer,
+    ScriptedChatModel,
+    format_latency_report,
+    load_script,
+    percentile,
+)
+
+
+def test_load_script_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "mission.txt"
+    path.write_text(
+        '# check orbit\nget_orbit\n\n  run_experiment -name "Temperature Scan"\n'
+    )
+
+    assert load_script(path) == ["get_orbit", 'run_experiment -name "Temperature Scan"']
+
+
+def test_scripted_model_runs_commands_then_finishes_and_restarts():
+    llm = ScriptedChatModel(commands=["get_orbit", 'send_message -message "hi"'])
+    parser = StructuredChatOutputParser()
+
+    steps = [parser.parse(llm.invoke("next").content) for _ in range(4)]
+    assert [(step.tool, step.tool_input) for step in steps[:2]] == [
+        ("run", "get_orbit"),
+        ("run", 'send_message -message "hi"'),
+    ]
+    assert isinstance(steps[0], AgentAction)
+    assert isinstance(steps[2], AgentFinish)
+    assert steps[3].tool_input == "get_orbit"
+
+
+def test_command_timer_groups_by_command():
+    @tool
+    def run(input: str) -> str:
+        """Write a command to the console"""
+        return "ok"
+
+    timer = CommandTimer()
+    run.callbacks = [timer]
+    run.run("get_orbit")
+    run.run("add_alarm -name check -time 2044-09-03T00:00:00")
+    run.run("get_orbit")
+
+    assert {name: len(samples) for name, samples in timer.latencies.items()} == {
+        "get_orbit": 2,
+        "add_alarm": 1,
+    }
+
+
+def test_latency_report():
+    samples = [i / 1000 for i in range(1, 101)]
+    assert percentile(samples, 50) == pytest.approx(0.0505)
+    assert percentile(samples, 99) == pytest.approx(0.09901)
+
+    report = format_latency_report({"get_orbit": samples, "get_ut": [0.002]}, 2.0)
+    lines = report.splitlines()
+    assert lines[1].split()[:3] == ["get_orbit", "100", "50.50"]
+    assert lines[3].split()[:2] == ["(all)", "101"]
+    assert lines[-1] == "101 commands in 2.00s, 50 commands/s"
@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+import pytest
+
+from llmsat.libs import kepler, orbit_safety, utils
+
+ENCELADUS_MU = 7.211e9  # m^3/s^2
+ENCELADUS_RADIUS = 252100.0  # m
+
+
+def make_segment(periapsis_altitude, eccentricity, start=0.0, end=math.inf, **kwargs):
+    periapsis = ENCELADUS_RADIUS + periapsis_altitude
+    elements = dict(
+        body="Enceladus",
+        body_radius=ENCELADUS_RADIUS,
+        gravitational_parameter=ENCELADUS_MU,
+        semi_major_axis=periapsis / (1 - eccentricity),
+        eccentricity=eccentricity,
+        inclination=0.2,
+        longitude_of_ascending_node=0.4,
+        argument_of_periapsis=0.6,
+        mean_anomaly_at_epoch=1.0,
+        epoch=0.0,
+    )
+    elements.update(kwargs)
+    return orbit_safety.OrbitSegment(
+        elements=kepler.OrbitalElements(**elements), start=start, end=end
+    )
+
+
+def sampled_violations(segment, threshold, start, end, samples=200001):
+    ut = np.linspace(start, end, samples)
+    altitude = kepler.propagate(segment.elements, ut)["altitude"]
+    return ut[altitude < threshold], altitude.min()
+
+
+def test_safe_orbit():
+    segment = make_segment(periapsis_altitude=80000, eccentricity=0.1)
+
+    report = orbit_safety.check_orbit([segment], 0, segment.elements.period, 50000)
+
+    assert report.safe
+    assert report.closest_approach_altitude == pytest.approx(80000)
+
+
+def test_short_dip_matches_dense_sampling():
+    segment = make_segment(periapsis_altitude=49000, eccentricity=0.6)
+    end = 3 * segment.elements.period
+
+    report = orbit_safety.check_orbit([segment], 0, end, 50000)
+    unsafe_ut, min_altitude = sampled_violations(segment, 50000, 0, end)
+
+    assert len(report.violations) == 3
+    assert report.closest_approach_altitude == pytest.approx(min_altitude, abs=1)
+    first = report.violations[0]
+    assert utils.datetime_to_ksp_ut(first.start) == pytest.approx(unsafe_ut[0], abs=1)
+    assert report.evaluations < 10
+
+
+def test_hyperbolic_flyby():
+    segment = make_segment(periapsis_altitude=20000, eccentricity=1.5, start=-20000)
+
+    report = orbit_safety.check_orbit([segment], -20000, 20000, 50000)
+    unsafe_ut, min_altitude = sampled_violations(segment, 50000, -20000, 20000)
+
+    assert len(report.violations) == 1
+    violation = report.violations[0]
+    assert utils.datetime_to_ksp_ut(violation.start) == pytest.approx(
+        unsafe_ut[0], abs=1
+    )
+    assert utils.datetime_to_ksp_ut(violation.end) == pytest.approx(
+        unsafe_ut[-1], abs=1
+    )
+    assert violation.min_altitude == pytest.approx(20000)
+
+
+def test_soi_change():
+    leaving = make_segment(periapsis_altitude=100000, eccentricity=1.2, end=5000)
+    arriving = make_segment(
+        periapsis_altitude=10000, eccentricity=0.3, start=5000, epoch=5000
+    )
+
+    report = orbit_safety.check_orbit([leaving, arriving], 0, 50000, 50000)
+
+    assert report.violations
+    assert all(v.body == "Enceladus" for v in report.violations)
+    assert all(utils.datetime_to_ksp_ut(v.start) >= 5000 for v in report.violations)
+    assert report.closest_approach_altitude == pytest.approx(10000)
+
+
+def test_orbit_segments():
+    snapshot = {
+        "body": {
+            "name": "Saturn",
+            "equatorial_radius": 6e7,
+            "gravitational_parameter": 3.8e16,
+        },
+        "semi_major_axis": 2.4e8,
+        "eccentricity": 0.01,
+        "inclination": 0.0,
+        "longitude_of_ascending_node": 0.0,
+        "argument_of_periapsis": 0.0,
+        "mean_anomaly_at_epoch": 0.0,
+        "epoch": 0.0,
+        "time_to_soi_change": 100.0,
+        "next_orbit": None,
+    }
+    snapshot["next_orbit"] = dict(snapshot, time_to_soi_change=math.nan)
+
+    segments = orbit_safety.orbit_segments(snapshot, ut=1000.0)
+
+    assert [(s.start, s.end) for s in segments] == [
+        (1000.0, 1100.0),
+        (1100.0, math.inf),
+    ]
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from llmsat.libs import power_budget
+from llmsat.libs.power_budget import PlanStep, PowerModel
+
+PERIOD = 6000.0  # s
+SHADOW = 2000.0  # s of each orbit in shadow
+
+
+def in_sunlight(ut):
+    return np.remainder(ut, PERIOD) < PERIOD - SHADOW
+
+
+def model(solar_rate=3.0, base_load=1.0):
+    return PowerModel(solar_rate=solar_rate, base_load=base_load, history=0.0)
+
+
+def test_parse_plan_step():
+    assert PlanStep.parse("experiment:600") == PlanStep(
+        activity="experiment",
+        duration=600,
+        load=power_budget.ACTIVITY_LOADS["experiment"],
+    )
+    assert PlanStep.parse("transmit:60:4.5").load == 4.5
+
+    for text in ("experiment", "dance:60", "sleep:soon", "sleep:-5", "a:1:2:3"):
+        with pytest.raises(ValueError):
+            PlanStep.parse(text)
+
+
+def test_estimate_power_model_from_history():
+    ut = np.arange(0.0, 2 * PERIOD, 10.0)
+    middle = ut[:-1] + 5.0
+    sunlit = in_sunlight(middle)
+    rate = np.where(sunlit, 3.0 - 1.0, -1.0)
+    amount = 500.0 + np.concatenate(([0.0], np.cumsum(rate * 10.0)))
+
+    estimate = power_budget.estimate_power_model(ut, amount, 1e5, sunlit)
+
+    assert estimate.solar_rate == pytest.approx(3.0)
+    assert estimate.base_load == pytest.approx(1.0)
+    assert estimate.history == pytest.approx(2 * PERIOD - 10.0)
+
+
+def test_estimate_power_model_skips_full_battery():
+    ut = np.arange(0.0, 1000.0, 10.0)
+    amount = np.full(len(ut), 1000.0)  # full in sunlight: the gain is clipped
+    sunlit = np.ones(len(ut) - 1, dtype=bool)
+
+    estimate = power_budget.estimate_power_model(
+        ut, amount, 1000.0, sunlit, solar_rate=7.0, base_load=0.2
+    )
+
+    assert (estimate.solar_rate, estimate.base_load, estimate.history) == (
+        7.0,
+        0.2,
+        0.0,
+    )
+
+
+def test_check_plan_charges_in_sunlight_and_saturates():
+    steps = [PlanStep.parse("sleep:12000")]
+
+    report = power_budget.check_plan(
+        steps, 0.0, 900.0, 1000.0, model(base_load=0.2), in_sunlight, step=1.0
+    )
+
+    # +2.8/s in sunlight fills the battery, then each 2000 s shadow drains 400
+    assert report.valid
+    assert report.min_charge == pytest.approx(600.0)
+    assert report.end_charge == pytest.approx(600.0)
+    assert report.depleted_at is None
+    assert report.steps[0].sunlight == pytest.approx(2 / 3)
+
+
+def test_check_plan_finds_depletion():
+    steps = [PlanStep.parse("sleep:3000"), PlanStep.parse("maneuver:3000:10")]
+
+    report = power_budget.check_plan(
+        steps, 0.0, 500.0, 1000.0, model(), in_sunlight, step=1.0
+    )
+
+    assert not report.valid
+    # the maneuver starts in sunlight at 1000 and drains 8/s: 125 s to empty
+    assert report.depleted_at is not None
+    assert report.below_reserve_at < report.depleted_at
+    assert report.min_charge == 0.0
+    assert report.end_charge == 0.0
+    assert [step.activity for step in report.steps] == ["sleep", "maneuver"]
+    assert report.steps[0].end_charge == pytest.approx(1000.0)
+
+
+def test_check_plan_reserve():
+    steps = [PlanStep.parse("experiment:100:1")]
+
+    tight = power_budget.check_plan(
+        steps, 4000.0, 250.0, 1000.0, model(), in_sunlight, reserve=0.1
+    )
+    loose = power_budget.check_plan(
+        steps, 4000.0, 250.0, 1000.0, model(), in_sunlight, reserve=0.0
+    )
+
+    # 100 s in shadow drawing 2/s leaves 50, below a 100 reserve
+    assert tight.end_charge == pytest.approx(50.0)
+    assert not tight.valid
+    assert loose.valid
@@ -0,0 +1,45 @@
+import pytest
+
+from llmsat.libs.krpc_sim import SimConnection
+from llmsat.libs.profiling import RPCCounter, StartupProfile
+
+
+@pytest.fixture
+def connection():
+    connection = SimConnection()
+    yield connection
+    connection.close()
+
+
+def test_nested_counters(connection):
+    vessel = connection.space_center.active_vessel
+
+    with RPCCounter(connection) as outer:
+        vessel.mass
+        with RPCCounter(connection) as inner:
+            vessel.mass
+        vessel.mass
+
+    assert (outer.count, inner.count) == (3, 1)
+    assert "send_message" not in vars(connection._rpc_connection)
+
+
+def test_overlapping_counters(connection):
+    vessel = connection.space_center.active_vessel
+    profile = StartupProfile()
+    profile.count_rpcs(connection)
+
+    with profile.phase("components"):
+        with RPCCounter(connection) as component:
+            vessel.mass
+        vessel.mass
+    first = RPCCounter(connection).__enter__()
+    vessel.mass
+    profile.stop()
+    vessel.mass
+    first.__exit__()
+
+    assert profile.phases[0][2] == 2
+    assert component.count == 1
+    assert first.count == 2
+    assert "send_message" not in vars(connection._rpc_connection)
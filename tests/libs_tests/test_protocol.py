@@ -0,0 +1,107 @@
+import pytest
+import zmq
+
+from llmsat.libs import protocol, utils
+
+
+@pytest.fixture
+def sockets():
+    context = zmq.Context()
+    server = context.socket(zmq.PAIR)
+    server.bind("inproc://protocol-test")
+    client = context.socket(zmq.PAIR)
+    client.connect("inproc://protocol-test")
+    yield server, client
+    client.close()
+    server.close()
+    context.term()
+
+
+def test_round_trip(sockets):
+    server, client = sockets
+    messages = [
+        utils.Message(type=utils.MessageType.CONNECT, data=protocol.offer_versions()),
+        utils.Message(type=utils.MessageType.COMMAND, data="get_orbit -h"),
+        utils.Message(type=utils.MessageType.OUTPUT, data="é" * 100_000),  # zero-copy
+        utils.Message(type=utils.MessageType.DISCONNECT),
+    ]
+    for message in messages:
+        protocol.send(client, message)
+        assert protocol.recv(server) == message
+
+
+def test_invalid_frames():
+    (frame,) = protocol.encode(utils.Message(type=utils.MessageType.COMMAND))
+
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([b"XXXX" + frame[4:]])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([frame[:4] + bytes([99]) + frame[5:]])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([frame[:3]])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([frame, b"", b""])
+
+
+def test_invalid_payload():
+    (frame,) = protocol.encode(utils.Message(type=utils.MessageType.COMMAND))
+
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([frame + b"\xff\xfe"])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode([frame, b"get_orbit \xc3"])
+
+
+def test_negotiate_version(monkeypatch):
+    assert protocol.negotiate_version(None) == 1
+    assert protocol.negotiate_version(protocol.offer_versions()) == 3
+    assert protocol.negotiate_version("1") == 1
+
+    monkeypatch.setattr(protocol, "SUPPORTED_VERSIONS", (1, 2, 3))
+    assert protocol.negotiate_version("1,2,3") == 3
+    with pytest.raises(protocol.ProtocolError):
+        protocol.negotiate_version("4,5")
+
+
+def test_offer_with_dashboard_revision():
+    offer = protocol.offer_versions(dashboard=1234)
+
+    assert offer == "1,2,3;dashboard=1234"
+    assert protocol.negotiate_version(offer) == 3
+    assert protocol.offered_dashboard(offer) == 1234
+    assert protocol.offered_dashboard(protocol.offer_versions()) is None
+    assert protocol.offered_dashboard(None) is None
+
+
+def test_correlation_id_by_version():
+    message = utils.Message(type=utils.MessageType.OUTPUT, data="chunk", id=42)
+    large = utils.Message(type=utils.MessageType.OUTPUT, data="x" * 100_000, id=7)
+
+    assert protocol.decode(protocol.encode(message, version=2)) == message
+    assert protocol.decode(protocol.encode(large, version=2)) == large
+    assert protocol.decode(protocol.encode(message, version=1)).id == 0
+
+
+def test_envelope_by_version():
+    alert = utils.Message(
+        type=utils.MessageType.OUTPUT,
+        data="Alarm triggered",
+        channel=utils.Channel.ALERT,
+        priority=utils.Priority.HIGH,
+    )
+    reply = utils.Message(type=utils.MessageType.OUTPUT, data="ok", id=5)
+
+    assert protocol.decode(protocol.encode(alert, version=3)) == alert
+
+    # earlier versions have no channel or priority, so they are inferred
+    for version in (1, 2):
+        decoded = protocol.decode(protocol.encode(alert, version=version))
+        assert decoded.channel == utils.Channel.ALERT
+        assert decoded.priority == utils.Priority.NORMAL
+    assert protocol.decode(protocol.encode(reply, version=2)).channel == (
+        utils.Channel.COMMAND
+    )
+    connect = utils.Message(type=utils.MessageType.CONNECT, data="1,2,3")
+    assert protocol.decode(protocol.encode(connect, version=1)).channel == (
+        utils.Channel.CONTROL
+    )
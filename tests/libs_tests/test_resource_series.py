@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from llmsat.libs.krpc_sim import SimConnection
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.resource_series import ResourceSeries, RingBuffer
+from llmsat.libs.telemetry import DEFAULT_RATE, TelemetryHub
+
+
+@pytest.fixture
+def connection():
+    for cls in (TelemetryHub, ResourceSeries):
+        cls._instance = None
+        cls._initialized = False
+    connection = SimConnection()
+    yield connection
+    connection.close()
+    for cls in (TelemetryHub, ResourceSeries):
+        cls._instance = None
+        cls._initialized = False
+
+
+@pytest.fixture
+def series(connection):
+    vessel = connection.space_center.active_vessel
+    return ResourceSeries(vessel, TelemetryHub(connection), rate=0, window=60)
+
+
+def sample_every(connection, series, seconds: float, count: int):
+    """Take count samples, seconds of game time apart."""
+    for _ in range(count):
+        series.sample()
+        connection.advance(seconds)
+        time.sleep(1.5 / DEFAULT_RATE)  # let the ut stream catch up
+    series.sample()
+
+
+def by_name(forecasts):
+    return {forecast.name: forecast for forecast in forecasts}
+
+
+def test_ring_buffer_keeps_latest_rows():
+    buffer = RingBuffer(3, 2)
+    for i in range(5):
+        buffer.append([i, 10 * i])
+
+    assert len(buffer) == 3
+    assert buffer.rows()[:, 0].tolist() == [2, 3, 4]
+    assert buffer.last()[1] == 40
+
+
+def test_records_are_streamed(connection, series):
+    records = series.records()
+
+    assert records == [
+        {"name": "ElectricCharge", "amount": 800.0, "max": 1000.0},
+        {"name": "LiquidFuel", "amount": 400.0, "max": 400.0},
+    ]
+
+    with RPCCounter(connection) as counter:
+        series.records()
+
+    assert counter.count == 0
+
+
+def test_forecast_time_to_empty(connection, series):
+    connection.space_center.active_vessel.resources.set_rate("ElectricCharge", -2.0)
+    sample_every(connection, series, 10, 5)
+
+    forecasts = by_name(series.forecast())
+    charge = forecasts["ElectricCharge"]
+    assert charge.consumption_rate == pytest.approx(2.0, rel=0.05)
+    assert charge.charge_rate == 0
+    assert charge.time_to_empty == pytest.approx(charge.amount / 2.0, rel=0.05)
+    assert charge.time_to_full is None
+    assert charge.window >= 50
+
+    fuel = forecasts["LiquidFuel"]
+    assert fuel.consumption_rate == 0
+    assert fuel.time_to_empty is None
+
+
+def test_forecast_time_to_full(connection, series):
+    connection.space_center.active_vessel.resources.set_rate("ElectricCharge", 4.0)
+    sample_every(connection, series, 5, 4)
+
+    charge = by_name(series.forecast())["ElectricCharge"]
+    assert charge.charge_rate == pytest.approx(4.0, rel=0.05)
+    assert charge.time_to_full == pytest.approx(
+        (charge.max - charge.amount) / 4.0, rel=0.05
+    )
+    assert charge.time_to_empty is None
+
+
+def test_forecast_rates_cover_the_window(connection, series):
+    resources = connection.space_center.active_vessel.resources
+    resources.set_rate("ElectricCharge", 5.0)
+    sample_every(connection, series, 10, 10)
+    resources.set_rate("ElectricCharge", -1.0)
+    sample_every(connection, series, 10, 6)
+
+    charge = by_name(series.forecast())["ElectricCharge"]
+    assert charge.charge_rate == pytest.approx(0.0, abs=0.1)
+    assert charge.consumption_rate == pytest.approx(1.0, rel=0.05)
+
+
+def test_history_is_bounded(connection):
+    vessel = connection.space_center.active_vessel
+    series = ResourceSeries(vessel, TelemetryHub(connection), capacity=4, rate=0)
+    sample_every(connection, series, 1, 10)
+
+    assert len(series) == 4
+
+
+def test_paused_samples_are_dropped(connection, series):
+    series.sample()
+    series.sample()
+
+    assert len(series) <= 2  # the game clock runs in real time in the sim
+    assert series.forecast()[0].window < 1
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+from llmsat.libs import utils
+from llmsat.libs.streaming import ResponseRouter
+
+
+def output(id, data):
+    return utils.Message(type=utils.MessageType.OUTPUT, data=data, id=id)
+
+
+def end(id):
+    return utils.Message(type=utils.MessageType.END, id=id)
+
+
+def test_chunks_arrive_before_end():
+    router = ResponseRouter()
+    stream = router.open("get_orbit")
+    release = threading.Event()
+
+    def console():
+        router.dispatch(output(stream.id, "line 1"))
+        release.wait(2)
+        router.dispatch(output(stream.id, "line 2"))
+        router.dispatch(end(stream.id))
+
+    threading.Thread(target=console).start()
+
+    chunks = stream.chunks(timeout=2)
+    assert next(chunks) == "line 1"
+    assert not stream.finished
+    release.set()
+    assert list(chunks) == ["line 2"]
+    assert stream.finished
+    assert stream.time_to_first_chunk <= stream.finished_at - stream.opened_at
+
+
+def test_unsolicited_messages_are_not_routed():
+    router = ResponseRouter()
+    stream = router.open("help")
+
+    assert not router.dispatch(output(0, "alert"))
+    assert not router.dispatch(output(stream.id + 1, "stale"))
+    assert not router.dispatch(utils.Message(type=utils.MessageType.VERSION, data="2"))
+    assert router.dispatch(end(stream.id))
+    assert not router.dispatch(end(stream.id))
+
+
+def test_timeout_detaches_and_delivers_late_output():
+    late = []
+    router = ResponseRouter(on_late_output=lambda stream, text: late.append(text))
+    stream = router.open("execute_maneuver_nodes")
+
+    router.dispatch(output(stream.id, "burn started"))
+    start = time.monotonic()
+    assert stream.read(timeout=0.05) == "burn started"
+    assert time.monotonic() - start < 1
+    assert stream.detached
+
+    router.dispatch(output(stream.id, "burn complete"))
+    router.dispatch(output(stream.id, "nodes removed"))
+    router.dispatch(end(stream.id))
+    assert late == ["burn complete\nnodes removed"]
+
+
+def test_read_async():
+    late = []
+    router = ResponseRouter(on_late_output=lambda stream, text: late.append(text))
+    finished = router.open("get_orbit")
+    detached = router.open("warp_to")
+
+    async def read():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, router.dispatch, output(finished.id, "orbit"))
+        loop.call_later(0.04, router.dispatch, end(finished.id))
+        router.dispatch(output(detached.id, "warping"))
+        return await finished.read_async(timeout=2), await detached.read_async(0.01)
+
+    assert asyncio.run(read()) == ("orbit", "warping")
+    assert not finished.detached
+    assert detached.detached
+
+    router.dispatch(output(detached.id, "arrived"))
+    router.dispatch(end(detached.id))
+    assert late == ["arrived"]
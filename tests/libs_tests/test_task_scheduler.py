@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from llmsat.libs.task_scheduler import CycleError, TaskScheduler
+
+
+def test_next_follows_key_then_dependencies():
+    scheduler = TaskScheduler()
+    scheduler.add("survey", key=(0, 100.0))
+    scheduler.add("burn", key=(-2, 500.0), dependencies=["survey"])
+    scheduler.add("report", key=(-1, 50.0))
+
+    assert scheduler.next() == "report"
+    scheduler.update("report", eligible=False)  # in progress
+    assert scheduler.next() == "survey"
+    assert scheduler.blocked_by("burn") == ["survey"]
+
+    scheduler.update("survey", eligible=False, done=True)
+    assert scheduler.next() == "burn"
+
+    scheduler.update("survey", eligible=True, done=False)  # reopened
+    assert scheduler.next() == "survey"
+
+
+def test_cycle_is_rejected_without_changes():
+    scheduler = TaskScheduler()
+    for id in "abc":
+        scheduler.add(id, key=(0,))
+    scheduler.add_dependencies("b", ["a"])
+    scheduler.add_dependencies("c", ["b"])
+    order = scheduler.topological_order()
+
+    with pytest.raises(CycleError):
+        scheduler.add_dependencies("a", ["c"])
+    with pytest.raises(CycleError):
+        scheduler.add_dependencies("a", ["a"])
+
+    assert scheduler.topological_order() == order
+    assert scheduler.blocked_by("a") == []
+    assert scheduler.next() == "a"
+
+
+def test_incremental_order_matches_dependencies():
+    rng = random.Random(4)
+    scheduler = TaskScheduler()
+    edges = set()
+    for id in range(200):
+        scheduler.add(id, key=(rng.random(),))
+
+    for _ in range(600):
+        task, dependency = rng.sample(range(200), 2)
+        try:
+            scheduler.add_dependencies(task, [dependency])
+            edges.add((dependency, task))
+        except CycleError:
+            pass
+
+    position = {id: i for i, id in enumerate(scheduler.topological_order())}
+    assert all(position[before] < position[after] for before, after in edges)
+
+    # completing tasks in order always leaves something ready until all are done
+    completed = []
+    while (id := scheduler.next()) is not None:
+        scheduler.update(id, done=True)
+        completed.append(id)
+    assert len(completed) == 200
@@ -0,0 +1,86 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llmsat.libs.telemetry import TelemetryHub
+
+
+class Stream:
+    def __init__(self, func, *args):
+        self.call = (func, *args)
+        self.callbacks = []
+        self.rate = 0
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.push(self.call[0](*self.call[1:]))
+
+    def push(self, value):
+        for callback in self.callbacks:
+            callback(value)
+
+
+@pytest.fixture
+def hub():
+    vessel = SimpleNamespace(met=10.0, thrust=0.0, orbit=None)
+    space_center = SimpleNamespace(ut=1000.0, active_vessel=vessel)
+    streams = {}
+
+    def add_stream(func, obj, name):
+        streams[name] = Stream(func, obj, name)
+        return streams[name]
+
+    connection = SimpleNamespace(space_center=space_center, add_stream=add_stream)
+
+    TelemetryHub._instance = None
+    TelemetryHub._initialized = False
+    hub = TelemetryHub(connection)
+    hub.streams = streams
+    yield hub
+    TelemetryHub._instance = None
+    TelemetryHub._initialized = False
+
+
+def test_get_hits_cache(hub):
+    assert hub.get("ut") == 1000.0
+    hub.streams["ut"].push(1001.0)
+
+    assert hub.get("ut") == 1001.0
+    assert hub.stats()["ut"] == {"hits": 2, "misses": 0}
+
+
+def test_stale_value_is_refreshed(hub):
+    hub.configure("met", max_age=0.01)
+    hub.get("met")
+    hub.connection.space_center.active_vessel.met = 20.0
+    time.sleep(0.02)
+
+    assert hub.get("met") == 20.0
+    assert hub.stats()["met"] == {"hits": 1, "misses": 1}
+
+
+def test_callbacks(hub):
+    values = []
+    hub.add_callback("ut", values.append)
+    hub.streams["ut"].push(1005.0)
+
+    assert values == [1000.0, 1005.0]
+
+
+def test_concurrent_reads(hub):
+    def read():
+        for _ in range(1000):
+            hub.get("thrust")
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = hub.stats()["thrust"]
+    assert stats["hits"] + stats["misses"] == 4000
@@ -0,0 +1,55 @@
+import math
+
+from llmsat.libs.thermal import HeatingTracker
+
+IDS = ["000", "001", "002"]
+MAX = [1000.0, 1000.0, 1000.0]
+
+
+def test_tracks_heating_rate_and_time_to_limit():
+    tracker = HeatingTracker(smoothing=1.0)
+    tracker.update(IDS, [300.0, 300.0, 300.0], MAX, ut=0.0)
+    tracker.update(IDS, [300.0, 310.0, 290.0], MAX, ut=10.0)
+
+    assert list(tracker.heating_rate) == [0.0, 1.0, -1.0]
+    assert math.isinf(tracker.time_to_limit[0])
+    assert tracker.time_to_limit[1] == 690.0
+    assert tracker.state(2, "Tank").time_to_limit is None
+
+
+def test_reports_threshold_crossing_once():
+    tracker = HeatingTracker(threshold=0.9)
+
+    assert tracker.update(IDS, [300.0, 300.0, 300.0], MAX, ut=0.0) == []
+    assert tracker.update(IDS, [300.0, 950.0, 300.0], MAX, ut=1.0) == [(1, "threshold")]
+    assert tracker.update(IDS, [300.0, 960.0, 300.0], MAX, ut=2.0) == []
+
+
+def test_rearms_after_cooling_below_margin():
+    tracker = HeatingTracker(threshold=0.9, horizon=0.0)
+    tracker.update(IDS, [300.0, 950.0, 300.0], MAX, ut=0.0)
+
+    assert (
+        tracker.update(IDS, [300.0, 880.0, 300.0], MAX, ut=1.0) == []
+    )  # within margin
+    tracker.update(IDS, [300.0, 800.0, 300.0], MAX, ut=2.0)
+    assert tracker.update(IDS, [300.0, 950.0, 300.0], MAX, ut=3.0) == [(1, "threshold")]
+
+
+def test_reports_predicted_breach():
+    tracker = HeatingTracker(horizon=100.0, smoothing=1.0)
+    tracker.update(IDS, [300.0, 300.0, 300.0], MAX, ut=0.0)
+
+    events = tracker.update(IDS, [300.0, 300.0, 400.0], MAX, ut=10.0)
+
+    assert events == [(2, "predicted")]  # 600 K to go at 10 K/s
+    assert tracker.closest_to_limit(1) == [2]
+
+
+def test_tracks_parts_afresh_when_they_change():
+    tracker = HeatingTracker(smoothing=1.0)
+    tracker.update(IDS, [300.0, 300.0, 300.0], MAX, ut=0.0)
+
+    tracker.update(IDS[:2], [300.0, 500.0], MAX[:2], ut=10.0)
+
+    assert list(tracker.heating_rate) == [0.0, 0.0]
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from llmsat.libs.krpc_sim import SimConnection, SimPart
+from llmsat.libs.krpc_types import AttachmentMode, PartType
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.vessel_parts import PartsModel
+
+
+@pytest.fixture
+def connection():
+    for cls in (TelemetryHub, PartsModel):
+        cls._instance = None
+        cls._initialized = False
+    connection = SimConnection(part_count=20)
+    yield connection
+    connection.close()
+    for cls in (TelemetryHub, PartsModel):
+        cls._instance = None
+        cls._initialized = False
+
+
+@pytest.fixture
+def model(connection):
+    vessel = connection.space_center.active_vessel
+    return PartsModel(vessel, TelemetryHub(connection), rate=0)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def flatten(part):
+    yield part
+    for child in part.children:
+        yield from flatten(child)
+
+
+def test_tree_numbers_parts_depth_first(model):
+    parts = list(flatten(model.tree()))
+
+    assert [part.id for part in parts] == [f"{i:03}" for i in range(20)]
+    assert parts[0].name == "HECS2.ProbeCore"
+    assert parts[0].type == PartType.NONE
+    assert parts[1].type == PartType.EXPERIMENT
+    assert {part.type for part in parts} >= {
+        PartType.ANTENNA,
+        PartType.ENGINE,
+        PartType.SOLAR_PANEL,
+    }
+    assert {part.attachment for part in parts} == set(AttachmentMode)
+
+
+def test_tree_reads_static_facts_once(connection, model):
+    model.tree()
+
+    with RPCCounter(connection) as counter:
+        for _ in range(10):
+            model.tree()
+
+    assert counter.count == 0
+    assert model.refreshes == 1
+
+
+def test_tree_streams_dynamic_values(connection, model):
+    model.tree()
+    root = connection.space_center.active_vessel.parts.root
+    root._fields["temperature"] = 900.0
+
+    assert wait_for(lambda: model.tree().temperature == 900.0)
+    assert model.refreshes == 1
+
+
+def test_refreshes_on_new_part(connection, model):
+    model.tree()
+    root = connection.space_center.active_vessel.parts.root
+    root.add_child(SimPart(connection, "dockingPort", "Docking Port", 20.0))
+
+    assert wait_for(lambda: len(list(flatten(model.tree()))) == 21)
+    assert model.refreshes == 2
+
+
+def test_refreshes_on_staging(connection, model):
+    model.tree()
+    connection.space_center.active_vessel.control.activate_next_stage()
+
+    assert wait_for(lambda: model.refresh() or model.refreshes == 2)
+    assert model.refreshes == 2
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from llmsat.libs import kepler, utils, visibility
+
+ENCELADUS_MU = 7.211e9  # m^3/s^2
+ENCELADUS_RADIUS = 252100.0  # m
+SUN = np.array([1.0, 0.0, 0.0])
+
+
+def circular_orbit(radius, **kwargs):
+    elements = dict(
+        body="Enceladus",
+        body_radius=ENCELADUS_RADIUS,
+        gravitational_parameter=ENCELADUS_MU,
+        semi_major_axis=radius,
+        eccentricity=0.0,
+        inclination=0.0,
+        longitude_of_ascending_node=0.0,
+        argument_of_periapsis=0.0,
+        mean_anomaly_at_epoch=0.0,
+        epoch=0.0,
+    )
+    elements.update(kwargs)
+    return kepler.OrbitalElements(**elements)
+
+
+def test_circular_eclipses_match_geometry():
+    radius = 2 * ENCELADUS_RADIUS
+    elements = circular_orbit(radius)
+    period = elements.period
+
+    intervals, _ = visibility.blocked_intervals(elements, SUN, 0.0, 20 * period)
+
+    # the shadow is centred on the anti-sun point, half a period after the epoch
+    half_width = np.arcsin(ENCELADUS_RADIUS / radius) / elements.mean_motion
+    assert len(intervals) == 20
+    for orbit, (start, end) in enumerate(intervals):
+        middle = (orbit + 0.5) * period
+        assert start == pytest.approx(middle - half_width, abs=visibility.TOLERANCE)
+        assert end == pytest.approx(middle + half_width, abs=visibility.TOLERANCE)
+
+
+def test_eclipse_in_progress_at_the_edges():
+    elements = circular_orbit(2 * ENCELADUS_RADIUS)
+    period = elements.period
+
+    intervals, _ = visibility.blocked_intervals(elements, SUN, 0.5 * period, period)
+
+    assert intervals[0][0] == 0.5 * period
+    assert len(intervals) == 1
+
+
+def test_no_eclipses_facing_the_sun():
+    elements = circular_orbit(
+        2 * ENCELADUS_RADIUS, inclination=np.pi / 2, longitude_of_ascending_node=0.0
+    )
+
+    intervals, _ = visibility.blocked_intervals(
+        elements, [0.0, 1.0, 0.0], 0.0, 10 * elements.period
+    )
+
+    assert intervals == []
+
+
+def test_empty_search_on_escape_trajectory():
+    elements = circular_orbit(-2 * ENCELADUS_RADIUS, eccentricity=1.5)
+    assert np.isinf(elements.period)
+
+    assert visibility.blocked_intervals(elements, SUN, 100.0, 100.0) == ([], 0)
+    report = visibility.occultation_report(elements, SUN, "Sun", 100.0, 100.0)
+    assert report.intervals == []
+    assert report.blocked_fraction == 0.0
+
+
+def test_eccentric_orbit_matches_dense_sampling():
+    elements = circular_orbit(
+        3 * ENCELADUS_RADIUS, eccentricity=0.5, argument_of_periapsis=0.4
+    )
+    end = 5 * elements.period
+
+    intervals, evaluations = visibility.blocked_intervals(elements, SUN, 0.0, end)
+
+    ut = np.linspace(0.0, end, 1_000_001)
+    position = kepler.propagate(elements, ut)["position"]
+    dense = kepler.in_shadow(position, SUN, ENCELADUS_RADIUS)
+    blocked = sum(b - a for a, b in intervals)
+    assert blocked / end == pytest.approx(dense.mean(), abs=1e-5)
+    assert evaluations < 10_000
+
+
+def test_occultation_report():
+    elements = circular_orbit(2 * ENCELADUS_RADIUS)
+
+    report = visibility.occultation_report(
+        elements, SUN, "Sun", 0.0, 3 * elements.period
+    )
+
+    assert report.target == "Sun"
+    assert report.start == utils.ksp_ut_to_datetime(0.0)
+    assert len(report.intervals) == 3
+    assert report.blocked_fraction == pytest.approx(np.arcsin(0.5) / np.pi, abs=1e-4)
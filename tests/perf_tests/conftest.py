@@ -0,0 +1,40 @@
+import pytest
+
+from llmsat.components.alarm_manager import AlarmManager
+from llmsat.components.autopilot import AutopilotService
+from llmsat.components.eps import EPS
+from llmsat.components.experiment_manager import ExperimentManager
+from llmsat.components.orbit_propagator import OrbitPropagator
+from llmsat.components.spacecraft_manager import SpacecraftManager
+from llmsat.components.task_manager import TaskManager
+from llmsat.components.thermal_monitor import ThermalMonitor
+from llmsat.libs.krpc_sim import SimConnection
+from llmsat.libs.resource_series import ResourceSeries
+from llmsat.libs.telemetry import TelemetryHub
+from llmsat.libs.vessel_parts import PartsModel
+
+SINGLETONS = (
+    TelemetryHub,
+    PartsModel,
+    ResourceSeries,
+    AlarmManager,
+    AutopilotService,
+    EPS,
+    ExperimentManager,
+    OrbitPropagator,
+    SpacecraftManager,
+    TaskManager,
+    ThermalMonitor,
+)
+
+
+@pytest.fixture
+def sim_connection():
+    """A fresh simulated KSP connection, with component singletons reset."""
+    for cls in SINGLETONS:
+        cls._instance = None
+        cls._initialized = False
+
+    connection = SimConnection(latency=0.0005)
+    yield connection
+    connection.close()
@@ -0,0 +1,72 @@
+import threading
+from datetime import timedelta
+
+from llmsat.components.alarm_manager import AlarmManager, AlarmSchedule
+from llmsat.libs import utils
+
+
+def test_alarms_added_during_reconcile_are_kept(sim_connection):
+    manager = AlarmManager(sim_connection)
+    manager.get_alarms()  # waits for the sync
+    now = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+
+    stop = threading.Event()
+
+    def reconcile():
+        while not stop.is_set():
+            manager._reconcile()
+
+    thread = threading.Thread(target=reconcile)
+    thread.start()
+    try:
+        for i in range(20):
+            manager.add_alarm(
+                name=f"alarm-{i}", time=now + timedelta(days=365), description=None
+            )
+    finally:
+        stop.set()
+        thread.join()
+
+    assert len(manager._alarms) == 20
+    assert len(manager._schedule) == 20
+
+
+def test_due_alarm_removed_in_game_is_skipped(sim_connection):
+    manager = AlarmManager(sim_connection)
+    manager.get_alarms()
+    now = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+    alarm = manager.add_alarm(
+        name="removed", time=now + timedelta(days=365), description=None
+    )
+    kept = manager.add_alarm(
+        name="kept", time=now + timedelta(days=365), description=None
+    )
+    del manager._alarms[alarm.id]
+
+    due = manager._pop_due_alarms(utils.datetime_to_ksp_ut(now + timedelta(days=366)))
+
+    assert due == [kept]
+
+
+def test_alarm_schedule_pop_due():
+    schedule = AlarmSchedule()
+    schedule.push("b", 20.0)
+    schedule.push("a", 10.0)
+    schedule.push("c", 30.0)
+
+    assert schedule.next_ut() == 10.0
+    assert schedule.pop_due(25.0) == ["a", "b"]
+    assert schedule.next_ut() == 30.0
+    assert len(schedule) == 1
+
+
+def test_alarm_schedule_remove_and_reschedule():
+    schedule = AlarmSchedule()
+    schedule.push("a", 10.0)
+    schedule.push("b", 20.0)
+    schedule.remove("a")
+    schedule.push("b", 5.0)
+
+    assert schedule.next_ut() == 5.0
+    assert schedule.pop_due(100.0) == ["b"]
+    assert schedule.next_ut() is None
@@ -0,0 +1,91 @@
+import json
+import os
+import socket
+from datetime import datetime
+
+import pytest
+import zmq
+
+from llmsat.components import task_manager
+from llmsat.components.task_manager import TaskManager
+from llmsat.libs import protocol, utils
+from llmsat.libs.krpc_sim import SimConnection
+from llmsat.libs.telemetry import TelemetryHub
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def controller(tmp_path_factory):
+    """A controller socket connected to a console on simulated KSP. A console
+    removes built-in commands from cmd2 itself, so only one is made per process."""
+    from llmsat.console import Console
+
+    for cls in (TelemetryHub, TaskManager):
+        cls._instance = None
+        cls._initialized = False
+    path = tmp_path_factory.mktemp("console")
+    cwd = os.getcwd()
+    os.chdir(path)  # the console logs to app.log
+    task_db_path = task_manager.TASK_DB_PATH
+    task_manager.TASK_DB_PATH = path / "tasks.db"
+
+    connection = SimConnection()
+    port = free_port()
+    Console(port=port, quiet=True, command_sets=[TaskManager(connection)])
+    context = zmq.Context()
+    controller_socket = context.socket(zmq.PAIR)
+    controller_socket.connect(f"tcp://localhost:{port}")
+    yield controller_socket
+
+    controller_socket.close(linger=0)
+    context.term()
+    connection.close()
+    task_manager.TASK_DB_PATH = task_db_path
+    os.chdir(cwd)
+    for cls in (TelemetryHub, TaskManager):
+        cls._instance = None
+        cls._initialized = False
+
+
+def run(socket, command: str, id: int) -> str:
+    """Send a command and collect its output until END."""
+    protocol.send(
+        socket, utils.Message(type=utils.MessageType.COMMAND, data=command, id=id)
+    )
+    output = []
+    while True:
+        assert socket.poll(5000), f"no reply to '{command}'"
+        message = protocol.recv(socket)
+        if message.type == utils.MessageType.END:
+            assert message.id == id
+            return "\n".join(output)
+        output.append(message.data)
+
+
+def test_task_commands_print_json(controller):
+    manager = TaskManager()
+    manager.add_task(name="Survey", end=datetime(2045, 1, 2))
+    manager.add_task(name="Report", end=datetime(2045, 1, 1))
+    manager.add_task(name="Someday")
+
+    due = json.loads(run(controller, "get_due_tasks -before 2045-01-03T00:00:00", 1))
+    assert [task["name"] for task in due] == ["Report", "Survey"]
+    assert due[0]["end"] == "2045-01-01T00:00:00"
+
+    tasks = json.loads(run(controller, "read_tasks", 2))
+    assert sorted(task["name"] for task in tasks.values()) == [
+        "Report",
+        "Someday",
+        "Survey",
+    ]
+
+
+def test_command_without_id_gets_its_output(controller):
+    output = run(controller, "read_tasks", 0)
+
+    assert isinstance(json.loads(output), dict)
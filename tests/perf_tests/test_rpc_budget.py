@@ -0,0 +1,210 @@
+import time
+from datetime import timedelta
+
+from llmsat.components.alarm_manager import AlarmManager
+from llmsat.components.eps import EPS
+from llmsat.components.orbit_propagator import OrbitPropagator
+from llmsat.components.spacecraft_manager import SpacecraftManager
+from llmsat.components.thermal_monitor import ThermalMonitor
+from llmsat.libs import utils
+from llmsat.libs.krpc_types import Orbit
+from llmsat.libs.power_budget import PlanStep
+from llmsat.libs.profiling import RPCCounter
+from llmsat.libs.telemetry import TelemetryHub
+
+
+def test_orbit_snapshot_budget(sim_connection):
+    orbit_obj = sim_connection.space_center.active_vessel.orbit
+
+    with RPCCounter(sim_connection) as counter:
+        Orbit(orbit_obj)
+
+    assert counter.count <= 2  # orbit fields, body fields
+
+
+def test_idle_alarm_monitor_budget(sim_connection):
+    manager = AlarmManager(sim_connection)
+    now = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+    for i in range(10):
+        manager.add_alarm(
+            name=f"idle-{i}", time=now + timedelta(days=365), description=None
+        )
+
+    with RPCCounter(sim_connection) as counter:
+        time.sleep(1.0)
+
+    assert counter.count <= 1
+
+
+def test_alarm_triggers_without_polling(sim_connection):
+    manager = AlarmManager(sim_connection)
+    triggered = []
+    manager._on_alarm_trigger = lambda alarm, ut: triggered.append(alarm.name)
+
+    now = utils.ksp_ut_to_datetime(manager.telemetry.get("ut"))
+    manager.add_alarm(name="soon", time=now + timedelta(seconds=60), description=None)
+    sim_connection.advance(120)
+
+    deadline = time.monotonic() + 2.0
+    while not triggered and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert triggered == ["soon"]
+
+
+def test_analytic_radius_budget(sim_connection):
+    propagator = OrbitPropagator(sim_connection)
+    now = utils.ksp_ut_to_datetime(propagator.telemetry.get("ut"))
+
+    with RPCCounter(sim_connection) as counter:
+        radii = propagator.radius_at(now, now + timedelta(days=1), periods=1000)
+
+    assert len(radii) == 1000
+    assert counter.count <= 3
+
+
+def test_telemetry_reads_are_cached(sim_connection):
+    hub = TelemetryHub(sim_connection)
+    hub.get("ut")
+
+    with RPCCounter(sim_connection) as counter:
+        for _ in range(100):
+            hub.get("ut")
+
+    assert counter.count <= 2
+    assert hub.stats()["ut"]["hits"] >= 98
+
+
+def test_parts_tree_budget(sim_connection):
+    manager = SpacecraftManager(sim_connection)
+    part_count = len(sim_connection.space_center.active_vessel.parts.all)
+
+    with RPCCounter(sim_connection) as counter:
+        tree = manager.get_parts_tree()
+
+    assert tree.id == "000"
+    # streams for the part list, the stage and each part's mass and temperature,
+    # and one batched read of the static facts
+    assert counter.count <= 2 * part_count + 3
+
+    with RPCCounter(sim_connection) as counter:
+        manager.get_parts_tree()
+
+    assert counter.count == 0
+
+
+def test_idle_thermal_monitor_budget(sim_connection):
+    monitor = ThermalMonitor(sim_connection, rate=20)
+    monitor.get_thermal_status()  # opens the temperature streams
+
+    with RPCCounter(sim_connection) as counter:
+        time.sleep(1.0)
+
+    assert counter.count <= 1
+
+
+def test_thermal_monitor_alerts_on_predicted_breach(sim_connection):
+    monitor = ThermalMonitor(sim_connection, rate=20, horizon=300)
+    alerts = []
+    monitor._on_thermal_alert = lambda part, reason: alerts.append((part.part, reason))
+    monitor.get_thermal_status()
+
+    engine = sim_connection.space_center.active_vessel.parts.all[6]
+    engine.set_heating(10.0)  # reaches 2000 K in under 300 s
+
+    deadline = time.monotonic() + 2.0
+    while not alerts and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert alerts == [("006", "predicted")]
+    assert monitor.get_thermal_status(1)[0].part == "006"
+
+
+def test_thermal_alert_waits_for_console(sim_connection):
+    engine = sim_connection.space_center.active_vessel.parts.all[6]
+    engine._fields["temperature"] = 1900.0  # already above the threshold
+
+    monitor = ThermalMonitor(sim_connection, rate=20)
+    monitor.get_thermal_status()  # reports the part before a console is attached
+    assert len(monitor._pending_alerts) == 1
+
+    class Console:
+        alerts = []
+
+        def async_alert(self, message, priority):
+            self.alerts.append(message)
+
+    monitor._cmd = Console()
+    deadline = time.monotonic() + 2.0
+    while not Console.alerts and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(Console.alerts) == 1
+    assert "above" in Console.alerts[0]
+    assert not monitor._pending_alerts
+
+
+def test_resource_forecast_budget(sim_connection):
+    manager = SpacecraftManager(sim_connection)
+    sim_connection.space_center.active_vessel.resources.set_rate("ElectricCharge", -1.0)
+    manager.get_resource_forecast()  # opens the resource and ut streams
+
+    with RPCCounter(sim_connection) as counter:
+        records = manager.get_resource_records()
+        time.sleep(2.5)  # the sampler takes a sample each second
+        forecast = manager.get_resource_forecast("ElectricCharge")[0]
+
+    assert len(records) == 2
+    assert forecast.consumption_rate > 0
+    assert counter.count == 0
+
+
+def test_power_plan_budget(sim_connection):
+    eps = EPS(sim_connection)
+    plan = [
+        PlanStep.parse(step)
+        for step in ("experiment:600", "sleep:86400", "maneuver:300", "sleep:172800")
+    ]
+    eps.validate_power_plan(plan)  # reads the sun's direction
+    time.sleep(2.5)  # the charge history is sampled each second
+
+    with RPCCounter(sim_connection) as counter:
+        start = time.perf_counter()
+        report = eps.validate_power_plan(plan)
+        elapsed = time.perf_counter() - start
+
+    assert [step.activity for step in report.steps] == [
+        "experiment",
+        "sleep",
+        "maneuver",
+        "sleep",
+    ]
+    assert report.model.history > 0
+    assert counter.count <= 3  # the orbit and a snapshot of its elements
+    assert elapsed < 0.5
+
+
+def test_eclipse_search_budget(sim_connection):
+    propagator = OrbitPropagator(sim_connection)
+    propagator.get_eclipses()  # reads the sun's direction
+
+    with RPCCounter(sim_connection) as counter:
+        start = time.perf_counter()
+        report = propagator.get_eclipses(orbits=100)
+        elapsed = time.perf_counter() - start
+
+    assert report.target == "Sun"
+    assert len(report.intervals) == 100
+    assert counter.count <= 3  # the orbit and a snapshot of its elements
+    assert elapsed < 0.5
+
+
+def test_alarm_at_eclipse(sim_connection):
+    manager = AlarmManager(sim_connection)
+    report = OrbitPropagator(sim_connection).get_eclipses(orbits=2)
+
+    entry = manager.add_alarm_at_eclipse(name="eclipse", description=None)
+    exit = manager.add_alarm_at_eclipse(name="sunrise", description=None, exit=True)
+
+    assert entry.time == report.intervals[0].start
+    assert exit.time == report.intervals[0].end
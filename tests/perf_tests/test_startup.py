@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+from llmsat.components.alarm_manager import AlarmManager
+from llmsat.libs.profiling import StartupProfile
+
+HEAVY_MODULES = ("numpy", "pandas", "beartype")
+
+
+def test_console_import_defers_heavy_modules():
+    code = f"import sys, json, llmsat.console; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert json.loads(output) == []
+
+
+def test_alarm_manager_removes_alarms_in_background(sim_connection):
+    kac = sim_connection.kerbal_alarm_clock
+    kac.create_alarm(type=kac.AlarmType.raw, name="stale", ut=0)
+
+    manager = AlarmManager(sim_connection, remove_alarms_on_init=True)
+
+    assert manager.get_alarms() == {}  # waits for the sync
+
+
+def test_startup_profile_counts_requests_per_phase(sim_connection):
+    profile = StartupProfile()
+    with profile.phase("connect"):
+        pass
+    profile.count_rpcs(sim_connection)
+    vessel = sim_connection.space_center.active_vessel
+    with profile.phase("read"):
+        vessel.met
+        vessel.met
+    profile.stop()
+
+    assert [(name, rpcs) for name, _, rpcs in profile.phases] == [
+        ("connect", None),
+        ("read", 2),
+    ]
+    assert profile.report().splitlines()[-1].startswith("total")
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from llmsat.components import task_manager
+from llmsat.components.task_manager import (
+    Task,
+    TaskManager,
+    TaskPriority,
+    TaskStatus,
+    TaskStore,
+)
+
+
+def make_task(id, hours=None, priority=TaskPriority.MEDIUM):
+    end = datetime(2045, 1, 1) + timedelta(hours=hours) if hours is not None else None
+    return Task(
+        id=id,
+        name=f"task {id}",
+        description=None,
+        start=None,
+        end=end,
+        priority=priority,
+    )
+
+
+def test_task_store_due_before(tmp_path):
+    store = TaskStore(tmp_path / "tasks.db")
+    store.insert(
+        [
+            make_task(1, hours=5),
+            make_task(2, hours=1, priority=TaskPriority.LOW),
+            make_task(3, hours=1, priority=TaskPriority.HIGH),
+            make_task(4),
+            make_task(5, hours=30),
+        ]
+    )
+    store.update(1, status=TaskStatus.COMPLETE)
+
+    due = store.due_before(datetime(2045, 1, 2))
+    assert [task.id for task in due] == [3, 2, 1]
+
+    pending = store.due_before(datetime(2045, 1, 2), [TaskStatus.PENDING])
+    assert [task.id for task in pending] == [3, 2]
+
+    plan = store._db.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE end_ut < ?", [0]
+    ).fetchall()
+    assert "tasks_end" in str(plan)
+
+
+def test_task_store_persists_and_rolls_back(tmp_path):
+    path = tmp_path / "tasks.db"
+    store = TaskStore(path)
+    store.insert([make_task(1), make_task(2)])
+    store.update(2, status=TaskStatus.PROGRESS)
+
+    with pytest.raises(ValueError):
+        store.insert([make_task(3), make_task(1)])  # duplicate ID, nothing inserted
+    assert len(store) == 2
+
+    reopened = TaskStore(path)
+    assert reopened.get(2).status == TaskStatus.PROGRESS.value
+    assert 3 not in reopened
+
+
+def test_task_store_rejects_duplicate_ids_in_batch(tmp_path):
+    store = TaskStore(tmp_path / "tasks.db")
+    assert store.next_id() == 1
+
+    with pytest.raises(ValueError):
+        store.insert([make_task(1), make_task(2), make_task(1)])
+    assert len(store) == 0
+
+    store.insert([make_task(1), make_task(7)])
+    assert store.next_id() == 8
+
+
+def test_next_task(sim_connection, tmp_path, monkeypatch):
+    monkeypatch.setattr(task_manager, "TASK_DB_PATH", tmp_path / "tasks.db")
+    service = TaskManager(sim_connection)
+
+    survey = service.add_task(name="Survey", end=datetime(2045, 1, 2))
+    burn = service.add_task(
+        name="Burn", priority=TaskPriority.HIGH, dependencies=[survey.id]
+    )
+    service.add_task(name="Report", end=datetime(2045, 1, 1))
+    assert service.next_task().name == "Report"
+
+    service.add_task_dependencies(survey.id, [3])
+    with pytest.raises(ValueError):
+        service.add_task_dependencies(3, [burn.id])
+
+    service.set_task_status(3, TaskStatus.COMPLETE)
+    assert service.next_task().name == "Survey"
+    service.set_task_status(survey.id, TaskStatus.COMPLETE)
+    assert service.next_task().name == "Burn"
+    assert service.read_tasks()[burn.id].dependencies == [survey.id]